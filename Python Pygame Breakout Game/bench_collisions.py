@@ -0,0 +1,66 @@
+import random
+import time
+
+import pygame
+
+from main import (Brick, BrickGrid, BALL_RADIUS, BRICK_CELL_H, BRICK_CELL_W,
+                  BRICK_TOP, COLORS_LIST)
+
+# Per-frame brick collision cost: the old per-entity list rebuild + collidelist
+# against the BrickGrid lookup. Each frame tests a few balls and lasers.
+BRICK_COUNTS = [100, 1000, 10000]
+COLS = 10
+BALLS = 3
+LASERS = 4
+FRAMES = 2000
+
+def build_bricks(count):
+    return [Brick(c * BRICK_CELL_W + 2, BRICK_TOP + r * BRICK_CELL_H, COLORS_LIST[r % len(COLORS_LIST)])
+            for r in range(count // COLS) for c in range(COLS)]
+
+def build_probes(count, rng):
+    field_bottom = BRICK_TOP + (count // COLS) * BRICK_CELL_H
+    frames = []
+    for _ in range(FRAMES):
+        rects = []
+        for _ in range(BALLS):
+            rects.append(pygame.Rect(rng.randint(0, 800), rng.randint(0, field_bottom), BALL_RADIUS * 2, BALL_RADIUS * 2))
+        for _ in range(LASERS):
+            rects.append(pygame.Rect(rng.randint(0, 800), rng.randint(0, field_bottom), 4, 15))
+        frames.append(rects)
+    return frames
+
+def bench_list(bricks, frames):
+    start = time.perf_counter()
+    for rects in frames:
+        for rect in rects:
+            rect.collidelist([b.rect for b in bricks])
+    return (time.perf_counter() - start) / len(frames)
+
+def bench_grid(grid, frames):
+    start = time.perf_counter()
+    for rects in frames:
+        for rect in rects:
+            grid.hit(rect)
+    return (time.perf_counter() - start) / len(frames)
+
+def main():
+    rng = random.Random(1234)
+    print(f"{'bricks':>8} {'list ms/frame':>14} {'grid ms/frame':>14} {'speedup':>8}")
+    for count in BRICK_COUNTS:
+        bricks = build_bricks(count)
+        grid = BrickGrid(bricks)
+        frames = build_probes(count, rng)
+
+        # Both paths must agree on which brick is hit
+        for rects in frames[:200]:
+            for rect in rects:
+                i = rect.collidelist([b.rect for b in bricks])
+                assert grid.hit(rect) is (bricks[i] if i != -1 else None)
+
+        t_list = bench_list(bricks, frames)
+        t_grid = bench_grid(grid, frames)
+        print(f"{count:>8} {t_list * 1000:>14.4f} {t_grid * 1000:>14.4f} {t_list / t_grid:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+from present import QUALITY, DEFAULT_QUALITY
+from main import (Game, BallSwarm, PowerType, POWERUP_DURATION, COLORS_LIST, SCREEN_WIDTH, SCREEN_HEIGHT, MAX_PARTICLES,
+                  BRICK_CELL_H, REWIND_SECONDS, INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE, INPUT_LAUNCH)
+
+# Reproducible stress scenarios built directly on Game. Every frame is split
+# into update (simulation minus brick collision queries), collision (time
+# inside BrickGrid lookups) and render (draw + present), and the suite reports
+# p50/p95/p99 frame times plus simulated ticks/sec as JSON. Garbage collector
+# pauses are timed with gc.callbacks; --trace-alloc also records each frame's
+# tracemalloc peak (slower, so frame times in that mode are not comparable).
+# --threaded runs the simulation/render pipeline instead: update is then the
+# time the main thread waits for the worker, and collision is not split out.
+# Latency is input sampling to the present that first shows its tick (one
+# frame later when threaded); fps is frames over total frame time.
+# --quality / --render-scale / --window draw into a smaller (or larger)
+# render target and scale it to the window; the fill line reports the pixels
+# saved and the time of that scale step, so runs at two scales show the
+# fill-rate savings.
+# The rewind buffer is off unless --rewind is given; its save-state push runs
+# inside every tick and would otherwise dominate update. With --rewind the
+# push is timed as its own phase (not split out when threaded).
+#   python benchmark.py --output bench.json
+#   python benchmark.py --render-scale 0.5 --baseline bench.json
+#   python benchmark.py --baseline bench.json --threshold 0.10
+# Runs on the dummy SDL video driver, so it works on a headless box.
+WARMUP_FRAMES = 60
+FRAMES = 600
+SEED = 1234
+
+SCENARIOS = {}
+
+def scenario(name):
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+def track_inputs(game):
+    inputs = INPUT_LAUNCH | INPUT_FIRE
+    lowest = game.lowest_ball()
+    if lowest is not None:
+        if lowest[0] < game.paddle.rect.centerx - 10:
+            inputs |= INPUT_LEFT
+        elif lowest[0] > game.paddle.rect.centerx + 10:
+            inputs |= INPUT_RIGHT
+    return inputs
+
+def load_level(game, level):
+    game.level = level
+    game.lives = 10**6
+    game.reset_level(new_pattern=True)
+
+# --- SCENARIOS ---
+# Each setup prepares the game and returns a per-frame hook (or None) that
+# keeps the scenario at full load.
+
+@scenario("full_level")
+def full_level(game):
+    load_level(game, 20)  # 4 + 20 // 2 = 14 rows, solid pattern
+    return None
+
+@scenario("multiball_storm")
+def multiball_storm(game):
+    load_level(game, 20)
+    rng = game.fx_rng
+    def refill(game):
+        while len(game.balls) < 200:
+            b = game.ball_pool.acquire(rng.randint(50, SCREEN_WIDTH - 50), rng.randint(450, 520), game.ball_speed_mult, game.rng)
+            b.stuck_to_paddle = False
+            b.dx = rng.uniform(-4, 4)
+            b.dy = -4
+            game.balls.append(b)
+    refill(game)
+    return refill
+
+@scenario("swarm_5k")
+def swarm_5k(game):
+    # multiball_storm at 25x the balls, on the array-backed swarm
+    game.swarm = True
+    game.balls = BallSwarm()
+    load_level(game, 20)
+    rng = game.fx_rng
+    def refill(game):
+        swarm = game.balls
+        while len(swarm) < 5000:
+            i = swarm.spawn(rng.randint(50, SCREEN_WIDTH - 50), rng.randint(450, 520), game.ball_speed_mult, game.rng)
+            swarm.stuck[i] = False
+            swarm.dx[i] = rng.uniform(-4, 4)
+            swarm.dy[i] = -4
+    refill(game)
+    return refill
+
+@scenario("particles_20k")
+def particles_20k(game):
+    load_level(game, 2)
+    def refill(game):
+        while len(game.particles) < MAX_PARTICLES:
+            game.particles.emit(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, COLORS_LIST[len(game.particles) % len(COLORS_LIST)])
+    refill(game)
+    return refill
+
+@scenario("laser_barrage")
+def laser_barrage(game):
+    load_level(game, 20)
+    def keep_firing(game):
+        if not game.paddle.laser_active:
+            game.paddle.activate_powerup(PowerType.LASER)
+        game.paddle.powerup_timer = POWERUP_DURATION
+    keep_firing(game)
+    return keep_firing
+
+@scenario("endless_deep")
+def endless_deep(game):
+    # A million rows into the endless field: cost should match its first screen
+    game.endless = True
+    game.lives = 10**6
+    game.reset_level(new_pattern=True)
+    game.bricks.scroll_by(1000000 * BRICK_CELL_H)
+    return None
+
+@scenario("pause_overlay")
+def pause_overlay(game):
+    load_level(game, 20)
+    for _ in range(30):
+        game.step(track_inputs(game))
+    game.state = "PAUSED"
+    return None
+
+# --- RUNNER ---
+class PhaseTimer:
+    # Wraps functions called inside step() so their time can be split out of it
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def wrap(self, func):
+        def timed(*args):
+            start = time.perf_counter()
+            result = func(*args)
+            self.elapsed += time.perf_counter() - start
+            return result
+        return timed
+
+class CollisionTimer(PhaseTimer):
+    # The brick index lookups
+    def install(self, game):
+        if getattr(game.bricks, "timed_by", None) is not self:
+            game.bricks.hit = self.wrap(game.bricks.hit)
+            game.bricks.query = self.wrap(game.bricks.query)
+            game.bricks.timed_by = self
+
+class GCMonitor:
+    # Times every collection the cyclic garbage collector runs
+    def __init__(self):
+        self.pauses_ms = []
+        self.collected = 0
+        self.started = None
+
+    def callback(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pauses_ms.append((time.perf_counter() - self.started) * 1000)
+            self.collected += info["collected"]
+            self.started = None
+
+    def __enter__(self):
+        gc.callbacks.append(self.callback)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self.callback)
+
+    def report(self, frames):
+        pauses = self.pauses_ms or [0.0]
+        return {
+            "collections_per_1k_frames": round(len(self.pauses_ms) * 1000 / frames, 2),
+            "pause_ms_total": round(sum(self.pauses_ms), 3),
+            "pause_ms_max": round(max(pauses), 4),
+            "objects_collected": self.collected,
+        }
+
+def percentiles(samples_ms):
+    a = np.asarray(samples_ms)
+    return {
+        "mean": round(float(a.mean()), 4),
+        "p50": round(float(np.percentile(a, 50)), 4),
+        "p95": round(float(np.percentile(a, 95)), 4),
+        "p99": round(float(np.percentile(a, 99)), 4),
+        "max": round(float(a.max()), 4),
+    }
+
+def run_scenario(name, frames, dirty, trace_alloc=False, threaded=False, quality=DEFAULT_QUALITY,
+                 render_scale=None, window_size=None, rewind=False):
+    game = Game(seed=SEED, dirty_rendering=dirty, threaded=threaded, scores_file=None,
+                quality=quality, render_scale=render_scale, window_size=window_size,
+                rewind_seconds=REWIND_SECONDS if rewind else 0)
+    game.state = "PLAYING"
+    hook = SCENARIOS[name](game)
+    timer = CollisionTimer()
+    rewind_timer = PhaseTimer()
+    if game.rewind is not None and not threaded:
+        game.rewind.push = rewind_timer.wrap(game.rewind.push)
+    monitor = GCMonitor()
+
+    update_ms, collision_ms, render_ms, total_ms, alloc_kib, latency_ms, present_ms = [], [], [], [], [], [], []
+    rewind_ms = []
+    ticks = 0
+    sampled = None  # Input time of the tick the next threaded present shows
+    for frame in range(WARMUP_FRAMES + frames):
+        if frame == WARMUP_FRAMES:
+            monitor.__enter__()
+            if trace_alloc:
+                tracemalloc.start()
+        if trace_alloc and frame >= WARMUP_FRAMES:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        pygame.event.pump()
+        t0 = time.perf_counter()
+        if threaded:
+            game.sync_pipeline()  # The main thread owns the game again
+        t_hook = time.perf_counter()
+        if hook is not None:
+            hook(game)
+        if not threaded:
+            timer.install(game)  # level changes replace the brick grid
+        timer.elapsed = rewind_timer.elapsed = 0.0
+
+        t_input = time.perf_counter()
+        stepped = game.state == "PLAYING"
+        if threaded:
+            game.dispatch([track_inputs(game)] if stepped else [])
+        elif stepped:
+            game.step(track_inputs(game))
+            game.particles.update(game.timestep)
+        t1 = time.perf_counter()
+        if threaded and stepped:
+            game.draw_snapshot(game.snapshots[0])
+            game.presenter.present()
+        elif game.state == "PLAYING" and game.dirty_rendering and not game.endless:
+            game.draw_playing_dirty()
+        else:
+            game.draw_frame()
+            game.presenter.present()
+        game.sound_manager.flush()
+        t2 = time.perf_counter()
+        hook_time = t_input - t_hook
+
+        if frame >= WARMUP_FRAMES:
+            if trace_alloc:
+                alloc_kib.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+            ticks += stepped
+            collision = timer.elapsed
+            update_ms.append((t1 - t0 - hook_time - collision - rewind_timer.elapsed) * 1000)
+            collision_ms.append(collision * 1000)
+            rewind_ms.append(rewind_timer.elapsed * 1000)
+            render_ms.append((t2 - t1) * 1000)
+            present_ms.append(game.presenter.present_seconds * 1000)
+            total_ms.append((t2 - t0 - hook_time) * 1000)
+            if threaded and sampled is not None:
+                latency_ms.append((t2 - sampled) * 1000)
+            elif not threaded and stepped:
+                latency_ms.append((t2 - t_input) * 1000)
+        sampled = t_input if threaded and stepped else None
+
+    monitor.__exit__()
+    if trace_alloc:
+        tracemalloc.stop()
+    if threaded:
+        game.sync_pipeline()
+        game.worker.close()
+
+    sim_seconds = (sum(update_ms) + sum(collision_ms)) / 1000
+    result = {
+        "frames": frames,
+        "threaded": threaded,
+        "update_ms": percentiles(update_ms),
+        "collision_ms": percentiles(collision_ms),
+        "render_ms": percentiles(render_ms),
+        "frame_ms": percentiles(total_ms),
+        "latency_ms": percentiles(latency_ms or [0.0]),
+        "fps": round(frames * 1000 / sum(total_ms), 1),
+        "ticks_per_sec": round(ticks / sim_seconds) if ticks and sim_seconds > 0 and not threaded else None,
+        "entities": game.entity_counts(),
+        "audio": dict(game.sound_manager.counters),
+        "rewind": dict(game.rewind.stats(), push_ms=percentiles(rewind_ms)) if game.rewind is not None else None,
+        "present": dict(game.presenter.stats(), present_ms=percentiles(present_ms)),
+        "gc": monitor.report(frames),
+    }
+    if trace_alloc:
+        result["alloc_peak_kib"] = percentiles(alloc_kib)
+    return result
+
+def compare(results, baseline, threshold, metric):
+    # A scenario regresses when its frame-time metric grows by more than threshold
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        new, old = result["frame_ms"][metric], base["frame_ms"][metric]
+        change = (new - old) / old if old > 0 else 0.0
+        flag = "REGRESSION" if change > threshold else "ok"
+        print(f"  {name:<18} {metric} {old:8.3f} -> {new:8.3f} ms ({change:+.1%}) {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Breakout performance benchmark suite")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="measured frames per scenario")
+    parser.add_argument("--dirty-rects", action="store_true", help="use the dirty-rect renderer")
+    parser.add_argument("--trace-alloc", action="store_true", help="record per-frame allocation peaks with tracemalloc")
+    parser.add_argument("--threaded", action="store_true", help="simulate on a worker thread while the previous frame renders")
+    parser.add_argument("--quality", choices=QUALITY, default=DEFAULT_QUALITY, help="render quality preset (see present.py)")
+    parser.add_argument("--render-scale", type=float, help="internal render resolution as a fraction of 800x600, overrides --quality's")
+    parser.add_argument("--rewind", action="store_true", help="keep the rewind buffer on and time its pushes")
+    parser.add_argument("--window", type=lambda v: tuple(map(int, v.split("x"))), metavar="WxH", help="window size the render target is scaled to")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing (0.10 = 10%%)")
+    parser.add_argument("--metric", default="p95", choices=["p50", "p95", "p99", "mean"], help="frame-time metric to compare")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "dirty_rects": args.dirty_rects,
+        "threaded": args.threaded,
+        "quality": args.quality,
+        "render_scale": args.render_scale,
+        "rewind": args.rewind,
+        "scenarios": {},
+    }
+    print(f"{'scenario':<18} {'update p50':>10} {'collide p50':>11} {'render p50':>10} "
+          f"{'frame p50':>9} {'p95':>8} {'p99':>8} {'latency p50':>11} {'fps':>7} {'ticks/s':>9}")
+    for name in args.scenario or SCENARIOS:
+        r = run_scenario(name, args.frames, args.dirty_rects, args.trace_alloc, args.threaded,
+                         args.quality, args.render_scale, args.window, args.rewind)
+        results["scenarios"][name] = r
+        f = r["frame_ms"]
+        print(f"{name:<18} {r['update_ms']['p50']:>10.3f} {r['collision_ms']['p50']:>11.3f} "
+              f"{r['render_ms']['p50']:>10.3f} {f['p50']:>9.3f} {f['p95']:>8.3f} {f['p99']:>8.3f} "
+              f"{r['latency_ms']['p50']:>11.3f} {r['fps']:>7.1f} {r['ticks_per_sec'] or 0:>9,}")
+        g = r["gc"]
+        line = (f"{'':<18} gc: {g['collections_per_1k_frames']} collections/1k frames, "
+                f"{g['pause_ms_total']:.2f} ms total, {g['pause_ms_max']:.3f} ms max")
+        if args.trace_alloc:
+            a = r["alloc_peak_kib"]
+            line += f" | alloc peak/frame p50 {a['p50']:.1f} KiB p99 {a['p99']:.1f} KiB"
+        print(line)
+        s = r["audio"]
+        if s["requested"]:
+            print(f"{'':<18} audio: {s['requested']} sounds -> {s['played']} voices "
+                  f"({s['merged']} merged, {s['dropped']} dropped, {s['stolen']} stolen)")
+        w = r["rewind"]
+        if w and w["entries"]:
+            print(f"{'':<18} rewind: {w['push_us']:.1f} us/snapshot (p50 {w['push_ms']['p50'] * 1000:.1f} us/frame), "
+                  f"{w['bytes_per_push']:,} bytes/snapshot every {w['stride']} tick(s), "
+                  f"{w['entries']} held in {w['bytes'] / 1024:,.0f} KiB spanning {w['seconds']} s")
+        v = r["present"]
+        print(f"{'':<18} fill: {v['canvas'][0]}x{v['canvas'][1]} canvas -> {v['window'][0]}x{v['window'][1]} window, "
+              f"{v['fill_saving']:.0%} fewer pixels per full-screen pass, present p50 {v['present_ms']['p50']:.3f} ms")
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.baseline} (threshold {args.threshold:.0%}):")
+        if compare(results, baseline, args.threshold, args.metric):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
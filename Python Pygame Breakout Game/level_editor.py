@@ -1,113 +1,355 @@
-import pygame
-import json
-import os
-
-# CONFIG
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-BRICK_WIDTH = 78
-BRICK_HEIGHT = 25
-COLS = 10
-ROWS = 14
-SAVE_FILE = "custom_levels.json"
-
-# COLORS
-BLACK = (15, 15, 25)
-WHITE = (255, 255, 255)
-colors = [
-    (255, 80, 80),   # Red
-    (255, 165, 0),   # Orange
-    (255, 255, 80),  # Yellow
-    (80, 255, 80),   # Green
-    (80, 80, 255),   # Blue
-    (147, 112, 219), # Purple
-    (0, 255, 255)    # Cyan
-]
-
-class Editor:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Level Editor - 1-7: Color, Click: Place/Remove, S: Save")
-        self.clock = pygame.time.Clock()
-        self.grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
-        self.current_color_idx = 0
-        self.font = pygame.font.SysFont("Arial", 18)
-
-    def draw_grid(self):
-        for r in range(ROWS):
-            for c in range(COLS):
-                rect = pygame.Rect(c * (BRICK_WIDTH + 2) + 2, 60 + r * (BRICK_HEIGHT + 2), BRICK_WIDTH, BRICK_HEIGHT)
-                pygame.draw.rect(self.screen, (30, 30, 40), rect, 1) # Outline
-                
-                # Draw active brick
-                if self.grid[r][c] is not None:
-                    color = colors[self.grid[r][c]]
-                    pygame.draw.rect(self.screen, color, rect)
-
-    def save_level(self):
-        # Convert grid to simple list of dicts
-        level_data = []
-        for r in range(ROWS):
-            for c in range(COLS):
-                if self.grid[r][c] is not None:
-                    level_data.append({
-                        "r": r, 
-                        "c": c, 
-                        "color_idx": self.grid[r][c]
-                    })
-        
-        with open(SAVE_FILE, 'w') as f:
-            json.dump({"custom_level": level_data}, f)
-        print("Level saved to custom_levels.json!")
-
-    def run(self):
-        running = True
-        while running:
-            self.screen.fill(BLACK)
-            
-            # Instructions
-            text = f"Selected Color: {self.current_color_idx + 1}"
-            col_surf = self.font.render(text, True, colors[self.current_color_idx])
-            self.screen.blit(col_surf, (10, 10))
-            self.screen.blit(self.font.render("Press S to Save", True, WHITE), (200, 10))
-            
-            self.draw_grid()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                
-                # Keyboard: Select Colors and Save
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_s:
-                        self.save_level()
-                    if pygame.K_1 <= event.key <= pygame.K_7:
-                        self.current_color_idx = event.key - pygame.K_1
-
-                # Mouse: Paint Bricks
-                if pygame.mouse.get_pressed()[0]: # Left click
-                    mx, my = pygame.mouse.get_pos()
-                    # Convert mouse to grid coords
-                    if my > 60:
-                        c = (mx - 2) // (BRICK_WIDTH + 2)
-                        r = (my - 60) // (BRICK_HEIGHT + 2)
-                        
-                        if 0 <= r < ROWS and 0 <= c < COLS:
-                            self.grid[r][c] = self.current_color_idx
-                
-                # Mouse: Erase (Right Click)
-                if pygame.mouse.get_pressed()[2]: 
-                    mx, my = pygame.mouse.get_pos()
-                    if my > 60:
-                        c = (mx - 2) // (BRICK_WIDTH + 2)
-                        r = (my - 60) // (BRICK_HEIGHT + 2)
-                        if 0 <= r < ROWS and 0 <= c < COLS:
-                            self.grid[r][c] = None
-
-            pygame.display.flip()
-            self.clock.tick(60)
-        pygame.quit()
-
-if __name__ == "__main__":
-    Editor().run()
\ No newline at end of file
+import argparse
+import os
+
+import numpy as np
+import pygame
+
+from level_pack import LevelPack, append_level
+
+# CONFIG
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+BRICK_WIDTH = 78
+BRICK_HEIGHT = 25
+COLS = 10
+ROWS = 14
+PLAY_COLS = 10  # The game plays this top-left part of a level (main.BRICK_COLS x PACK_ROWS)
+PLAY_ROWS = 15
+SAVE_FILE = "levels.bkl"
+VIEW_TOP = 40  # The grid view starts below the toolbar
+SCROLL_SPEED = 12  # pixels per frame for the arrow keys
+MAX_UNDO = 500
+
+# Cell pitch (brick + gap) per zoom level; index DEFAULT_ZOOM is the game's own layout
+ZOOM_LEVELS = [(160, 54), (80, 27), (40, 14), (20, 7), (10, 4), (5, 2), (3, 1)]
+DEFAULT_ZOOM = 1
+
+# COLORS
+BLACK = (15, 15, 25)
+WHITE = (255, 255, 255)
+OUTLINE = (30, 30, 40)
+VOID = (5, 5, 10)  # Outside the grid
+colors = [
+    (255, 80, 80),   # Red
+    (255, 165, 0),   # Orange
+    (255, 255, 80),  # Yellow
+    (80, 255, 80),   # Green
+    (80, 80, 255),   # Blue
+    (147, 112, 219), # Purple
+    (0, 255, 255)    # Cyan
+]
+# Cell code -> color: 0 is empty, 1-7 are colors[code - 1] (the level pack codes).
+# The view also uses a code for outside the grid and one for empty-cell outlines.
+SHADES = [BLACK] + colors + [VOID, OUTLINE]
+VOID_CODE = len(colors) + 1
+OUTLINE_CODE = VOID_CODE + 1
+
+def cell_line(r0, c0, r1, c1):
+    # Every cell on the line between two cells (Bresenham), so fast drags
+    # paint a connected stroke however far the mouse moved between samples
+    dr, dc = abs(r1 - r0), abs(c1 - c0)
+    sr, sc = (1 if r1 > r0 else -1), (1 if c1 > c0 else -1)
+    err = dc - dr
+    r, c = r0, c0
+    cells = [(r, c)]
+    while (r, c) != (r1, c1):
+        e2 = 2 * err
+        if e2 > -dr:
+            err -= dr
+            c += sc
+        if e2 < dc:
+            err += dc
+            r += sr
+        cells.append((r, c))
+    return cells
+
+class Editor:
+    # The grid is a (rows, cols) array of pack cell codes. The view is cached
+    # on a surface and only repainted where something changed: painted cells,
+    # strips exposed by scrolling, everything after a zoom. Each stroke is one
+    # undo step, stored as (flat cell indices, old codes, new code).
+    def __init__(self, rows=ROWS, cols=COLS, pack_file=SAVE_FILE, open_level=None):
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Level Editor - 1-7: Color, LMB: Paint, RMB: Erase, Wheel/Arrows: Scroll, "
+                                   "Ctrl+Wheel/+-: Zoom, Ctrl+Z/Y: Undo/Redo, S: Save")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont("Arial", 18)
+        self.pack_file = pack_file
+        self.grid = np.zeros((rows, cols), np.uint8)
+        if open_level is not None:
+            self.load_level(open_level)
+        self.current_color_idx = 0
+
+        self.view = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT - VIEW_TOP), 0, 32)
+        self.zoom = DEFAULT_ZOOM
+        self.pitch = ZOOM_LEVELS[self.zoom]
+        self.build_tiles()
+        self.scroll_x = self.scroll_y = 0
+
+        self.stroke = None  # {flat index: old code} while a mouse button is held
+        self.stroke_value = 0
+        self.last_cell = None
+        self.undo_stack, self.redo_stack = [], []
+        self.toolbar = None
+        self.toolbar_text = None
+        self.render()
+
+    def load_level(self, n):
+        try:
+            pack = LevelPack.open(self.pack_file)
+            cells = pack.level(n - 1)
+            pack.close()
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Error loading level {n}: {e}")
+            return
+        rows = max(cells.shape[0], self.grid.shape[0])
+        cols = max(cells.shape[1], self.grid.shape[1])
+        self.grid = np.zeros((rows, cols), np.uint8)
+        self.grid[:cells.shape[0], :cells.shape[1]] = cells
+
+    # --- VIEW ---
+    def build_tiles(self):
+        # One pre-drawn tile per cell code at the current zoom, in view pixel format
+        pw, ph = self.pitch
+        # Gap left of and below each brick, scaled down from the game's 2 px
+        gx = 2 if pw >= 20 else int(pw >= 4)
+        gy = 2 if ph >= 7 else int(ph >= 3)
+        shades = np.empty((VOID_CODE + 1, ph, pw), np.uint8)
+        shades[:] = np.arange(VOID_CODE + 1)[:, None, None]
+        if pw >= 8 and ph >= 4:
+            # Empty cells keep a 1 px outline, like the game's brick rects
+            shades[0, :, [gx, pw - 1]] = OUTLINE_CODE
+            shades[0, [0, ph - gy - 1], gx:] = OUTLINE_CODE
+        shades[:VOID_CODE, :, :gx] = 0
+        shades[:VOID_CODE, ph - gy:, :] = 0
+        mapped = np.array([self.view.map_rgb(c) for c in SHADES], np.uint32)
+        self.tiles = mapped[shades]
+
+    def render(self, rect=None):
+        # Repaint part of the cached view (default: all of it) from the grid
+        rect = self.view.get_rect() if rect is None else rect.clip(self.view.get_rect())
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        pw, ph = self.pitch
+        x0, y0 = rect.left + self.scroll_x, rect.top + self.scroll_y
+        c0, c1 = x0 // pw, (x0 + rect.width - 1) // pw + 1
+        r0, r1 = y0 // ph, (y0 + rect.height - 1) // ph + 1
+        codes = np.full((r1 - r0, c1 - c0), VOID_CODE, np.uint8)
+        cells = self.grid[r0:r1, c0:c1]
+        codes[:cells.shape[0], :cells.shape[1]] = cells
+        # Lay the cells' tiles out side by side, then cut the rect out of them
+        pixels = self.tiles[codes].transpose(0, 2, 1, 3).reshape((r1 - r0) * ph, (c1 - c0) * pw)
+        pixels = pixels[y0 - r0 * ph:y0 - r0 * ph + rect.height, x0 - c0 * pw:x0 - c0 * pw + rect.width]
+        pygame.surfarray.blit_array(self.view.subsurface(rect), pixels.T)
+
+    def cell_rect(self, r, c):
+        pw, ph = self.pitch
+        return pygame.Rect(c * pw - self.scroll_x, r * ph - self.scroll_y, pw, ph)
+
+    def render_cells(self, flat):
+        # Repaint changed cells, or the whole view when that is cheaper
+        if len(flat) > 256:
+            self.render()
+            return
+        cols = self.grid.shape[1]
+        for i in flat:
+            self.render(self.cell_rect(int(i) // cols, int(i) % cols))
+
+    def scroll_by(self, dx, dy):
+        pw, ph = self.pitch
+        rows, cols = self.grid.shape
+        vw, vh = self.view.get_size()
+        x = min(max(self.scroll_x + dx, 0), max(cols * pw - vw, 0))
+        y = min(max(self.scroll_y + dy, 0), max(rows * ph - vh, 0))
+        dx, dy = x - self.scroll_x, y - self.scroll_y
+        if not dx and not dy:
+            return
+        self.scroll_x, self.scroll_y = x, y
+        if abs(dx) >= vw or abs(dy) >= vh:
+            self.render()
+            return
+        # Shift what is already drawn and paint only the exposed strips
+        self.view.scroll(-dx, -dy)
+        if dx:
+            self.render(pygame.Rect(vw - dx if dx > 0 else 0, 0, abs(dx), vh))
+        if dy:
+            self.render(pygame.Rect(0, vh - dy if dy > 0 else 0, vw, abs(dy)))
+
+    def set_zoom(self, zoom, anchor):
+        # Zoom around anchor (a view position), keeping the grid point under it fixed
+        zoom = min(max(zoom, 0), len(ZOOM_LEVELS) - 1)
+        if zoom == self.zoom:
+            return
+        (old_w, old_h), (new_w, new_h) = self.pitch, ZOOM_LEVELS[zoom]
+        ax, ay = anchor
+        gx = (ax + self.scroll_x) / old_w
+        gy = (ay + self.scroll_y) / old_h
+        self.zoom, self.pitch = zoom, (new_w, new_h)
+        self.build_tiles()
+        self.scroll_x = self.scroll_y = 0
+        self.scroll_by(round(gx * new_w - ax), round(gy * new_h - ay))
+        self.render()
+
+    # --- EDITING ---
+    def cell_at(self, pos):
+        pw, ph = self.pitch
+        return (pos[1] - VIEW_TOP + self.scroll_y) // ph, (pos[0] + self.scroll_x) // pw
+
+    def begin_stroke(self, pos, value):
+        self.stroke = {}
+        self.stroke_value = value
+        self.last_cell = self.cell_at(pos)
+        self.paint(cell_line(*self.last_cell, *self.last_cell))
+
+    def extend_stroke(self, pos):
+        cell = self.cell_at(pos)
+        if cell != self.last_cell:
+            self.paint(cell_line(*self.last_cell, *cell))
+            self.last_cell = cell
+
+    def paint(self, cells):
+        rows, cols = self.grid.shape
+        value = self.stroke_value
+        changed = []
+        for r, c in cells:
+            if 0 <= r < rows and 0 <= c < cols and self.grid[r, c] != value:
+                i = r * cols + c
+                self.stroke.setdefault(i, int(self.grid[r, c]))
+                self.grid[r, c] = value
+                changed.append(i)
+        if changed:
+            self.render_cells(changed)
+
+    def end_stroke(self):
+        if self.stroke:
+            flat = np.fromiter(self.stroke, np.uint32, len(self.stroke))
+            old = np.fromiter(self.stroke.values(), np.uint8, len(self.stroke))
+            self.undo_stack.append((flat, old, self.stroke_value))
+            del self.undo_stack[:-MAX_UNDO]
+            self.redo_stack.clear()
+        self.stroke = None
+
+    def undo(self):
+        if self.undo_stack:
+            flat, old, value = self.undo_stack.pop()
+            self.grid.flat[flat] = old
+            self.redo_stack.append((flat, old, value))
+            self.render_cells(flat)
+
+    def redo(self):
+        if self.redo_stack:
+            flat, old, value = self.redo_stack.pop()
+            self.grid.flat[flat] = value
+            self.undo_stack.append((flat, old, value))
+            self.render_cells(flat)
+
+    def save_level(self):
+        # Append the grid as a new level at the end of the pack
+        try:
+            n = append_level(self.pack_file, self.grid)
+        except (OSError, ValueError) as e:
+            print(f"Error saving level: {e}")
+            return
+        print(f"Level saved to {self.pack_file} as level {n + 1}!")
+
+    # --- FRAME ---
+    def draw_toolbar(self):
+        # Re-rendered only when its text changes
+        rows, cols = self.grid.shape
+        text = (f"Color {self.current_color_idx + 1} | {rows}x{cols} | zoom {self.zoom} | "
+                f"undo {len(self.undo_stack)} redo {len(self.redo_stack)} | S: Save")
+        if text != self.toolbar_text:
+            self.toolbar_text = text
+            self.toolbar = pygame.Surface((SCREEN_WIDTH, VIEW_TOP)).convert()
+            self.toolbar.fill(BLACK)
+            pygame.draw.rect(self.toolbar, colors[self.current_color_idx], (10, 10, 20, 20))
+            self.toolbar.blit(self.font.render(text, True, WHITE), (40, 10))
+        self.screen.blit(self.toolbar, (0, 0))
+
+    def draw(self):
+        self.draw_toolbar()
+        self.screen.blit(self.view, (0, VIEW_TOP))
+        pw, ph = self.pitch
+        clip = self.screen.get_clip()
+        self.screen.set_clip(pygame.Rect(0, VIEW_TOP, SCREEN_WIDTH, SCREEN_HEIGHT - VIEW_TOP))
+        # Part of the grid the game plays
+        play = pygame.Rect(-self.scroll_x, VIEW_TOP - self.scroll_y, PLAY_COLS * pw, PLAY_ROWS * ph)
+        pygame.draw.rect(self.screen, (90, 90, 110), play, 1)
+        # Hovered cell
+        r, c = self.cell_at(pygame.mouse.get_pos())
+        if 0 <= r < self.grid.shape[0] and 0 <= c < self.grid.shape[1]:
+            hover = self.cell_rect(r, c).move(0, VIEW_TOP)
+            pygame.draw.rect(self.screen, colors[self.current_color_idx], hover, 1)
+        self.screen.set_clip(clip)
+
+    def handle_event(self, event):
+        ctrl = pygame.key.get_mods() & pygame.KMOD_CTRL
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            if ctrl and event.key == pygame.K_z:
+                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                    self.redo()
+                else:
+                    self.undo()
+            elif ctrl and event.key == pygame.K_y:
+                self.redo()
+            elif event.key == pygame.K_s:
+                self.save_level()
+            elif pygame.K_1 <= event.key <= pygame.K_7:
+                self.current_color_idx = event.key - pygame.K_1
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.set_zoom(self.zoom - 1, self.view.get_rect().center)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.set_zoom(self.zoom + 1, self.view.get_rect().center)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= VIEW_TOP and self.stroke is None:
+            # Mouse: Paint (left) or Erase (right)
+            if event.button == 1:
+                self.begin_stroke(event.pos, self.current_color_idx + 1)
+            elif event.button == 3:
+                self.begin_stroke(event.pos, 0)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 3):
+            self.end_stroke()
+        elif event.type == pygame.MOUSEMOTION:
+            if self.stroke is not None:
+                self.extend_stroke(event.pos)
+            elif event.buttons[1]:
+                self.scroll_by(-event.rel[0], -event.rel[1])  # Middle drag pans
+        elif event.type == pygame.MOUSEWHEEL:
+            if ctrl:
+                mx, my = pygame.mouse.get_pos()
+                self.set_zoom(self.zoom - event.y, (mx, my - VIEW_TOP))
+            elif pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                self.scroll_by(-event.y * self.pitch[0] * 2, 0)
+            else:
+                self.scroll_by(-event.x * self.pitch[0] * 2, -event.y * self.pitch[1] * 2)
+        return True
+
+    def run(self):
+        running = True
+        while running:
+            for event in pygame.event.get():
+                running = self.handle_event(event) and running
+
+            keys = pygame.key.get_pressed()
+            dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * SCROLL_SPEED
+            dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * SCROLL_SPEED
+            if dx or dy:
+                self.scroll_by(dx, dy)
+                if self.stroke is not None:
+                    self.extend_stroke(pygame.mouse.get_pos())  # The grid moved under the cursor
+
+            self.draw()
+            pygame.display.flip()
+            self.clock.tick(60)
+        pygame.quit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paint Breakout levels and append them to a level pack")
+    parser.add_argument("--rows", type=int, default=ROWS, help="grid rows")
+    parser.add_argument("--cols", type=int, default=COLS, help="grid columns")
+    parser.add_argument("--pack", default=SAVE_FILE, help="level pack to load from and save to")
+    parser.add_argument("--open", type=int, metavar="N", help="start from level N of the pack")
+    args = parser.parse_args()
+    Editor(args.rows, args.cols, args.pack, args.open).run()
@@ -0,0 +1,171 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+# Binary level pack: a header, the level records, then an index with one entry
+# per level. Each record is a rows x cols grid of 3-bit cells (0 = empty,
+# 1-7 = color index + 1) packed little-endian, so a 10 x 14 level is 53 bytes.
+# Level N is found with a single fixed-size index read and decoded straight
+# from the memory-mapped file, without touching any other level. Appending
+# writes the new record over the old index and rewrites the index after it.
+MAGIC = b'BKLP'
+VERSION = 1
+HEADER = struct.Struct('<4sBIQ')  # magic, version, level count, index offset
+ENTRY = struct.Struct('<QHH')     # record offset, rows, cols
+CELL_BITS = 3
+EMPTY = 0
+MAX_COLOR = (1 << CELL_BITS) - 2  # highest color index a cell can hold
+
+def encode_grid(cells):
+    # cells: (rows, cols) array of cell codes
+    codes = np.asarray(cells, np.uint8).ravel()
+    bits = (codes[:, None] >> np.arange(CELL_BITS, dtype=np.uint8)) & 1
+    return np.packbits(bits.ravel(), bitorder='little').tobytes()
+
+def record_size(rows, cols):
+    return (rows * cols * CELL_BITS + 7) // 8
+
+class LevelPack:
+    def __init__(self, data):
+        if len(data) < HEADER.size:
+            raise ValueError("level pack is truncated")
+        magic, version = bytes(data[:4]), data[4]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Breakout level pack (or unsupported version)")
+        _, _, self.count, self.index_offset = HEADER.unpack_from(data, 0)
+        self.data = data
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            pack = cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        try:
+            pack.check()
+        except ValueError:
+            pack.close()
+            raise
+        return pack
+
+    def check(self):
+        # The index and every record it points at must lie inside the file,
+        # records between the header and the index
+        if self.index_offset < HEADER.size or self.index_offset + self.count * ENTRY.size > len(self.data):
+            raise ValueError("level pack is truncated")
+        for n in range(self.count):
+            offset, rows, cols = ENTRY.unpack_from(self.data, self.index_offset + n * ENTRY.size)
+            if offset < HEADER.size or offset + record_size(rows, cols) > self.index_offset:
+                raise ValueError(f"level pack is corrupt: level {n + 1} lies outside its records")
+
+    def __len__(self):
+        return self.count
+
+    def digest(self):
+        # CRC of the whole pack; replays record it so they re-run on the same levels
+        return zlib.crc32(self.data)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def level(self, n):
+        # (rows, cols) array of cell codes for level n (0-based)
+        if not 0 <= n < self.count:
+            raise IndexError(f"level {n} not in pack of {self.count}")
+        offset, rows, cols = ENTRY.unpack_from(self.data, self.index_offset + n * ENTRY.size)
+        raw = np.frombuffer(self.data, np.uint8, record_size(rows, cols), offset)
+        bits = np.unpackbits(raw, bitorder='little')[:rows * cols * CELL_BITS]
+        codes = bits.reshape(-1, CELL_BITS) @ (1 << np.arange(CELL_BITS))
+        return codes.astype(np.uint8).reshape(rows, cols)
+
+    def bricks(self, n):
+        # (r, c, color_idx) for every brick in level n, row-major
+        cells = self.level(n)
+        return [(int(r), int(c), int(cells[r, c]) - 1) for r, c in zip(*np.nonzero(cells))]
+
+def write_pack(path, levels):
+    # Write a new pack holding every (rows, cols) cell grid in levels
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, HEADER.size))
+    for cells in levels:
+        append_level(path, cells)
+
+def append_level(path, cells):
+    # Add one level to the end of the pack at path (created if missing);
+    # returns its 0-based level number.
+    cells = np.asarray(cells, np.uint8)
+    rows, cols = cells.shape
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, HEADER.size))
+    with open(path, 'r+b') as f:
+        pack = LevelPack(f.read(HEADER.size))
+        f.seek(pack.index_offset)
+        index = f.read(pack.count * ENTRY.size)
+        if len(index) != pack.count * ENTRY.size:
+            raise ValueError("level pack is truncated")
+
+        record = encode_grid(cells)
+        f.seek(pack.index_offset)
+        f.write(record)
+        f.write(index)
+        f.write(ENTRY.pack(pack.index_offset, rows, cols))
+        f.truncate()
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, pack.count + 1, pack.index_offset + len(record)))
+    return pack.count
+
+def grid_from_bricks(bricks, rows=None, cols=None):
+    # bricks: iterable of (r, c, color_idx) -> (rows, cols) array of cell codes
+    bricks = list(bricks)
+    rows = rows or max((r for r, _, _ in bricks), default=-1) + 1
+    cols = cols or max((c for _, c, _ in bricks), default=-1) + 1
+    cells = np.full((rows, cols), EMPTY, np.uint8)
+    for r, c, color_idx in bricks:
+        if 0 <= color_idx <= MAX_COLOR:
+            cells[r, c] = color_idx + 1
+    return cells
+
+def convert_json(json_path, pack_path, cols=10):
+    # custom_levels.json holds {"name": [{"r", "c", "color_idx"}, ...]}; every
+    # list in it becomes one level, in file order.
+    with open(json_path) as f:
+        data = json.load(f)
+    levels = [grid_from_bricks(((b["r"], b["c"], b["color_idx"]) for b in level), cols=cols)
+              for level in data.values() if isinstance(level, list) and level]
+    write_pack(pack_path, levels)
+    return len(levels)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect Breakout level packs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="convert a custom_levels.json file into a level pack")
+    convert.add_argument("json_file")
+    convert.add_argument("pack_file")
+    info = sub.add_parser("info", help="list the levels in a pack")
+    info.add_argument("pack_file")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert_json(args.json_file, args.pack_file)
+        print(f"Wrote {count} level(s) to {args.pack_file}")
+        return
+
+    try:
+        pack = LevelPack.open(args.pack_file)
+    except (OSError, ValueError) as e:
+        print(f"{args.pack_file}: {e}")
+        sys.exit(1)
+    print(f"{args.pack_file}: {len(pack)} level(s), {os.path.getsize(args.pack_file)} bytes, crc {pack.digest():08x}")
+    for n in range(len(pack)):
+        cells = pack.level(n)
+        print(f"  level {n + 1}: {cells.shape[0]}x{cells.shape[1]}, {int(np.count_nonzero(cells))} bricks")
+    pack.close()
+
+if __name__ == "__main__":
+    main()
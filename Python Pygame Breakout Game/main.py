@@ -1,632 +1,2627 @@
-import pygame
-import random
-import math
-import json
-import os
-import array
-from enum import Enum
-
-# --- CONFIGURATION & CONSTANTS ---
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
-TITLE = "NEON BREAKOUT: Github Edition"
-SAVE_FILE = "highscore.json"
-CUSTOM_LEVEL_FILE = "custom_levels.json"
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (15, 15, 25)
-RED = (255, 80, 80)
-GREEN = (80, 255, 80)
-BLUE = (80, 80, 255)
-YELLOW = (255, 255, 80)
-ORANGE = (255, 165, 0)
-PURPLE = (147, 112, 219)
-CYAN = (0, 255, 255)
-GREY = (100, 100, 100)
-
-COLORS_LIST = [RED, ORANGE, YELLOW, GREEN, BLUE, PURPLE, CYAN]
-
-# Game Settings
-PADDLE_WIDTH = 100
-PADDLE_HEIGHT = 15
-BALL_RADIUS = 8
-BALL_SPEED_BASE = 6
-BRICK_WIDTH = 78
-BRICK_HEIGHT = 25
-PARTICLE_COUNT = 15
-
-# Powerup Types
-class PowerType(Enum):
-    MULTIBALL = 0
-    BIG_PADDLE = 1
-    LASER = 2
-    SLOW_BALL = 3
-    EXTRA_LIFE = 4
-
-# --- UTILS ---
-def load_high_score():
-    if not os.path.exists(SAVE_FILE):
-        return 0
-    try:
-        with open(SAVE_FILE, 'r') as f:
-            data = json.load(f)
-            return data.get("highscore", 0)
-    except:
-        return 0
-
-def save_high_score(score):
-    current = load_high_score()
-    if score > current:
-        with open(SAVE_FILE, 'w') as f:
-            json.dump({"highscore": score}, f)
-        return True
-    return False
-
-# --- AUDIO SYSTEM ---
-class SoundManager:
-    def __init__(self):
-        self.sounds = {}
-        try:
-            pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
-            self.sounds['paddle_hit'] = self.generate_beep(440, 0.1)     # A4
-            self.sounds['brick_hit'] = self.generate_beep(523, 0.05)     # C5
-            self.sounds['wall_hit'] = self.generate_beep(200, 0.05)      # Low thud
-            self.sounds['powerup'] = self.generate_beep(880, 0.15)       # High beep
-            self.sounds['die'] = self.generate_noise(0.5)                # White noise
-        except Exception as e:
-            print(f"Sound system warning: {e}")
-
-    def generate_beep(self, frequency, duration):
-        sample_rate = 44100
-        n_samples = int(sample_rate * duration)
-        buffer = array.array('h') 
-        period = sample_rate // frequency
-        for i in range(n_samples):
-            value = 32767 if (i // (period // 2)) % 2 == 0 else -32768
-            decay = 1.0 - (i / n_samples)
-            buffer.append(int(value * decay * 0.3))
-        return pygame.mixer.Sound(buffer)
-
-    def generate_noise(self, duration):
-        sample_rate = 44100
-        n_samples = int(sample_rate * duration)
-        buffer = array.array('h')
-        for i in range(n_samples):
-            value = random.randint(-32768, 32767)
-            decay = 1.0 - (i / n_samples)
-            buffer.append(int(value * decay * 0.3))
-        return pygame.mixer.Sound(buffer)
-
-    def play(self, name):
-        if name in self.sounds:
-            self.sounds[name].play()
-
-# --- CLASSES ---
-
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.color = color
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(2, 6)
-        self.vx = math.cos(angle) * speed
-        self.vy = math.sin(angle) * speed
-        self.life = random.randint(20, 40)
-        self.size = random.randint(2, 5)
-
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.life -= 1
-        self.size = max(0, self.size - 0.1)
-
-    def draw(self, surface):
-        if self.life > 0:
-            alpha = int((self.life / 40) * 255)
-            s = pygame.Surface((int(self.size*2), int(self.size*2)), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*self.color, alpha), (int(self.size), int(self.size)), int(self.size))
-            surface.blit(s, (int(self.x - self.size), int(self.y - self.size)))
-
-class Powerup:
-    def __init__(self, x, y):
-        self.rect = pygame.Rect(x, y, 20, 20)
-        self.type = random.choice(list(PowerType))
-        self.vy = 3
-        self.color = WHITE
-        self.active = True
-        
-        if self.type == PowerType.MULTIBALL: self.color = CYAN
-        elif self.type == PowerType.BIG_PADDLE: self.color = GREEN
-        elif self.type == PowerType.LASER: self.color = RED
-        elif self.type == PowerType.SLOW_BALL: self.color = ORANGE
-        elif self.type == PowerType.EXTRA_LIFE: self.color = PURPLE
-
-    def update(self):
-        self.rect.y += self.vy
-        if self.rect.top > SCREEN_HEIGHT:
-            self.active = False
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect, border_radius=5)
-        font = pygame.font.Font(None, 20)
-        letter = self.type.name[0]
-        text = font.render(letter, True, BLACK)
-        surface.blit(text, (self.rect.centerx - text.get_width()//2, self.rect.centery - text.get_height()//2))
-
-class Laser:
-    def __init__(self, x, y):
-        self.rect = pygame.Rect(x - 2, y, 4, 15)
-        self.vy = -8
-        self.active = True
-
-    def update(self):
-        self.rect.y += self.vy
-        if self.rect.bottom < 0:
-            self.active = False
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, RED, self.rect)
-
-class Ball:
-    def __init__(self, x, y, speed_mult=1.0):
-        self.rect = pygame.Rect(x - BALL_RADIUS, y - BALL_RADIUS, BALL_RADIUS * 2, BALL_RADIUS * 2)
-        self.dx = random.choice([-1, 1]) * 4
-        self.dy = -4
-        self.speed = BALL_SPEED_BASE * speed_mult
-        self.active = True
-        self.stuck_to_paddle = True
-        self.offset_x = 0
-        self.trail = []  # TRAIL EFFECT
-
-    def launch(self):
-        self.stuck_to_paddle = False
-        self.dy = -abs(self.speed)
-        self.dx = random.uniform(-2, 2)
-    
-    def normalize_velocity(self):
-        vel = math.hypot(self.dx, self.dy)
-        if vel == 0: return
-        scale = self.speed / vel
-        self.dx *= scale
-        self.dy *= scale
-
-    def update(self, paddle):
-        # Update Trail
-        self.trail.append((self.rect.centerx, self.rect.centery))
-        if len(self.trail) > 8:
-            self.trail.pop(0)
-
-        wall_hit = False
-
-        if self.stuck_to_paddle:
-            self.rect.centerx = paddle.rect.centerx + self.offset_x
-            self.rect.bottom = paddle.rect.top
-        else:
-            self.rect.x += self.dx
-            self.rect.y += self.dy
-            self.normalize_velocity()
-
-            # Wall Collisions
-            if self.rect.left <= 0:
-                self.rect.left = 0
-                self.dx *= -1
-                wall_hit = True
-            if self.rect.right >= SCREEN_WIDTH:
-                self.rect.right = SCREEN_WIDTH
-                self.dx *= -1
-                wall_hit = True
-            if self.rect.top <= 0:
-                self.rect.top = 0
-                self.dy *= -1
-                wall_hit = True
-            
-            if self.rect.top > SCREEN_HEIGHT:
-                self.active = False
-        
-        return wall_hit
-
-    def draw(self, surface):
-        # Draw Trail
-        for i, pos in enumerate(self.trail):
-            alpha = int((i / len(self.trail)) * 100)
-            radius = int(BALL_RADIUS * (i / len(self.trail)))
-            s = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*WHITE, alpha), (radius, radius), radius)
-            surface.blit(s, (pos[0] - radius, pos[1] - radius))
-
-        pygame.draw.circle(surface, WHITE, self.rect.center, BALL_RADIUS)
-
-class Brick:
-    def __init__(self, x, y, color):
-        self.rect = pygame.Rect(x, y, BRICK_WIDTH, BRICK_HEIGHT)
-        self.color = color
-        self.active = True
-        self.has_powerup = random.random() < 0.15
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect, border_radius=3)
-        pygame.draw.rect(surface, (255, 255, 255, 50), self.rect, 2)
-
-class Paddle:
-    def __init__(self):
-        self.width = PADDLE_WIDTH
-        self.height = PADDLE_HEIGHT
-        self.rect = pygame.Rect(SCREEN_WIDTH // 2 - self.width // 2, SCREEN_HEIGHT - 40, self.width, self.height)
-        self.speed = 8
-        self.color = CYAN
-        
-        self.laser_active = False
-        self.big_active = False
-        self.powerup_timer = 0
-        self.shoot_timer = 0
-
-    def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            self.rect.x -= self.speed
-        if keys[pygame.K_RIGHT]:
-            self.rect.x += self.speed
-        
-        if self.rect.left < 0: self.rect.left = 0
-        if self.rect.right > SCREEN_WIDTH: self.rect.right = SCREEN_WIDTH
-
-        if self.powerup_timer > 0:
-            self.powerup_timer -= 1
-            if self.powerup_timer == 0:
-                self.reset_powerups()
-        
-        if self.laser_active and keys[pygame.K_SPACE]:
-            if self.shoot_timer <= 0:
-                self.shoot_timer = 20
-                return True
-            else:
-                self.shoot_timer -= 1
-        elif self.shoot_timer > 0:
-            self.shoot_timer -= 1
-        return False
-
-    def activate_powerup(self, p_type):
-        self.powerup_timer = 600
-        if p_type == PowerType.BIG_PADDLE:
-            self.big_active = True
-            self.rect.width = PADDLE_WIDTH * 1.5
-            self.rect.x -= (PADDLE_WIDTH * 0.25)
-            self.color = GREEN
-        elif p_type == PowerType.LASER:
-            self.laser_active = True
-            self.color = RED
-
-    def reset_powerups(self):
-        self.laser_active = False
-        self.big_active = False
-        center = self.rect.centerx
-        self.rect.width = PADDLE_WIDTH
-        self.rect.centerx = center
-        self.color = CYAN
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect, border_radius=5)
-        if self.laser_active:
-            pygame.draw.rect(surface, RED, (self.rect.left, self.rect.top-5, 5, 5))
-            pygame.draw.rect(surface, RED, (self.rect.right-5, self.rect.top-5, 5, 5))
-
-class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption(TITLE)
-        self.clock = pygame.time.Clock()
-        self.font_large = pygame.font.Font(None, 74)
-        self.font_small = pygame.font.Font(None, 36)
-        
-        self.sound_manager = SoundManager()
-        self.highscore = load_high_score()
-        self.state = "MENU" # MENU, PLAYING, GAMEOVER, PAUSED
-        self.fullscreen = False
-        
-        self.reset_game()
-
-    def reset_game(self):
-        self.lives = 3
-        self.score = 0
-        self.level = 1
-        self.combo = 1
-        self.ball_speed_mult = 1.0
-        self.reset_level(new_pattern=True)
-
-    def generate_level(self):
-        bricks = []
-        
-        # Check Custom Level on Level 1
-        if self.level == 1 and os.path.exists(CUSTOM_LEVEL_FILE):
-            try:
-                with open(CUSTOM_LEVEL_FILE, 'r') as f:
-                    data = json.load(f)
-                    level_data = data.get("custom_level", [])
-                    for b_data in level_data:
-                        r, c, color_idx = b_data["r"], b_data["c"], b_data["color_idx"]
-                        bx = c * (BRICK_WIDTH + 2) + 2
-                        by = 60 + r * (BRICK_HEIGHT + 2)
-                        if 0 <= color_idx < len(COLORS_LIST):
-                            bricks.append(Brick(bx, by, COLORS_LIST[color_idx]))
-                    print("Custom level loaded!")
-                    return bricks
-            except Exception as e:
-                print(f"Error loading custom level: {e}")
-
-        # Procedural Generation
-        rows = 4 + (self.level // 2)
-        cols = 10
-        start_y = 60
-        pattern_type = self.level % 4
-        
-        for r in range(rows):
-            for c in range(cols):
-                bx = c * (BRICK_WIDTH + 2) + 2
-                by = start_y + r * (BRICK_HEIGHT + 2)
-                color = COLORS_LIST[r % len(COLORS_LIST)]
-                
-                add_brick = True
-                if pattern_type == 1:
-                    if (r + c) % 2 == 0: add_brick = False
-                elif pattern_type == 2:
-                    if c < r or c >= cols - r: add_brick = False
-                elif pattern_type == 3:
-                    if random.random() < 0.2: add_brick = False
-
-                if add_brick:
-                    bricks.append(Brick(bx, by, color))
-        return bricks
-
-    def reset_level(self, new_pattern=False):
-        self.paddle = Paddle()
-        self.balls = [Ball(SCREEN_WIDTH//2, SCREEN_HEIGHT - 60, self.ball_speed_mult)]
-        self.powerups = []
-        self.particles = []
-        self.lasers = []
-        if new_pattern:
-            self.bricks = self.generate_level()
-
-    def handle_input(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return False
-                if event.key == pygame.K_F11:
-                    self.fullscreen = not self.fullscreen
-                    if self.fullscreen:
-                        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-                    else:
-                        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-                
-                if self.state == "MENU" and event.key == pygame.K_SPACE:
-                    self.state = "PLAYING"
-                    self.reset_game()
-                
-                elif self.state == "GAMEOVER" and event.key == pygame.K_SPACE:
-                    self.state = "MENU"
-
-                elif self.state == "PLAYING":
-                    if event.key == pygame.K_p: # PAUSE
-                        self.state = "PAUSED"
-                    elif event.key == pygame.K_SPACE:
-                        for b in self.balls:
-                            if b.stuck_to_paddle:
-                                b.launch()
-                
-                elif self.state == "PAUSED":
-                    if event.key == pygame.K_p:
-                        self.state = "PLAYING"
-
-        return True
-
-    def spawn_particles(self, x, y, color):
-        for _ in range(PARTICLE_COUNT):
-            self.particles.append(Particle(x, y, color))
-
-    def check_collisions(self):
-        # 1. Paddle shoots laser
-        if self.paddle.update():
-            self.lasers.append(Laser(self.paddle.rect.left + 5, self.paddle.rect.top))
-            self.lasers.append(Laser(self.paddle.rect.right - 5, self.paddle.rect.top))
-
-        # 2. Lasers
-        for laser in self.lasers[:]:
-            laser.update()
-            if not laser.active:
-                if laser in self.lasers: # <--- SAFETY CHECK
-                    self.lasers.remove(laser)
-                continue
-            
-            hit_index = laser.rect.collidelist([b.rect for b in self.bricks])
-            if hit_index != -1:
-                brick = self.bricks.pop(hit_index)
-                self.spawn_particles(brick.rect.centerx, brick.rect.centery, brick.color)
-                self.score += (10 * self.combo) 
-                self.combo += 1
-                self.sound_manager.play('brick_hit')
-                
-                self.handle_brick_break(brick)
-                
-                # FIX: Check if laser is still in list before removing
-                # (Level reset might have cleared it)
-                if laser in self.lasers: 
-                    self.lasers.remove(laser)
-
-        # 3. Balls
-        for ball in self.balls[:]:
-            if ball.update(self.paddle):
-                self.sound_manager.play('wall_hit')
-
-            # Paddle
-            if ball.rect.colliderect(self.paddle.rect) and ball.dy > 0:
-                self.sound_manager.play('paddle_hit')
-                self.combo = 1 # RESET COMBO
-                
-                relative_intersect_x = (self.paddle.rect.centerx - ball.rect.centerx)
-                normalized_intersect = relative_intersect_x / (self.paddle.width / 2)
-                bounce_angle = normalized_intersect * (5 * math.pi / 12)
-                
-                speed = ball.speed
-                ball.dx = speed * -math.sin(bounce_angle)
-                ball.dy = -speed * math.cos(bounce_angle)
-            
-            # Brick
-            hit_index = ball.rect.collidelist([b.rect for b in self.bricks])
-            if hit_index != -1:
-                brick = self.bricks.pop(hit_index)
-                self.spawn_particles(brick.rect.centerx, brick.rect.centery, brick.color)
-                
-                self.score += (10 * self.combo)
-                self.combo += 1 # INCREASE COMBO
-                
-                self.sound_manager.play('brick_hit')
-                self.handle_brick_break(brick)
-                
-                b_rect = brick.rect
-                if (ball.rect.centerx < b_rect.left or ball.rect.centerx > b_rect.right):
-                    ball.dx *= -1
-                else:
-                    ball.dy *= -1
-
-            if not ball.active:
-                self.balls.remove(ball)
-
-        # 4. Powerups
-        for p in self.powerups[:]:
-            p.update()
-            if p.rect.colliderect(self.paddle.rect):
-                self.sound_manager.play('powerup')
-                self.apply_powerup(p.type)
-                self.powerups.remove(p)
-            elif not p.active:
-                self.powerups.remove(p)
-
-    def handle_brick_break(self, brick):
-        if brick.has_powerup:
-            self.powerups.append(Powerup(brick.rect.centerx, brick.rect.centery))
-        if len(self.bricks) == 0:
-            self.next_level()
-
-    def apply_powerup(self, p_type):
-        if p_type == PowerType.MULTIBALL:
-            if len(self.balls) > 0:
-                base = self.balls[0]
-                for _ in range(2):
-                    b = Ball(base.rect.centerx, base.rect.centery, self.ball_speed_mult)
-                    b.stuck_to_paddle = False
-                    b.dx = random.choice([-3, 3])
-                    b.dy = -4
-                    self.balls.append(b)
-        elif p_type == PowerType.SLOW_BALL:
-            for b in self.balls:
-                b.speed *= 0.7
-        elif p_type == PowerType.EXTRA_LIFE:
-            self.lives += 1
-        else:
-            self.paddle.activate_powerup(p_type)
-
-    def next_level(self):
-        self.level += 1
-        self.ball_speed_mult += 0.1
-        self.reset_level(new_pattern=True)
-
-    def draw_ui(self):
-        pygame.draw.rect(self.screen, (30, 30, 50), (0, 0, SCREEN_WIDTH, 40))
-        
-        score_text = self.font_small.render(f"Score: {self.score}", True, WHITE)
-        level_text = self.font_small.render(f"Level: {self.level}", True, WHITE)
-        lives_text = self.font_small.render(f"Lives: {self.lives}", True, WHITE)
-        
-        self.screen.blit(score_text, (20, 10))
-        self.screen.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2, 10))
-        self.screen.blit(lives_text, (SCREEN_WIDTH - 120, 10))
-
-        if self.combo > 1:
-            combo_text = self.font_small.render(f"COMBO x{self.combo}!", True, YELLOW)
-            self.screen.blit(combo_text, (SCREEN_WIDTH//2 - combo_text.get_width()//2, 50))
-
-    def run(self):
-        running = True
-        while running:
-            self.screen.fill(BLACK)
-            running = self.handle_input()
-            
-            if self.state == "MENU":
-                title = self.font_large.render("NEON BREAKOUT", True, CYAN)
-                sub = self.font_small.render("Press SPACE to Start", True, WHITE)
-                hi = self.font_small.render(f"High Score: {self.highscore}", True, YELLOW)
-                
-                self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 200))
-                self.screen.blit(sub, (SCREEN_WIDTH//2 - sub.get_width()//2, 300))
-                self.screen.blit(hi, (SCREEN_WIDTH//2 - hi.get_width()//2, 350))
-                
-                if random.random() < 0.1:
-                    self.spawn_particles(random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT), random.choice(COLORS_LIST))
-                
-            elif self.state == "PLAYING":
-                self.check_collisions()
-                
-                if len(self.balls) == 0:
-                    self.sound_manager.play('die')
-                    self.lives -= 1
-                    if self.lives <= 0:
-                        save_high_score(self.score)
-                        self.highscore = load_high_score()
-                        self.state = "GAMEOVER"
-                    else:
-                        self.balls = [Ball(SCREEN_WIDTH//2, SCREEN_HEIGHT - 60, self.ball_speed_mult)]
-                        self.paddle.reset_powerups()
-                        self.combo = 1
-
-                for p in self.particles[:]:
-                    p.update()
-                    p.draw(self.screen)
-                    if p.life <= 0: self.particles.remove(p)
-
-                self.paddle.draw(self.screen)
-                for b in self.bricks: b.draw(self.screen)
-                for b in self.balls: b.draw(self.screen)
-                for p in self.powerups: p.draw(self.screen)
-                for l in self.lasers: l.draw(self.screen)
-                
-                self.draw_ui()
-
-            elif self.state == "PAUSED":
-                # Draw game static
-                self.paddle.draw(self.screen)
-                for b in self.bricks: b.draw(self.screen)
-                for b in self.balls: b.draw(self.screen)
-                
-                # Overlay
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 150))
-                self.screen.blit(overlay, (0,0))
-                
-                pause_text = self.font_large.render("PAUSED", True, WHITE)
-                sub_text = self.font_small.render("Press P to Resume", True, GREY)
-                self.screen.blit(pause_text, (SCREEN_WIDTH//2 - pause_text.get_width()//2, SCREEN_HEIGHT//2 - 20))
-                self.screen.blit(sub_text, (SCREEN_WIDTH//2 - sub_text.get_width()//2, SCREEN_HEIGHT//2 + 40))
-
-            elif self.state == "GAMEOVER":
-                t1 = self.font_large.render("GAME OVER", True, RED)
-                t2 = self.font_small.render(f"Final Score: {self.score}", True, WHITE)
-                t3 = self.font_small.render("Press SPACE for Menu", True, GREY)
-                
-                self.screen.blit(t1, (SCREEN_WIDTH//2 - t1.get_width()//2, 200))
-                self.screen.blit(t2, (SCREEN_WIDTH//2 - t2.get_width()//2, 280))
-                self.screen.blit(t3, (SCREEN_WIDTH//2 - t3.get_width()//2, 330))
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
-
-        pygame.quit()
-
-if __name__ == "__main__":
-    Game().run()
\ No newline at end of file
+import pygame
+import random
+import math
+import os
+import array
+import argparse
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from enum import Enum
+
+import numpy as np
+
+from profiler import FrameProfiler, NullProfiler
+from pipeline import SimWorker
+from pacing import FramePacer, IDLE_FPS
+from present import Presenter, QUALITY, DEFAULT_QUALITY
+from level_pack import LevelPack
+from replay import InputRecorder
+from scores import ScoreStore, SCORES_FILE
+from savestate import (GameState, RewindBuffer, GAME, PADDLE, FIELD, STATES, LASER, POWERUP, CELL_POWERUP,
+                       FLAG_SWEPT, FLAG_ENDLESS, FLAG_SWARM, BALL_FLAG_STUCK, BALL_FLAG_ACTIVE, BALL_FLAG_POS,
+                       REWIND_SECONDS, ball_dtype, pack_rng, unpack_rng, encode, decode)
+
+# --- CONFIGURATION & CONSTANTS ---
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+FPS = 60  # Speeds are in pixels per 60 FPS frame; dt counts these frames
+SIM_RATE = 60  # Default simulation ticks per second
+MAX_CATCH_UP = 0.1  # Seconds of simulation one rendered frame may catch up
+TITLE = "NEON BREAKOUT: Github Edition"
+LEADERBOARD_SIZE = 5  # entries shown on the menu
+LEVEL_PACK_FILE = "levels.bkl"
+QUICKSAVE_FILE = "quicksave.bks"  # F5 saves the game here, F8 loads it
+SOUND_CACHE_DIR = "sound_cache"
+SAMPLE_RATE = 44100
+MAX_VOICES = 8       # mixer channels shared by all effects
+VOICE_VOLUME = 0.6   # one voice; merged repeats get louder up to 1.0
+TEXT_CACHE_SIZE = 256  # rendered strings kept by TEXTS
+HUD_HEIGHT = 40
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (15, 15, 25)
+RED = (255, 80, 80)
+GREEN = (80, 255, 80)
+BLUE = (80, 80, 255)
+YELLOW = (255, 255, 80)
+ORANGE = (255, 165, 0)
+PURPLE = (147, 112, 219)
+CYAN = (0, 255, 255)
+GREY = (100, 100, 100)
+
+COLORS_LIST = [RED, ORANGE, YELLOW, GREEN, BLUE, PURPLE, CYAN]
+COLOR_INDEX = {color: i for i, color in enumerate(COLORS_LIST)}
+
+# Game Settings
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 15
+BALL_RADIUS = 8
+BALL_SPEED_BASE = 6
+BRICK_WIDTH = 78
+BRICK_HEIGHT = 25
+BRICK_TOP = 60
+BRICK_CELL_W = BRICK_WIDTH + 2
+BRICK_CELL_H = BRICK_HEIGHT + 2
+PARTICLE_COUNT = 15
+TRAIL_LENGTH = 8
+BALL_ROW = ball_dtype(TRAIL_LENGTH)  # One ball in a save state
+MAX_SWEEP_CONTACTS = 16
+MAX_PARTICLES = 20000
+PARTICLE_DRAW_BUDGET = 5000  # sprites blitted per frame; larger crowds are drawn as an even sample
+MAX_BALLS = 10000
+PARTICLE_MAX_LIFE = 40 / FPS  # seconds
+PARTICLE_ALPHA_LEVELS = 16
+BRICK_COLS = 10
+PACK_ROWS = 15  # pack levels are cropped to BRICK_COLS x PACK_ROWS, the part that fits the playfield
+
+# Timers, in seconds of simulation time
+POWERUP_DURATION = 10.0
+LASER_COOLDOWN = 20 / FPS
+TIMER_EPSILON = 1e-9  # Absorbs rounding from repeated dt subtraction
+
+# Endless mode: the field scrolls down forever, generated in chunks of rows
+ENDLESS_CHUNK_ROWS = 16
+ENDLESS_BOTTOM_ROW = 7             # lowest field row at the start
+ENDLESS_SCROLL = 0.25              # pixels per 60 FPS frame
+ENDLESS_FLOOR = SCREEN_HEIGHT - 120  # rows sinking past this line crumble
+
+# Input Flags (paddle input is plain data, so the simulation can run without a keyboard)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FIRE = 4    # Space held: shoot lasers
+INPUT_LAUNCH = 8  # Space pressed this tick: release stuck balls
+
+# Powerup Types
+class PowerType(Enum):
+    MULTIBALL = 0
+    BIG_PADDLE = 1
+    LASER = 2
+    SLOW_BALL = 3
+    EXTRA_LIFE = 4
+
+POWER_TYPES = list(PowerType)
+POWER_COLORS = {PowerType.MULTIBALL: CYAN, PowerType.BIG_PADDLE: GREEN, PowerType.LASER: RED,
+                PowerType.SLOW_BALL: ORANGE, PowerType.EXTRA_LIFE: PURPLE}
+
+# --- UTILS ---
+def sweep_circle_rect(x, y, vx, vy, r, rect, t_max):
+    # Earliest time in [0, t_max] at which a circle of radius r moving from
+    # (x, y) by (vx, vy) per tick touches rect, as (t, nx, ny) with the contact
+    # normal pointing away from rect. None if there is no contact.
+    left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+    t0, t1, axis = -math.inf, math.inf, 0
+    for ax, p, v, lo, hi in ((0, x, vx, left - r, right + r), (1, y, vy, top - r, bottom + r)):
+        if v == 0:
+            if p < lo or p > hi:
+                return None
+        else:
+            a, b = (lo - p) / v, (hi - p) / v
+            if a > b: a, b = b, a
+            if a > t0: t0, axis = a, ax
+            if b < t1: t1 = b
+    if t0 > t1 or t1 < 0 or t0 > t_max:
+        return None
+
+    t = max(t0, 0.0)
+    hx, hy = x + vx * t, y + vy * t
+    if t0 < 0:
+        # Already inside the expanded box: touching a face only counts if moving into it
+        cx, cy = min(max(hx, left), right), min(max(hy, top), bottom)
+        nx, ny = hx - cx, hy - cy
+        dist = math.hypot(nx, ny)
+        if dist == 0:
+            # Center inside the rect: push back against the dominant velocity
+            if abs(vx) > abs(vy): return (0.0, -math.copysign(1, vx), 0.0)
+            return (0.0, 0.0, -math.copysign(1, vy))
+        if dist <= r:
+            nx, ny = nx / dist, ny / dist
+            return (0.0, nx, ny) if vx * nx + vy * ny < 0 else None
+    elif axis == 0 and top <= hy <= bottom:
+        return (t, -math.copysign(1, vx), 0.0)
+    elif axis == 1 and left <= hx <= right:
+        return (t, 0.0, -math.copysign(1, vy))
+
+    # Corner region: ray against the circle of radius r around the nearest corner
+    cx = left if hx < left else right
+    cy = top if hy < top else bottom
+    fx, fy = x - cx, y - cy
+    a = vx * vx + vy * vy
+    b = 2 * (fx * vx + fy * vy)
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - 4 * a * c
+    if a == 0 or disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / (2 * a)
+    if t < 0 or t > t_max:
+        return None
+    return (t, (fx + vx * t) / r, (fy + vy * t) / r)
+
+def round_rect(v):
+    # pygame.Rect rounds float coordinates half away from zero
+    return np.trunc(v + np.copysign(0.5, v)).astype(np.int64)
+
+def lerp(a, b, alpha):
+    # Render position between the previous and current tick, in whole pixels
+    # (rounded half away from zero, like round_rect)
+    v = a + (b - a) * alpha
+    return int(v + math.copysign(0.5, v))
+
+def hypot(dx, dy):
+    # math.hypot over arrays, bit for bit, so swarm balls move exactly like Ball
+    # objects. The sum is taken in 80-bit extended precision; results that land
+    # within 0.002 ulp of a rounding midpoint (about 0.4%) are redone by
+    # math.hypot. Without extended long doubles this is plain np.hypot, which
+    # can differ in the last bit.
+    if np.finfo(np.longdouble).nmant < 63:
+        return np.hypot(dx, dy)
+    wide = np.sqrt(np.square(dx, dtype=np.longdouble) + np.square(dy, dtype=np.longdouble))
+    h = wide.astype(np.float64)
+    ulp = np.spacing(np.where(wide < h, np.nextafter(h, 0), h))
+    for i in np.nonzero(np.abs(wide - h) > 0.498 * ulp)[0].tolist():
+        h[i] = math.hypot(dx[i], dy[i])
+    return h
+
+def first_brick_cell(x, y, y0, occ):
+    # Scalar BrickGrid.hit for a ball rect at (x, y) against an occupancy
+    # grid whose row 0 starts at y0; returns (row, col) or None
+    size = BALL_RADIUS * 2
+    rows, cols = occ.shape
+    for i in range((y - y0) // BRICK_CELL_H, (y + size - 1 - y0) // BRICK_CELL_H + 1):
+        if not 0 <= i < rows:
+            continue
+        top = y0 + i * BRICK_CELL_H
+        if not (y < top + BRICK_HEIGHT and top < y + size):
+            continue
+        for c in range((x - 2) // BRICK_CELL_W, (x + size - 1 - 2) // BRICK_CELL_W + 1):
+            left = 2 + c * BRICK_CELL_W
+            if 0 <= c < cols and occ[i, c] and x < left + BRICK_WIDTH and left < x + size:
+                return i, c
+    return None
+
+def brick_occupancy(bricks):
+    # Dense copy of a BrickGrid/BrickField: (first row, top y of that row,
+    # bool array of occupied cells)
+    cells = [cell for cell, _ in bricks.items()]
+    if not cells:
+        return 0, BRICK_TOP, np.zeros((0, BRICK_COLS), bool)
+    rows, cols = zip(*cells)
+    r0 = min(rows)
+    occ = np.zeros((max(rows) - r0 + 1, max(max(cols) + 1, BRICK_COLS)), bool)
+    occ[np.array(rows) - r0, np.array(cols)] = True
+    return r0, BRICK_TOP + r0 * BRICK_CELL_H + bricks.offset, occ
+
+def brick_cells_hit(x, y, y0, occ):
+    # Batched first_brick_cell: (hit, row, col) arrays, first cell in row-major order
+    size = BALL_RADIUS * 2
+    rows, cols = occ.shape
+    n = len(x)
+    hit = np.zeros(n, bool)
+    hit_r = np.zeros(n, np.int64)
+    hit_c = np.zeros(n, np.int64)
+    if rows == 0:
+        return hit, hit_r, hit_c
+    for r in ((y - y0) // BRICK_CELL_H, (y + size - 1 - y0) // BRICK_CELL_H):
+        for c in ((x - 2) // BRICK_CELL_W, (x + size - 1 - 2) // BRICK_CELL_W):
+            rc = np.clip(r, 0, rows - 1)
+            cc = np.clip(c, 0, cols - 1)
+            left = 2 + cc * BRICK_CELL_W
+            top = y0 + rc * BRICK_CELL_H
+            found = ((r >= 0) & (r < rows) & (c >= 0) & (c < cols) & ~hit & occ[rc, cc] &
+                     (x < left + BRICK_WIDTH) & (left < x + size) &
+                     (y < top + BRICK_HEIGHT) & (top < y + size))
+            hit_r[found] = rc[found]
+            hit_c[found] = cc[found]
+            hit |= found
+    return hit, hit_r, hit_c
+
+def swap_remove(items, i):
+    # O(1) unordered removal: the last item takes slot i
+    last = items.pop()
+    if i < len(items):
+        items[i] = last
+
+class SimRandom(random.Random):
+    # random.Random that counts its draws, so a save state only re-reads the
+    # 2.5 KB generator state after it moved. Overriding both random() and
+    # getrandbits() keeps every result identical to random.Random's.
+    draws = 0
+
+    def random(self):
+        self.draws += 1
+        return super().random()
+
+    def getrandbits(self, k):
+        self.draws += 1
+        return super().getrandbits(k)
+
+    def setstate(self, state):
+        self.draws += 1
+        super().setstate(state)
+
+class Pool:
+    # Free list of spare entities. acquire() re-spawns a released instance in
+    # place (keeping its Rect and lists) and only allocates when none is free.
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.allocated = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.spawn(*args)
+            return obj
+        self.allocated += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        self.free.extend(objs)
+
+# --- AUDIO SYSTEM ---
+class SoundManager:
+    # Effects are synthesized with NumPy once and cached as raw PCM in
+    # SOUND_CACHE_DIR, keyed by their parameters; later launches just read the
+    # files. Loading runs on a background thread so the menu shows at once;
+    # play() silently skips effects that are not ready yet.
+    # play() only queues: flush() starts the frame's voices at once, merging
+    # repeats of an effect into one voice whose volume grows with the count,
+    # and keeping within per-effect and MAX_VOICES limits. When every channel
+    # is busy a higher-priority effect takes over the lowest-priority voice.
+    EFFECTS = {
+        'paddle_hit': ('beep', 440, 0.1),   # A4
+        'brick_hit': ('beep', 523, 0.05),   # C5
+        'wall_hit': ('beep', 200, 0.05),    # Low thud
+        'powerup': ('beep', 880, 0.15),     # High beep
+        'die': ('noise', 0, 0.5),           # White noise
+    }
+    VOICES = {  # (priority, most simultaneous voices)
+        'die': (3, 1),
+        'powerup': (2, 1),
+        'paddle_hit': (1, 2),
+        'brick_hit': (0, 3),
+        'wall_hit': (0, 2),
+    }
+
+    def __init__(self, enabled=True, background=True):
+        self.sounds = {}
+        self.loader = None
+        self.queued = {}   # effect -> plays requested this frame
+        self.voices = []   # (channel, effect, priority) started by flush()
+        self.counters = {"requested": 0, "played": 0, "merged": 0, "dropped": 0, "stolen": 0}
+        if not enabled:
+            return
+        try:
+            pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1, buffer=512)
+            pygame.mixer.set_num_channels(MAX_VOICES)
+        except Exception as e:
+            print(f"Sound system warning: {e}")
+            return
+        if background:
+            self.loader = threading.Thread(target=self.load_all, name="sound-loader", daemon=True)
+            self.loader.start()
+        else:
+            self.load_all()
+
+    def load_all(self):
+        try:
+            for name, params in self.EFFECTS.items():
+                self.sounds[name] = pygame.mixer.Sound(buffer=self.samples(*params))
+        except Exception as e:
+            print(f"Sound system warning: {e}")
+
+    def samples(self, kind, frequency, duration):
+        path = os.path.join(SOUND_CACHE_DIR, f"{kind}-{frequency}-{duration}-{SAMPLE_RATE}.pcm")
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            pass
+
+        if kind == 'beep':
+            data = self.generate_beep(frequency, duration).tobytes()
+        else:
+            data = self.generate_noise(duration).tobytes()
+        try:
+            os.makedirs(SOUND_CACHE_DIR, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Sound cache warning: {e}")
+        return data
+
+    def generate_beep(self, frequency, duration):
+        # Decaying square wave at 30% volume
+        n_samples = int(SAMPLE_RATE * duration)
+        period = SAMPLE_RATE // frequency
+        i = np.arange(n_samples)
+        value = np.where((i // (period // 2)) % 2 == 0, 32767, -32768)
+        decay = 1.0 - i / n_samples
+        return (value * decay * 0.3).astype(np.int16)
+
+    def generate_noise(self, duration):
+        n_samples = int(SAMPLE_RATE * duration)
+        value = np.random.default_rng().integers(-32768, 32768, n_samples)
+        decay = 1.0 - np.arange(n_samples) / n_samples
+        return (value * decay * 0.3).astype(np.int16)
+
+    def play(self, name):
+        if name in self.sounds:
+            self.queued[name] = self.queued.get(name, 0) + 1
+            self.counters["requested"] += 1
+
+    def flush(self):
+        # Start this frame's voices, highest priority first
+        if not self.queued:
+            return
+        counters = self.counters
+        self.voices = [v for v in self.voices if v[0].get_busy()]
+        for name, count in sorted(self.queued.items(), key=lambda item: -self.VOICES[item[0]][0]):
+            # Every request ends up played, merged into a played voice or
+            # dropped: requested == played + merged + dropped
+            priority, limit = self.VOICES[name]
+            if sum(1 for v in self.voices if v[1] == name) >= limit:
+                counters["dropped"] += count
+                continue
+            channel = pygame.mixer.find_channel()
+            if channel is None:
+                victim = min(self.voices, key=lambda v: v[2], default=None)
+                if victim is None or victim[2] >= priority:
+                    counters["dropped"] += count
+                    continue
+                self.voices.remove(victim)
+                channel = victim[0]
+                channel.stop()
+                counters["stolen"] += 1
+            channel.play(self.sounds[name])
+            channel.set_volume(min(1.0, VOICE_VOLUME * count ** 0.5))
+            self.voices.append((channel, name, priority))
+            counters["played"] += 1
+            counters["merged"] += count - 1
+        self.queued.clear()
+
+# --- SPRITES ---
+class SpriteAtlas:
+    # Entity sprites rendered once on first use, keyed by entity type, color and
+    # size, so every draw call is a plain blit. Sprites are built at logical
+    # size and resampled once to the render target's scale; entities blit
+    # them at their logical position times scale.
+    def __init__(self):
+        self.cache = {}
+        self.font = None
+        self.scale = 1.0
+
+    def set_scale(self, scale):
+        if scale != self.scale:
+            self.scale = scale
+            self.cache.clear()
+
+    def get(self, key, build):
+        sprite = self.cache.get(key)
+        if sprite is None:
+            sprite = build(*key[1:])
+            if self.scale != 1.0:
+                w, h = sprite.get_size()
+                size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+                sprite = pygame.transform.smoothscale(sprite, size)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.cache[key] = sprite
+        return sprite
+
+    def brick(self, color, width, height):
+        return self.get(('brick', color, width, height), self.build_brick)
+
+    def ball(self, radius):
+        return self.get(('ball', radius), self.build_ball)
+
+    def trail(self, radius, alpha):
+        return self.get(('trail', radius, alpha), self.build_circle)
+
+    def particle(self, color, radius, alpha):
+        return self.get(('particle', color, radius, alpha), self.build_particle)
+
+    def powerup(self, p_type, color):
+        return self.get(('powerup', p_type, color), self.build_powerup)
+
+    def laser(self, width, height):
+        return self.get(('laser', width, height), self.build_laser)
+
+    def paddle(self, color, width, height, laser):
+        return self.get(('paddle', color, width, height, laser), self.build_paddle)
+
+    def build_brick(self, color, width, height):
+        s = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.rect(s, color, (0, 0, width, height), border_radius=3)
+        pygame.draw.rect(s, WHITE, (0, 0, width, height), 2)
+        return s
+
+    def build_ball(self, radius):
+        s = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(s, WHITE, (radius, radius), radius)
+        return s
+
+    def build_circle(self, radius, alpha):
+        s = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(s, (*WHITE, alpha), (radius, radius), radius)
+        return s
+
+    def build_particle(self, color, radius, alpha):
+        s = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(s, (*color, alpha), (radius, radius), radius)
+        return s
+
+    def build_powerup(self, p_type, color):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        s = pygame.Surface((20, 20), pygame.SRCALPHA)
+        pygame.draw.rect(s, color, (0, 0, 20, 20), border_radius=5)
+        text = self.font.render(p_type.name[0], True, BLACK)
+        s.blit(text, (10 - text.get_width()//2, 10 - text.get_height()//2))
+        return s
+
+    def build_laser(self, width, height):
+        s = pygame.Surface((width, height))
+        s.fill(RED)
+        return s
+
+    def build_paddle(self, color, width, height, laser):
+        # Laser turrets sit 5px above the paddle, so the sprite is 5px taller
+        s = pygame.Surface((width, height + 5), pygame.SRCALPHA)
+        pygame.draw.rect(s, color, (0, 5, width, height), border_radius=5)
+        if laser:
+            pygame.draw.rect(s, RED, (0, 0, 5, 5))
+            pygame.draw.rect(s, RED, (width - 5, 0, 5, 5))
+        return s
+
+SPRITES = SpriteAtlas()
+
+def view_rect(rect):
+    # A logical rect in render target pixels, rounded outwards
+    s = SPRITES.scale
+    if s == 1.0:
+        return rect
+    x0, y0 = math.floor(rect.left * s), math.floor(rect.top * s)
+    return pygame.Rect(x0, y0, math.ceil(rect.right * s) - x0, math.ceil(rect.bottom * s) - y0)
+
+class TextCache:
+    # Rendered strings keyed by (font, text, color), least recently used
+    # evicted first; only text that actually changed is rasterized.
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.cache[key] = surface
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return surface
+
+TEXTS = TextCache()
+
+class HudBar:
+    # The top bar is composited on its own surface and redrawn only when
+    # score, level or lives change; other frames it is a single blit.
+    def __init__(self, font):
+        self.font = font
+        self.reset()
+
+    def reset(self):
+        # Rebuild the bar next draw (the render target changed)
+        self.surface = None
+        self.fields = None
+
+    def draw(self, surface, hud):
+        score, label, lives, combo = hud
+        if (score, label, lives) != self.fields:
+            self.fields = (score, label, lives)
+            s = SPRITES.scale
+            if self.surface is None:
+                self.surface = pygame.Surface((round(SCREEN_WIDTH * s), round(HUD_HEIGHT * s))).convert()
+            bar = self.surface
+            bar.fill((30, 30, 50))
+            level_text = TEXTS.render(self.font, label, WHITE)
+            bar.blit(TEXTS.render(self.font, f"Score: {score}", WHITE), (20 * s, 10 * s))
+            bar.blit(level_text, (bar.get_width()//2 - level_text.get_width()//2, 10 * s))
+            bar.blit(TEXTS.render(self.font, f"Lives: {lives}", WHITE), (bar.get_width() - 120 * s, 10 * s))
+        rects = [surface.blit(self.surface, (0, 0))]
+
+        if combo > 1:
+            combo_text = TEXTS.render(self.font, f"COMBO x{combo}!", YELLOW)
+            rects.append(surface.blit(combo_text, (surface.get_width()//2 - combo_text.get_width()//2, 50 * SPRITES.scale)))
+        return rects
+
+# --- CLASSES ---
+
+class ParticleSystem:
+    # Struct-of-arrays particles: all live particles are updated and culled in
+    # one NumPy batch, and drawn from sprites quantized by color, size and alpha.
+    def __init__(self, capacity=MAX_PARTICLES):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.float32)  # seconds left
+        self.size = np.zeros(capacity, np.float32)
+        self.color = np.zeros(capacity, np.int16)
+        self.rng = np.random.default_rng()
+
+        self.palette = {}  # color -> palette index
+        self.sprites = []  # flat table indexed by sprite_key()
+        self.sprite_scale = SPRITES.scale  # Render scale the table was built at
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def color_index(self, color):
+        idx = self.palette.get(color)
+        if idx is None:
+            idx = len(self.palette)
+            self.palette[color] = idx
+            self.add_sprites(color)
+        return idx
+
+    def add_sprites(self, color):
+        for radius in range(6):
+            for level in range(PARTICLE_ALPHA_LEVELS):
+                self.sprites.append(self.render_sprite(color, radius, level))
+
+    def render_sprite(self, color, radius, level):
+        if radius == 0:
+            return None
+        return SPRITES.particle(color, radius, level * 255 // (PARTICLE_ALPHA_LEVELS - 1))
+
+    def emit(self, x, y, color, count=PARTICLE_COUNT):
+        i = self.count
+        n = min(count, self.capacity - i)
+        if n <= 0:
+            return
+        j = i + n
+        angle = self.rng.uniform(0, 2 * math.pi, n)
+        speed = self.rng.uniform(2, 6, n)
+        self.x[i:j] = x
+        self.y[i:j] = y
+        self.vx[i:j] = np.cos(angle) * speed
+        self.vy[i:j] = np.sin(angle) * speed
+        self.life[i:j] = self.rng.integers(20, 41, n) / FPS
+        self.size[i:j] = self.rng.integers(2, 6, n)
+        self.color[i:j] = self.color_index(color)
+        self.count = j
+
+    def update(self, dt=1.0):
+        n = self.count
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        self.life[:n] -= dt / FPS
+        np.maximum(self.size[:n] - 0.1 * dt, 0, out=self.size[:n])
+
+        # Cull dead particles by compacting the survivors to the front
+        alive = self.life[:n] > 0
+        k = int(np.count_nonzero(alive))
+        if k < n:
+            for arr in (self.x, self.y, self.vx, self.vy, self.life, self.size, self.color):
+                arr[:k] = arr[:n][alive]
+            self.count = k
+
+    def draw(self, surface):
+        n = self.count
+        if n == 0:
+            return None
+        if n > PARTICLE_DRAW_BUDGET:
+            # Each blit costs about a microsecond, so a full buffer alone would
+            # take the whole frame. Bursts sit contiguously in the arrays, so
+            # an evenly spaced sample thins every burst alike.
+            pick = np.linspace(0, n - 1, PARTICLE_DRAW_BUDGET).astype(np.intp)
+            x, y, size, life, color = self.x[pick], self.y[pick], self.size[pick], self.life[pick], self.color[pick]
+        else:
+            x, y, size, life, color = self.x[:n], self.y[:n], self.size[:n], self.life[:n], self.color[:n]
+        radius = size.astype(np.int32)
+        level = (life * ((PARTICLE_ALPHA_LEVELS - 1) / PARTICLE_MAX_LIFE)).astype(np.int32)
+        np.clip(level, 0, PARTICLE_ALPHA_LEVELS - 1, out=level)
+        keys = (color.astype(np.int32) * 6 + radius) * PARTICLE_ALPHA_LEVELS + level
+        s = SPRITES.scale
+        if s != self.sprite_scale:
+            self.sprite_scale = s
+            self.sprites = []
+            for color in self.palette:
+                self.add_sprites(color)
+        px = ((x - size) * s).astype(np.int32)
+        py = ((y - size) * s).astype(np.int32)
+
+        visible = radius > 0
+        if not visible.any():
+            return None
+        px, py, radius = px[visible], py[visible], radius[visible]
+        sprites = self.sprites
+        # A generator keeps only one (sprite, pos) pair alive at a time, so a
+        # full particle buffer never piles up young tuples for the collector
+        surface.blits(((sprites[k], (x, y)) for k, x, y in
+                       zip(keys[visible].tolist(), px.tolist(), py.tolist())), False)
+
+        # Bounding box of everything drawn, for dirty-rect presentation
+        x0, y0 = int(px.min()), int(py.min())
+        extent = np.ceil(radius * 2 * s).astype(np.int32)
+        x1, y1 = int((px + extent).max()), int((py + extent).max())
+        return pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(surface.get_rect())
+
+class Powerup:
+    __slots__ = ('rect', 'type', 'vy', 'color', 'active', 'prev_y', 'y')
+
+    def __init__(self, x, y, rng=random):
+        self.rect = pygame.Rect(x, y, 20, 20)
+        self.spawn(x, y, rng)
+
+    def spawn(self, x, y, rng=random):
+        self.rect.topleft = (x, y)
+        self.y = y  # Exact top; rect.y is it rounded
+        self.prev_y = self.rect.y
+        self.type = rng.choice(POWER_TYPES)
+        self.vy = 3
+        self.color = POWER_COLORS[self.type]
+        self.active = True
+
+    def update(self, dt=1.0):
+        # Fractions of a pixel per tick (timestep below 1) add up in self.y
+        self.prev_y = self.rect.y
+        self.y += self.vy * dt
+        self.rect.y = self.y
+        if self.rect.top > SCREEN_HEIGHT:
+            self.active = False
+
+    def draw(self, surface, alpha=1.0):
+        s = SPRITES.scale
+        return surface.blit(SPRITES.powerup(self.type, self.color), (self.rect.x * s, lerp(self.prev_y, self.rect.y, alpha) * s))
+
+class Laser:
+    __slots__ = ('rect', 'vy', 'active', 'prev_y', 'y')
+
+    def __init__(self, x, y):
+        self.rect = pygame.Rect(x - 2, y, 4, 15)
+        self.spawn(x, y)
+
+    def spawn(self, x, y):
+        self.rect.topleft = (x - 2, y)
+        self.y = y  # Exact top; rect.y is it rounded
+        self.prev_y = self.rect.y
+        self.vy = -8
+        self.active = True
+
+    def update(self, dt=1.0):
+        self.prev_y = self.rect.y
+        self.y += self.vy * dt
+        self.rect.y = self.y
+        if self.rect.bottom < 0:
+            self.active = False
+
+    def draw(self, surface, alpha=1.0):
+        s = SPRITES.scale
+        return surface.blit(SPRITES.laser(self.rect.width, self.rect.height), (self.rect.x * s, lerp(self.prev_y, self.rect.y, alpha) * s))
+
+class Ball:
+    __slots__ = ('rng', 'rect', 'dx', 'dy', 'speed', 'active', 'stuck_to_paddle', 'offset_x', 'pos',
+                 'trail', 'trail_len', 'trail_head', 'prev_x', 'prev_y')
+
+    def __init__(self, x, y, speed_mult=1.0, rng=random):
+        self.rect = pygame.Rect(x - BALL_RADIUS, y - BALL_RADIUS, BALL_RADIUS * 2, BALL_RADIUS * 2)
+        self.trail = [0] * (TRAIL_LENGTH * 2)  # TRAIL EFFECT: ring of x, y pairs
+        self.spawn(x, y, speed_mult, rng)
+
+    def spawn(self, x, y, speed_mult=1.0, rng=random):
+        self.rng = rng
+        self.rect.topleft = (x - BALL_RADIUS, y - BALL_RADIUS)
+        self.prev_x, self.prev_y = self.rect.topleft
+        self.dx = rng.choice([-1, 1]) * 4
+        self.dy = -4
+        self.speed = BALL_SPEED_BASE * speed_mult
+        self.active = True
+        self.stuck_to_paddle = True
+        self.offset_x = 0
+        self.pos = None  # Exact center when the timestep is not 1 or collisions are swept, None while stuck
+        self.trail_len = 0
+        self.trail_head = 0  # Next pair to overwrite
+
+    def launch(self):
+        self.stuck_to_paddle = False
+        self.dy = -abs(self.speed)
+        self.dx = self.rng.uniform(-2, 2)
+    
+    def normalize_velocity(self):
+        vel = math.hypot(self.dx, self.dy)
+        if vel == 0: return
+        scale = self.speed / vel
+        self.dx *= scale
+        self.dy *= scale
+
+    def update_trail(self):
+        i = self.trail_head * 2
+        self.trail[i] = self.rect.centerx
+        self.trail[i + 1] = self.rect.centery
+        self.trail_head = (self.trail_head + 1) % TRAIL_LENGTH
+        if self.trail_len < TRAIL_LENGTH:
+            self.trail_len += 1
+
+    def update(self, paddle, dt=1.0):
+        # Update Trail
+        self.update_trail()
+        self.prev_x, self.prev_y = self.rect.topleft
+
+        wall_hit = False
+
+        if self.stuck_to_paddle:
+            self.rect.centerx = paddle.rect.centerx + self.offset_x
+            self.rect.bottom = paddle.rect.top
+            self.pos = None
+        else:
+            if dt == 1.0:
+                self.rect.x += self.dx * dt
+                self.rect.y += self.dy * dt
+            else:
+                # The rect would round away each tick's fraction of a pixel,
+                # so the ball's speed would depend on the simulation rate
+                if self.pos is None:
+                    self.pos = (float(self.rect.centerx), float(self.rect.centery))
+                self.pos = (self.pos[0] + self.dx * dt, self.pos[1] + self.dy * dt)
+                self.rect.center = self.pos
+            self.normalize_velocity()
+
+            # Wall Collisions
+            if self.rect.left <= 0:
+                self.rect.left = 0
+                self.dx *= -1
+                wall_hit = True
+            if self.rect.right >= SCREEN_WIDTH:
+                self.rect.right = SCREEN_WIDTH
+                self.dx *= -1
+                wall_hit = True
+            if self.rect.top <= 0:
+                self.rect.top = 0
+                self.dy *= -1
+                wall_hit = True
+            if wall_hit and self.pos is not None:
+                x, y = self.pos
+                if self.rect.left == 0 or self.rect.right == SCREEN_WIDTH:
+                    x = float(self.rect.centerx)
+                if self.rect.top == 0:
+                    y = float(self.rect.centery)
+                self.pos = (x, y)
+            
+            if self.rect.top > SCREEN_HEIGHT:
+                self.active = False
+        
+        return wall_hit
+
+    def draw(self, surface, alpha=1.0):
+        # Draw Trail
+        n = self.trail_len
+        start = self.trail_head - n
+        trail = self.trail
+        s = SPRITES.scale
+        rects = []
+        for i in range(n):
+            radius = int(BALL_RADIUS * (i / n))
+            if radius == 0:
+                continue
+            fade = int((i / n) * 100)
+            j = (start + i) % TRAIL_LENGTH * 2
+            rects.append(surface.blit(SPRITES.trail(radius, fade), ((trail[j] - radius) * s, (trail[j + 1] - radius) * s)))
+
+        pos = (lerp(self.prev_x, self.rect.x, alpha) * s, lerp(self.prev_y, self.rect.y, alpha) * s)
+        area = surface.blit(SPRITES.ball(BALL_RADIUS), pos)
+        return area.unionall(rects)
+
+class BallSwarm:
+    # Struct-of-arrays balls for massive multiball. The rules are Ball's
+    # (integer rect moves, or exact positions in fx/fy when the timestep is
+    # not 1; normalize after moving, wall bounces) applied to every ball in
+    # one NumPy pass; trails share a ring buffer that every ball
+    # writes each tick. Game.update_swarm resolves paddle and brick contacts;
+    # swept collisions are not applied to swarm balls.
+    def __init__(self, capacity=MAX_BALLS):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity, np.int64)  # rect.left
+        self.y = np.zeros(capacity, np.int64)  # rect.top
+        self.prev_x = np.zeros(capacity, np.int64)  # Position before the last move
+        self.prev_y = np.zeros(capacity, np.int64)
+        self.fx = np.zeros(capacity)  # Exact x and y (fractional timesteps only)
+        self.fy = np.zeros(capacity)
+        self.dx = np.zeros(capacity)
+        self.dy = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.stuck = np.zeros(capacity, bool)
+        self.active = np.zeros(capacity, bool)
+        self.trail = np.zeros((TRAIL_LENGTH, capacity, 2), np.int64)  # [slot, ball] -> center
+        self.trail_len = np.zeros(capacity, np.int64)
+        self.trail_head = 0
+
+        # Trail sprite and radius per (trail length * TRAIL_LENGTH + position),
+        # same sizes and fades as Ball.draw
+        self.trail_radius = np.zeros((TRAIL_LENGTH + 1) * TRAIL_LENGTH, np.int64)
+        for n in range(1, TRAIL_LENGTH + 1):
+            for i in range(n):
+                self.trail_radius[n * TRAIL_LENGTH + i] = int(BALL_RADIUS * (i / n))
+        self.build_trail_sprites()
+
+    def build_trail_sprites(self):
+        self.sprite_scale = SPRITES.scale  # Render scale the table was built at
+        self.trail_sprites = [None] * ((TRAIL_LENGTH + 1) * TRAIL_LENGTH)
+        for n in range(1, TRAIL_LENGTH + 1):
+            for i in range(n):
+                radius = int(self.trail_radius[n * TRAIL_LENGTH + i])
+                if radius:
+                    self.trail_sprites[n * TRAIL_LENGTH + i] = SPRITES.trail(radius, int((i / n) * 100))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x, y, speed_mult=1.0, rng=random):
+        # Same state and random draws as Ball(x, y, speed_mult, rng)
+        i = self.count
+        if i == self.capacity:
+            return None
+        self.x[i] = self.prev_x[i] = self.fx[i] = x - BALL_RADIUS
+        self.y[i] = self.prev_y[i] = self.fy[i] = y - BALL_RADIUS
+        self.dx[i] = rng.choice([-1, 1]) * 4
+        self.dy[i] = -4
+        self.speed[i] = BALL_SPEED_BASE * speed_mult
+        self.stuck[i] = True
+        self.active[i] = True
+        self.trail_len[i] = 0
+        self.count = i + 1
+        return i
+
+    def launch(self, rng):
+        for i in np.nonzero(self.stuck[:self.count])[0].tolist():
+            self.stuck[i] = False
+            self.dy[i] = -abs(self.speed[i])
+            self.dx[i] = rng.uniform(-2, 2)
+
+    def move(self, paddle, dt=1.0):
+        # Ball.update for every ball; returns True if any ball hit a wall
+        n = self.count
+        x, y, dx, dy = self.x[:n], self.y[:n], self.dx[:n], self.dy[:n]
+        self.trail[self.trail_head, :n, 0] = x + BALL_RADIUS
+        self.trail[self.trail_head, :n, 1] = y + BALL_RADIUS
+        self.trail_head = (self.trail_head + 1) % TRAIL_LENGTH
+        np.minimum(self.trail_len[:n] + 1, TRAIL_LENGTH, out=self.trail_len[:n])
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        stuck = self.stuck[:n]
+        free = ~stuck
+        x[stuck] = paddle.rect.centerx - BALL_RADIUS
+        y[stuck] = paddle.rect.top - BALL_RADIUS * 2
+        if dt == 1.0:
+            x[free] = round_rect(x[free] + dx[free] * dt)
+            y[free] = round_rect(y[free] + dy[free] * dt)
+        else:
+            fx, fy = self.fx[:n], self.fy[:n]
+            fx[stuck] = x[stuck]
+            fy[stuck] = y[stuck]
+            fx[free] += dx[free] * dt
+            fy[free] += dy[free] * dt
+            x[free] = round_rect(fx[free])
+            y[free] = round_rect(fy[free])
+        vel = hypot(dx, dy)
+        moving = free & (vel != 0)
+        scale = self.speed[:n][moving] / vel[moving]
+        dx[moving] *= scale
+        dy[moving] *= scale
+
+        size = BALL_RADIUS * 2
+        left = free & (x <= 0)
+        x[left] = 0
+        dx[left] *= -1
+        right = free & (x + size >= SCREEN_WIDTH)
+        x[right] = SCREEN_WIDTH - size
+        dx[right] *= -1
+        top = free & (y <= 0)
+        y[top] = 0
+        dy[top] *= -1
+        if dt != 1.0:
+            self.fx[:n][left | right] = x[left | right]
+            self.fy[:n][top] = 0
+        self.active[:n] &= ~(free & (y > SCREEN_HEIGHT))
+        return bool((left | right | top).any())
+
+    def compact(self):
+        # Drop inactive balls, keeping the survivors in order
+        n = self.count
+        alive = self.active[:n]
+        k = int(np.count_nonzero(alive))
+        if k < n:
+            for arr in (self.x, self.y, self.prev_x, self.prev_y, self.fx, self.fy, self.dx, self.dy, self.speed,
+                        self.stuck, self.trail_len):
+                arr[:k] = arr[:n][alive]
+            self.trail[:, :k] = self.trail[:, :n][:, alive]
+            self.active[:k] = True
+            self.count = k
+
+    def copy_from(self, other):
+        # Render state of another swarm (positions and trails only)
+        n = other.count
+        self.count = n
+        self.trail_head = other.trail_head
+        for name in ('x', 'y', 'prev_x', 'prev_y', 'trail_len'):
+            getattr(self, name)[:n] = getattr(other, name)[:n]
+        self.trail[:, :n] = other.trail[:, :n]
+
+    def capture(self, balls):
+        # Render state of Ball objects; each trail ring is unrolled oldest
+        # first, which is what draw() expects with trail_head = 0
+        n = len(balls)
+        self.count = n
+        self.trail_head = 0
+        if n == 0:
+            return
+        self.x[:n] = [b.rect.x for b in balls]
+        self.y[:n] = [b.rect.y for b in balls]
+        self.prev_x[:n] = [b.prev_x for b in balls]
+        self.prev_y[:n] = [b.prev_y for b in balls]
+        self.trail_len[:n] = [b.trail_len for b in balls]
+        rings = [b.trail[b.trail_head * 2:] + b.trail[:b.trail_head * 2] for b in balls]
+        self.trail[:, :n] = np.array(rings, np.int64).reshape(n, TRAIL_LENGTH, 2).swapaxes(0, 1)
+
+    def lowest(self):
+        # (centerx, top) of the lowest ball, first one on ties
+        i = int(np.argmax(self.y[:self.count]))
+        return int(self.x[i]) + BALL_RADIUS, int(self.y[i])
+
+    def draw(self, surface, alpha=1.0):
+        n = self.count
+        if n == 0:
+            return None
+        # Ring slots oldest first; a ball with a trail of length L owns the last L
+        lens = self.trail_len[:n]
+        pos = np.arange(TRAIL_LENGTH)[:, None] - TRAIL_LENGTH + lens
+        keys = np.where(pos >= 0, lens * TRAIL_LENGTH + pos, 0)
+        radius = self.trail_radius[keys]
+        shown = radius > 0
+        slots = (self.trail_head + np.arange(TRAIL_LENGTH)) % TRAIL_LENGTH
+        points = self.trail[slots, :n]
+        radius = radius[shown]
+        px = points[..., 0][shown] - radius
+        py = points[..., 1][shown] - radius
+        s = SPRITES.scale
+        if s != self.sprite_scale:
+            self.build_trail_sprites()
+        if s != 1.0:
+            px, py = (px * s).astype(np.int64), (py * s).astype(np.int64)
+        px, py = px.tolist(), py.tolist()
+        sprites = self.trail_sprites
+        surface.blits(((sprites[k], (x, y)) for k, x, y in zip(keys[shown].tolist(), px, py)), False)
+
+        bx, by = self.x[:n], self.y[:n]
+        if alpha != 1.0:
+            px, py = self.prev_x[:n], self.prev_y[:n]
+            bx, by = round_rect(px + (bx - px) * alpha), round_rect(py + (by - py) * alpha)
+        if s != 1.0:
+            bx, by = (bx * s).astype(np.int64), (by * s).astype(np.int64)
+        ball = SPRITES.ball(BALL_RADIUS)
+        surface.blits(((ball, (x, y)) for x, y in zip(bx.tolist(), by.tolist())), False)
+
+        size = math.ceil(BALL_RADIUS * 2 * s)
+        x0, y0 = int(bx.min()) - size, int(by.min()) - size
+        x1, y1 = int(bx.max()) + size * 2, int(by.max()) + size * 2
+        return pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(surface.get_rect())
+
+class Brick:
+    __slots__ = ('rect', 'color', 'active', 'has_powerup')
+
+    def __init__(self, x, y, color, rng=random):
+        self.rect = pygame.Rect(x, y, BRICK_WIDTH, BRICK_HEIGHT)
+        self.color = color
+        self.active = True
+        self.has_powerup = rng.random() < 0.15
+
+    def draw(self, surface):
+        s = SPRITES.scale
+        return surface.blit(SPRITES.brick(self.color, self.rect.width, self.rect.height), (self.rect.x * s, self.rect.y * s))
+
+def brick_code(brick):
+    # Color and powerup flag as a savestate cell code
+    return COLOR_INDEX[brick.color] + 1 | (CELL_POWERUP if brick.has_powerup else 0)
+
+class BrickGrid:
+    # Uniform grid over the brick layout: one brick per (row, col) cell, so a
+    # collision query only looks at the few cells a rect overlaps. While
+    # journal is a list, every add and remove appends (row, col, code) to it
+    # (code 0 for a removal) so save states can record only what changed.
+    offset = 0  # The layout never scrolls
+    journal = None
+
+    def __init__(self, bricks=()):
+        self.cells = {}
+        for brick in bricks:
+            self.add(brick)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells.values())
+
+    def items(self):
+        return self.cells.items()
+
+    def visible(self):
+        return self.cells.values()
+
+    def get(self, r, c):
+        return self.cells.get((r, c))
+
+    def cell(self, brick):
+        return (brick.rect.top - BRICK_TOP) // BRICK_CELL_H, (brick.rect.left - 2) // BRICK_CELL_W
+
+    def add(self, brick):
+        r, c = self.cell(brick)
+        self.cells[(r, c)] = brick
+        if self.journal is not None:
+            self.journal.append((r, c, brick_code(brick)))
+
+    def remove(self, brick):
+        r, c = self.cell(brick)
+        del self.cells[(r, c)]
+        if self.journal is not None:
+            self.journal.append((r, c, 0))
+
+    def query(self, rect):
+        # Every brick in the cells rect overlaps, row-major
+        r0 = (rect.top - BRICK_TOP) // BRICK_CELL_H
+        r1 = (rect.bottom - 1 - BRICK_TOP) // BRICK_CELL_H
+        c0 = (rect.left - 2) // BRICK_CELL_W
+        c1 = (rect.right - 1 - 2) // BRICK_CELL_W
+        cells = self.cells
+        return [cells[(r, c)] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) if (r, c) in cells]
+
+    def hit(self, rect):
+        # First colliding brick in row-major order (same as collidelist on the old list)
+        r0 = (rect.top - BRICK_TOP) // BRICK_CELL_H
+        r1 = (rect.bottom - 1 - BRICK_TOP) // BRICK_CELL_H
+        c0 = (rect.left - 2) // BRICK_CELL_W
+        c1 = (rect.right - 1 - 2) // BRICK_CELL_W
+        cells = self.cells
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                brick = cells.get((r, c))
+                if brick is not None and rect.colliderect(brick.rect):
+                    return brick
+        return None
+
+class BrickField:
+    # Endless scrolling field with the BrickGrid interface. Rows run upward
+    # without limit (negative row numbers) and are stored in chunks of
+    # ENDLESS_CHUNK_ROWS, each generated from (seed, chunk index) when it
+    # scrolls into the window just above the screen. Rows that sink past
+    # ENDLESS_FLOOR crumble and chunks below it are dropped, so only a few
+    # chunks are ever loaded however deep the field goes. journal works as
+    # in BrickGrid and also logs crumbled bricks and loaded chunks.
+    journal = None
+
+    def __init__(self, seed, load=True):
+        self.seed = seed
+        self.scroll = 0.0   # pixels the field has moved down
+        self.offset = 0     # whole pixels of scroll already applied to brick rects
+        self.chunks = {}    # chunk index -> {(r, c): Brick}
+        self.count = 0
+        self.floor_row = ENDLESS_BOTTOM_ROW
+        if load:  # Else left empty for Game.restore_state to fill
+            self.load_chunks()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for chunk in self.chunks.values():
+            yield from chunk.values()
+
+    def items(self):
+        for chunk in self.chunks.values():
+            yield from chunk.items()
+
+    @property
+    def depth(self):
+        # Rows scrolled past since the start
+        return self.offset // BRICK_CELL_H
+
+    def row_at(self, y):
+        return (y - BRICK_TOP - self.offset) // BRICK_CELL_H
+
+    def visible(self):
+        # Bricks in the chunks that overlap the screen
+        k0 = self.row_at(0) // ENDLESS_CHUNK_ROWS
+        k1 = self.row_at(SCREEN_HEIGHT) // ENDLESS_CHUNK_ROWS
+        for k in range(k0, k1 + 1):
+            chunk = self.chunks.get(k)
+            if chunk is not None:
+                yield from chunk.values()
+
+    def generate_chunk(self, k):
+        rng = random.Random(f"{self.seed}:{k}")
+        pattern = rng.randrange(4)
+        chunk = {}
+        for r in range(k * ENDLESS_CHUNK_ROWS, min((k + 1) * ENDLESS_CHUNK_ROWS, ENDLESS_BOTTOM_ROW + 1)):
+            for c in range(BRICK_COLS):
+                if pattern == 1 and (r + c) % 2 == 0: continue
+                if pattern == 2 and c % 3 == 1: continue
+                if pattern == 3 and rng.random() < 0.2: continue
+                by = BRICK_TOP + r * BRICK_CELL_H + self.offset
+                chunk[(r, c)] = Brick(c * BRICK_CELL_W + 2, by, COLORS_LIST[r % len(COLORS_LIST)], rng)
+        return chunk
+
+    def load_chunks(self):
+        # Load from one chunk above the screen down to the floor
+        k0 = self.row_at(0) // ENDLESS_CHUNK_ROWS - 1
+        for k in range(k0, self.floor_row // ENDLESS_CHUNK_ROWS + 1):
+            if k not in self.chunks:
+                chunk = self.generate_chunk(k)
+                self.chunks[k] = chunk
+                self.count += len(chunk)
+                if self.journal is not None:
+                    self.journal.extend((r, c, brick_code(brick)) for (r, c), brick in chunk.items())
+
+    def scroll_by(self, pixels):
+        # Move the field down; returns the bricks that crumbled past the floor
+        self.scroll += pixels
+        shift = int(self.scroll) - self.offset
+        if shift == 0:
+            return []
+        self.offset += shift
+        for chunk in self.chunks.values():
+            for brick in chunk.values():
+                brick.rect.y += shift
+
+        self.floor_row = (ENDLESS_FLOOR - BRICK_HEIGHT - BRICK_TOP - self.offset) // BRICK_CELL_H
+        crumbled = []
+        for k in [k for k in self.chunks if (k + 1) * ENDLESS_CHUNK_ROWS - 1 > self.floor_row]:
+            chunk = self.chunks[k]
+            for key in [key for key in chunk if key[0] > self.floor_row]:
+                crumbled.append(chunk.pop(key))
+                if self.journal is not None:
+                    self.journal.append((*key, 0))
+            if k * ENDLESS_CHUNK_ROWS > self.floor_row:
+                del self.chunks[k]
+        self.count -= len(crumbled)
+        self.load_chunks()
+        return crumbled
+
+    def get(self, r, c):
+        chunk = self.chunks.get(r // ENDLESS_CHUNK_ROWS)
+        return None if chunk is None else chunk.get((r, c))
+
+    def cell(self, brick):
+        return ((brick.rect.top - BRICK_TOP - self.offset) // BRICK_CELL_H,
+                (brick.rect.left - 2) // BRICK_CELL_W)
+
+    def add(self, brick):
+        r, c = self.cell(brick)
+        self.chunks.setdefault(r // ENDLESS_CHUNK_ROWS, {})[(r, c)] = brick
+        self.count += 1
+        if self.journal is not None:
+            self.journal.append((r, c, brick_code(brick)))
+
+    def remove(self, brick):
+        r, c = self.cell(brick)
+        del self.chunks[r // ENDLESS_CHUNK_ROWS][(r, c)]
+        self.count -= 1
+        if self.journal is not None:
+            self.journal.append((r, c, 0))
+
+    def query(self, rect):
+        # Every brick in the cells rect overlaps, row-major; only the chunks
+        # those rows fall in are looked at
+        r0, r1 = self.row_at(rect.top), self.row_at(rect.bottom - 1)
+        c0 = (rect.left - 2) // BRICK_CELL_W
+        c1 = (rect.right - 1 - 2) // BRICK_CELL_W
+        found = []
+        for r in range(r0, r1 + 1):
+            chunk = self.chunks.get(r // ENDLESS_CHUNK_ROWS)
+            if chunk is not None:
+                found.extend(chunk[(r, c)] for c in range(c0, c1 + 1) if (r, c) in chunk)
+        return found
+
+    def hit(self, rect):
+        # First colliding brick in row-major order, like BrickGrid.hit
+        r0, r1 = self.row_at(rect.top), self.row_at(rect.bottom - 1)
+        c0 = (rect.left - 2) // BRICK_CELL_W
+        c1 = (rect.right - 1 - 2) // BRICK_CELL_W
+        for r in range(r0, r1 + 1):
+            chunk = self.chunks.get(r // ENDLESS_CHUNK_ROWS)
+            if chunk is None:
+                continue
+            for c in range(c0, c1 + 1):
+                brick = chunk.get((r, c))
+                if brick is not None and rect.colliderect(brick.rect):
+                    return brick
+        return None
+
+class Paddle:
+    def __init__(self):
+        self.width = PADDLE_WIDTH
+        self.height = PADDLE_HEIGHT
+        self.rect = pygame.Rect(SCREEN_WIDTH // 2 - self.width // 2, SCREEN_HEIGHT - 40, self.width, self.height)
+        self.prev_x = self.rect.x
+        self.frac_x = 0.0  # Sub-pixel part of x carried between ticks (timestep below 1)
+        self.speed = 8
+        self.color = CYAN
+        
+        self.laser_active = False
+        self.big_active = False
+        self.powerup_timer = 0  # seconds
+        self.shoot_timer = 0
+
+    def update(self, inputs=0, dt=1.0):
+        self.prev_x = self.rect.x
+        seconds = dt / FPS
+        x = self.rect.x + self.frac_x
+        if inputs & INPUT_LEFT:
+            x -= self.speed * dt
+        if inputs & INPUT_RIGHT:
+            x += self.speed * dt
+        self.rect.x = x
+        self.frac_x = x - self.rect.x
+
+        if self.rect.left < 0:
+            self.rect.left = 0
+            self.frac_x = 0.0
+        if self.rect.right > SCREEN_WIDTH:
+            self.rect.right = SCREEN_WIDTH
+            self.frac_x = 0.0
+
+        if self.powerup_timer > 0:
+            self.powerup_timer -= seconds
+            if self.powerup_timer <= TIMER_EPSILON:
+                self.powerup_timer = 0
+                self.reset_powerups()
+        
+        if self.laser_active and inputs & INPUT_FIRE:
+            if self.shoot_timer <= TIMER_EPSILON:
+                self.shoot_timer = LASER_COOLDOWN
+                return True
+            else:
+                self.shoot_timer -= seconds
+        elif self.shoot_timer > 0:
+            self.shoot_timer -= seconds
+        return False
+
+    def activate_powerup(self, p_type):
+        self.powerup_timer = POWERUP_DURATION
+        if p_type == PowerType.BIG_PADDLE:
+            self.big_active = True
+            self.rect.width = PADDLE_WIDTH * 1.5
+            self.rect.x -= (PADDLE_WIDTH * 0.25)
+            self.color = GREEN
+        elif p_type == PowerType.LASER:
+            self.laser_active = True
+            self.color = RED
+
+    def reset_powerups(self):
+        self.laser_active = False
+        self.big_active = False
+        center = self.rect.centerx
+        self.rect.width = PADDLE_WIDTH
+        self.rect.centerx = center
+        self.color = CYAN
+
+    def draw(self, surface, alpha=1.0):
+        sprite = SPRITES.paddle(self.color, self.rect.width, self.rect.height, self.laser_active)
+        s = SPRITES.scale
+        return surface.blit(sprite, (lerp(self.prev_x, self.rect.left, alpha) * s, (self.rect.top - 5) * s))
+
+class Snapshot:
+    # Everything the renderer needs from one simulated frame, copied out so the
+    # main thread can draw it while the worker runs the next one (--threaded).
+    # It also carries the side effects of the ticks that produced it, which
+    # belong to the main thread: sounds, particle bursts, broken-brick rects
+    # and level resets.
+    def __init__(self):
+        self.balls = BallSwarm()
+        self.bricks = ()      # (x, y, w, h, color) per visible brick, shared while unchanged
+        self.paddle = None    # (x, prev_x, y, w, h, color, laser_active)
+        self.lasers = []      # (x, y, prev_y, w, h)
+        self.powerups = []    # (x, y, prev_y, type, color)
+        self.hud = None
+        self.counts = {}
+        self.sim_dt = 0.0     # 60 FPS frames simulated for this snapshot
+        self.sounds, self.emits, self.broken = [], [], []
+        self.reset = False    # Particles were cleared
+        self.relayout = False  # The brick layout was replaced
+
+    def begin(self):
+        self.sounds.clear()
+        self.emits.clear()
+        self.broken.clear()
+        self.reset = self.relayout = False
+
+    def capture(self, game, sim_dt):
+        self.sim_dt = sim_dt
+        if game.swarm:
+            self.balls.copy_from(game.balls)
+        else:
+            self.balls.capture(game.balls)
+        if game.brick_cache[0] != game.brick_version:
+            game.brick_cache = (game.brick_version, tuple((b.rect.x, b.rect.y, b.rect.width, b.rect.height, b.color)
+                                                          for b in game.bricks.visible()))
+        self.bricks = game.brick_cache[1]
+        p = game.paddle
+        self.paddle = (p.rect.x, p.prev_x, p.rect.y, p.rect.width, p.rect.height, p.color, p.laser_active)
+        self.lasers = [(l.rect.x, l.rect.y, l.prev_y, l.rect.width, l.rect.height) for l in game.lasers]
+        self.powerups = [(u.rect.x, u.rect.y, u.prev_y, u.type, u.color) for u in game.powerups]
+        self.hud = game.hud()
+        self.counts = game.entity_counts(particles=0)  # The main thread owns the particles
+
+class Game:
+    def __init__(self, headless=False, dirty_rendering=False, seed=None, record_dir=None,
+                 swept=False, timestep=1.0, profile=False, trace_seconds=10, level_pack=LEVEL_PACK_FILE,
+                 endless=False, swarm=False, threaded=False, scores_file=SCORES_FILE, player="player",
+                 rewind_seconds=REWIND_SECONDS, quality=DEFAULT_QUALITY, render_scale=None,
+                 window_size=None, sdl_scaled=False):
+        self.headless = headless
+        self.endless = endless
+        self.swarm = swarm  # Massive multiball: balls live in a BallSwarm
+        if swarm and timestep > 1:
+            # BallSwarm has no swept collisions, so longer ticks let balls tunnel
+            raise ValueError("swarm mode needs a timestep of at most 1 (60 or more ticks per second)")
+        self.level_pack = None
+        if level_pack and os.path.exists(level_pack):
+            try:
+                self.level_pack = LevelPack.open(level_pack)
+            except (OSError, ValueError) as e:
+                print(f"Error loading level pack: {e}")
+        self.trace_seconds = trace_seconds
+        self.profiler = FrameProfiler(trace_seconds) if profile else NullProfiler()
+        self.show_profiler = profile
+        # timestep is in 60 FPS frames per step (FPS / simulation rate); values
+        # above 1 need swept collisions
+        self.swept_collisions = swept
+        self.timestep = timestep
+        self.alpha = 1.0  # Render position between the last two ticks
+        self.dirty_rendering = dirty_rendering
+        self.fixed_seed = seed
+        self.record_dir = record_dir
+        self.recorder = None
+        self.player = player
+        # Save states of the last rewind_seconds, pushed after every tick (hold R)
+        self.rewind = None
+        if rewind_seconds and not headless:
+            self.rewind = RewindBuffer(rewind_seconds, FPS / timestep)
+        if headless:
+            # Simulation only: never touches the display, fonts or mixer
+            self.screen = None
+            self.presenter = None
+            self.sound_manager = SoundManager(enabled=False)
+            self.scores = None
+            self.leaderboard = []
+            self.highscore = 0
+            self.state = "PLAYING"
+        else:
+            pygame.init()
+            # Everything is drawn into the presenter's canvas at its render
+            # scale (see present.py); positions stay logical until the blit
+            self.presenter = Presenter((SCREEN_WIDTH, SCREEN_HEIGHT), quality, render_scale, window_size, sdl_scaled)
+            pygame.display.set_caption(TITLE)
+            self.clock = pygame.time.Clock()
+            self.view_scale = None
+            self.pause_frame = None  # The paused scene, composited once
+
+            self.sound_manager = SoundManager()
+            # Games are written on the leaderboard's own thread; the menu list
+            # is read once here and then kept up to date in memory
+            self.scores = ScoreStore(scores_file) if scores_file is not None else None
+            self.leaderboard = self.scores.top(LEADERBOARD_SIZE) if self.scores else []
+            self.highscore = self.leaderboard[0]["score"] if self.leaderboard else 0
+            self.state = "MENU" # MENU, PLAYING, GAMEOVER, PAUSED
+        self.launch_requested = False
+        self.particles = ParticleSystem()
+        self.ball_pool = Pool(Ball)
+        self.laser_pool = Pool(Laser)
+        self.powerup_pool = Pool(Powerup)
+        self.balls = BallSwarm() if swarm else []
+        self.lasers, self.powerups = [], []
+
+        # Dirty-rect renderer state: cached brick layer plus last frame's rects
+        self.brick_layer = None
+        self.dirty_rects = []
+        self.full_redraw = True
+        if self.presenter is not None:
+            self.apply_view()
+
+        # Threaded pipeline: render effects are routed into frame_events while
+        # the worker runs ticks; brick_version tells snapshots to re-copy bricks
+        self.frame_events = None
+        self.brick_version = 0
+        self.brick_cache = (-1, ())
+        self.worker = None
+        self.snapshots = None
+        self.front_current = False
+        
+        self.reset_game()
+        if threaded and not headless:
+            self.start_pipeline()
+
+    def reset_game(self):
+        # Simulation and cosmetic randomness use separate streams, so particles
+        # never change the outcome of a seeded game.
+        self.seed = self.fixed_seed if self.fixed_seed is not None else int.from_bytes(os.urandom(4), 'little')
+        self.rng = SimRandom(self.seed)
+        self.fx_rng = random.Random(self.seed ^ 0x5EED)
+        self.particles.rng = np.random.default_rng(self.fx_rng.getrandbits(64))
+        if self.record_dir is not None:
+            pack_crc = self.level_pack.digest() if self.level_pack is not None else 0
+            self.recorder = InputRecorder(self.seed, self.swept_collisions, self.timestep, self.endless, self.swarm, pack_crc)
+        if self.rewind is not None:
+            self.rewind.clear()
+
+        self.ticks = 0
+        self.bricks_broken = 0
+        self.powerups_collected = 0
+        self.lives = 3
+        self.score = 0
+        self.level = 1
+        self.combo = 1
+        self.ball_speed_mult = 1.0
+        self.reset_level(new_pattern=True)
+
+    def generate_level(self):
+        bricks = []
+        
+        # Levels 1..N come from the level pack, procedural after that
+        if self.level_pack is not None and self.level <= len(self.level_pack):
+            for r, c, color_idx in self.level_pack.bricks(self.level - 1):
+                if r >= PACK_ROWS or c >= BRICK_COLS:
+                    continue
+                bx = c * BRICK_CELL_W + 2
+                by = BRICK_TOP + r * BRICK_CELL_H
+                if color_idx < len(COLORS_LIST):
+                    bricks.append(Brick(bx, by, COLORS_LIST[color_idx], self.rng))
+            if bricks:
+                return bricks
+
+        # Procedural Generation
+        rows = 4 + (self.level // 2)
+        cols = 10
+        pattern_type = self.level % 4
+        
+        for r in range(rows):
+            for c in range(cols):
+                bx = c * BRICK_CELL_W + 2
+                by = BRICK_TOP + r * BRICK_CELL_H
+                color = COLORS_LIST[r % len(COLORS_LIST)]
+                
+                add_brick = True
+                if pattern_type == 1:
+                    if (r + c) % 2 == 0: add_brick = False
+                elif pattern_type == 2:
+                    if c < r or c >= cols - r: add_brick = False
+                elif pattern_type == 3:
+                    if self.rng.random() < 0.2: add_brick = False
+
+                if add_brick:
+                    bricks.append(Brick(bx, by, color, self.rng))
+        return bricks
+
+    def reset_level(self, new_pattern=False):
+        self.paddle = Paddle()
+        if self.swarm:
+            self.balls.clear()
+        else:
+            self.ball_pool.release_all(self.balls)
+            self.balls = []
+        self.spawn_ball()
+        self.powerup_pool.release_all(self.powerups)
+        self.laser_pool.release_all(self.lasers)
+        self.powerups = []
+        self.lasers = []
+        events = self.frame_events
+        if events is not None:
+            events.reset = True
+            events.emits.clear()
+            events.broken.clear()
+        else:
+            self.particles.clear()
+        if new_pattern:
+            self.bricks = BrickField(self.seed) if self.endless else BrickGrid(self.generate_level())
+            self.brick_version += 1
+            if events is not None:
+                events.relayout = True
+            else:
+                self.brick_layer = None
+
+    def spawn_ball(self):
+        # A fresh ball stuck to the paddle
+        if self.swarm:
+            self.balls.spawn(SCREEN_WIDTH//2, SCREEN_HEIGHT - 60, self.ball_speed_mult, self.rng)
+        else:
+            self.balls.append(self.ball_pool.acquire(SCREEN_WIDTH//2, SCREEN_HEIGHT - 60, self.ball_speed_mult, self.rng))
+
+    def entity_counts(self, particles=None):
+        return {
+            "balls": len(self.balls),
+            "bricks": len(self.bricks),
+            "particles": len(self.particles) if particles is None else particles,
+            "lasers": len(self.lasers),
+            "powerups": len(self.powerups),
+        }
+
+    def hud(self):
+        # (score, level label, lives, combo) as shown in the top bar
+        label = f"Depth: {self.bricks.depth}" if self.endless else f"Level: {self.level}"
+        return self.score, label, self.lives, self.combo
+
+    def lowest_ball(self):
+        # (centerx, top) of the lowest ball for scripted players, None without balls
+        if len(self.balls) == 0:
+            return None
+        if self.swarm:
+            return self.balls.lowest()
+        ball = max(self.balls, key=lambda b: b.rect.y)
+        return ball.rect.centerx, ball.rect.y
+
+    def apply_view(self):
+        # The presenter (re)opened its window: draw into the new canvas, and
+        # rebuild fonts and the HUD when the render scale changed. Sprites are
+        # re-rendered lazily by the atlas.
+        p = self.presenter
+        self.screen = p.canvas
+        if p.scale != self.view_scale:
+            self.view_scale = p.scale
+            SPRITES.set_scale(p.scale)
+            self.font_large = pygame.font.Font(None, max(1, round(74 * p.scale)))
+            self.font_small = pygame.font.Font(None, max(1, round(36 * p.scale)))
+            self.hud_bar = HudBar(self.font_small)
+        self.hud_bar.reset()
+        self.brick_layer = None
+        self.pause_frame = None
+        self.full_redraw = True
+
+    def handle_input(self):
+        for event in self.pacer.events():
+            event = self.presenter.map_event(event)
+            if event.type == pygame.QUIT:
+                return False
+
+            if event.type == pygame.VIDEORESIZE:
+                self.presenter.resize(event.size)
+                self.apply_view()
+
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                if event.key == pygame.K_F11:
+                    # Fullscreen opens at the desktop resolution; the canvas
+                    # keeps its size unless the quality is "native"
+                    self.presenter.toggle_fullscreen()
+                    self.apply_view()
+                if event.key == pygame.K_F9:
+                    self.dirty_rendering = not self.dirty_rendering
+                    self.full_redraw = True
+                if event.key == pygame.K_F3:
+                    if not self.profiler.enabled:
+                        self.profiler = FrameProfiler(self.trace_seconds)
+                    self.show_profiler = not self.show_profiler
+                    self.full_redraw = True
+                if event.key == pygame.K_F4 and self.profiler.enabled:
+                    path = time.strftime("trace-%Y%m%d-%H%M%S.json")
+                    frames = self.profiler.export_chrome_trace(path)
+                    print(f"Exported {frames} frames to {path}")
+                if event.key == pygame.K_F5 and self.state in ("PLAYING", "PAUSED"):
+                    self.quicksave(QUICKSAVE_FILE)
+                if event.key == pygame.K_F8:
+                    self.quickload(QUICKSAVE_FILE)
+                
+                if self.state == "MENU" and event.key == pygame.K_SPACE:
+                    self.state = "PLAYING"
+                    self.reset_game()
+                
+                elif self.state == "GAMEOVER" and event.key == pygame.K_SPACE:
+                    self.state = "MENU"
+
+                elif self.state == "PLAYING":
+                    if event.key == pygame.K_p: # PAUSE
+                        self.state = "PAUSED"
+                    elif event.key == pygame.K_SPACE:
+                        self.launch_requested = True
+                
+                elif self.state == "PAUSED":
+                    if event.key == pygame.K_p:
+                        self.state = "PLAYING"
+
+        return True
+
+    def read_inputs(self):
+        keys = pygame.key.get_pressed()
+        inputs = 0
+        if keys[pygame.K_LEFT]: inputs |= INPUT_LEFT
+        if keys[pygame.K_RIGHT]: inputs |= INPUT_RIGHT
+        if keys[pygame.K_SPACE]: inputs |= INPUT_FIRE
+        if self.launch_requested:
+            inputs |= INPUT_LAUNCH
+            self.launch_requested = False
+        return inputs
+
+    def step(self, inputs=0):
+        # Advance the simulation by one tick. Returns False once the game is over.
+        if self.state != "PLAYING":
+            return False
+        self.ticks += 1
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+
+        if inputs & INPUT_LAUNCH:
+            if self.swarm:
+                self.balls.launch(self.rng)
+            else:
+                for b in self.balls:
+                    if b.stuck_to_paddle:
+                        b.launch()
+
+        if self.endless:
+            for brick in self.bricks.scroll_by(ENDLESS_SCROLL * self.timestep):
+                self.spawn_particles(brick.rect.centerx, brick.rect.centery, brick.color)
+            self.brick_version += 1
+        self.check_collisions(inputs, self.timestep)
+
+        if len(self.balls) == 0:
+            self.play_sound('die')
+            self.lives -= 1
+            if self.lives <= 0:
+                self.state = "GAMEOVER"
+                self.record_score(self.save_recording())
+            else:
+                self.spawn_ball()
+                self.paddle.reset_powerups()
+                self.combo = 1
+        if self.rewind is not None:
+            self.rewind.push(self)
+        return self.state == "PLAYING"
+
+    def brick_state_hash(self):
+        # CRC of every remaining brick's cell, color and powerup flag
+        data = array.array('i')
+        for (r, c), brick in sorted(self.bricks.items()):
+            data.extend((r, c, *brick.color, brick.has_powerup))
+        return zlib.crc32(data.tobytes())
+
+    def record_score(self, replay=None):
+        # Queue the finished game for the leaderboard; never waits on disk
+        if self.scores is None:
+            return
+        level = self.bricks.depth if self.endless else self.level
+        row = self.scores.submit(self.player, self.score, level, self.seed, replay)
+        board = sorted(self.leaderboard + [row], key=lambda r: (-r["score"], r["date"]))
+        self.leaderboard = board[:LEADERBOARD_SIZE]
+        self.highscore = self.leaderboard[0]["score"]
+
+    def save_recording(self):
+        # Returns the replay's path, None if nothing was recorded
+        if self.recorder is None or self.ticks == 0:
+            return None
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, f"{self.seed:08x}-{self.ticks}.bkr")
+        self.recorder.save(path, self.ticks, self.score, self.brick_state_hash())
+        self.recorder = None
+        print(f"Replay saved to {path}")
+        return path
+
+    # Save states: the whole simulation (not particles or sounds) as a
+    # savestate.GameState, restorable in place. Used by the rewind buffer,
+    # F5/F8 quicksaves and replay.py --state-at for bisecting desyncs.
+    def capture_state(self, prev=None, track=False):
+        # With prev, the last state captured from this game, bricks are updated
+        # from the layout's journal instead of re-read (state.changes lists the
+        # edits); track starts that journal for the next capture.
+        bricks = self.bricks
+        if prev is not None and prev.layout is bricks and bricks.journal is not None:
+            changes, bricks.journal = bricks.journal, []
+            cells = prev.cells
+            for r, c, code in changes:
+                if code:
+                    cells[(r, c)] = code
+                else:
+                    cells.pop((r, c), None)
+        else:
+            changes = None
+            cells = {cell: brick_code(brick) for cell, brick in bricks.items()}
+            if track:
+                bricks.journal = []
+
+        if self.swarm:
+            swarm = self.balls
+            n = swarm.count
+            balls = np.zeros(n, BALL_ROW)
+            for name in ('x', 'y', 'prev_x', 'prev_y', 'dx', 'dy', 'speed', 'trail_len'):
+                balls[name] = getattr(swarm, name)[:n]
+            balls['flags'] = swarm.stuck[:n] * BALL_FLAG_STUCK | swarm.active[:n] * BALL_FLAG_ACTIVE
+            if self.timestep != 1.0:
+                balls['pos_x'], balls['pos_y'] = swarm.fx[:n], swarm.fy[:n]
+                balls['flags'] |= BALL_FLAG_POS
+            balls['trail_head'] = swarm.trail_head
+            balls['trail'] = swarm.trail[:, :n].swapaxes(0, 1).reshape(n, TRAIL_LENGTH * 2)
+            trail_head = swarm.trail_head
+        else:
+            # Filled a column at a time: far faster than NumPy parsing row tuples
+            balls = np.zeros(len(self.balls), BALL_ROW)
+            if self.balls:
+                columns = zip(*[(b.rect.x, b.rect.y, b.prev_x, b.prev_y, b.dx, b.dy, b.speed,
+                                 *(b.pos or (0.0, 0.0)), b.offset_x,
+                                 b.stuck_to_paddle * BALL_FLAG_STUCK | b.active * BALL_FLAG_ACTIVE
+                                 | (b.pos is not None) * BALL_FLAG_POS,
+                                 b.trail_len, b.trail_head) for b in self.balls])
+                for name, column in zip(BALL_ROW.names[:-1], columns):
+                    balls[name] = column
+                balls['trail'] = [b.trail for b in self.balls]
+            trail_head = 0
+
+        p = self.paddle
+        rng_mark = (self.rng, self.rng.draws)
+        field = b''
+        if self.endless:
+            field = FIELD.pack(bricks.scroll, bricks.offset, bricks.floor_row) + array.array('i', bricks.chunks).tobytes()
+        flags = (FLAG_SWEPT if self.swept_collisions else 0) | (FLAG_ENDLESS if self.endless else 0) | (FLAG_SWARM if self.swarm else 0)
+        return GameState(
+            seed=self.seed, tick=self.ticks, timestep=self.timestep, flags=flags, trail_length=TRAIL_LENGTH,
+            game=GAME.pack(self.lives, self.score, self.level, self.combo, self.ball_speed_mult, self.bricks_broken,
+                           self.powerups_collected, STATES.index(self.state), trail_head),
+            paddle=PADDLE.pack(p.rect.x, p.prev_x, p.rect.y, p.rect.width, p.rect.height, COLOR_INDEX[p.color],
+                               p.laser_active, p.big_active, p.powerup_timer, p.shoot_timer, p.frac_x),
+            rng=prev.rng if prev is not None and prev.rng_mark == rng_mark else pack_rng(self.rng.getstate()),
+            rng_mark=rng_mark,
+            field=field,
+            balls=balls,
+            lasers=np.array([(l.rect.x, l.y, l.prev_y) for l in self.lasers], LASER),
+            powerups=np.array([(u.rect.x, u.y, u.prev_y, u.type.value) for u in self.powerups], POWERUP),
+            cells=cells, changes=changes, layout=bricks)
+
+    def restore_state(self, state, track=False):
+        # Inverse of capture_state. Entities are re-spawned from the pools,
+        # which draws from self.rng, so the RNG is restored last. track keeps
+        # the new layout's journal for the rewind buffer.
+        flags = (FLAG_ENDLESS if self.endless else 0) | (FLAG_SWARM if self.swarm else 0)
+        if state.flags & (FLAG_ENDLESS | FLAG_SWARM) != flags or state.trail_length != TRAIL_LENGTH:
+            raise ValueError("save state is from a different game mode")
+        self.seed = state.seed
+        self.ticks = state.tick
+        (self.lives, self.score, self.level, self.combo, self.ball_speed_mult, self.bricks_broken,
+         self.powerups_collected, state_index, trail_head) = GAME.unpack(state.game)
+        self.state = STATES[state_index]
+
+        p = self.paddle
+        x, p.prev_x, y, w, h, color, laser, big, p.powerup_timer, p.shoot_timer, p.frac_x = PADDLE.unpack(state.paddle)
+        p.rect = pygame.Rect(x, y, w, h)
+        p.color = COLORS_LIST[color]
+        p.laser_active, p.big_active = bool(laser), bool(big)
+
+        rows = state.balls
+        if self.swarm:
+            swarm = self.balls
+            n = swarm.count = len(rows)
+            swarm.trail_head = trail_head
+            for name in ('x', 'y', 'prev_x', 'prev_y', 'dx', 'dy', 'speed', 'trail_len'):
+                getattr(swarm, name)[:n] = rows[name]
+            swarm.stuck[:n] = rows['flags'] & BALL_FLAG_STUCK != 0
+            swarm.active[:n] = rows['flags'] & BALL_FLAG_ACTIVE != 0
+            exact = rows['flags'] & BALL_FLAG_POS != 0
+            swarm.fx[:n] = np.where(exact, rows['pos_x'], rows['x'])
+            swarm.fy[:n] = np.where(exact, rows['pos_y'], rows['y'])
+            swarm.trail[:, :n] = rows['trail'].reshape(n, TRAIL_LENGTH, 2).swapaxes(0, 1)
+        else:
+            self.ball_pool.release_all(self.balls)
+            self.balls = []
+            for (x, y, prev_x, prev_y, dx, dy, speed, pos_x, pos_y, offset_x, ball_flags,
+                 trail_len, head, _), trail in zip(rows.tolist(), rows['trail'].tolist()):
+                b = self.ball_pool.acquire(x + BALL_RADIUS, y + BALL_RADIUS, 1.0, self.rng)
+                b.prev_x, b.prev_y, b.dx, b.dy, b.speed, b.offset_x = prev_x, prev_y, dx, dy, speed, offset_x
+                b.stuck_to_paddle = bool(ball_flags & BALL_FLAG_STUCK)
+                b.active = bool(ball_flags & BALL_FLAG_ACTIVE)
+                b.pos = (pos_x, pos_y) if ball_flags & BALL_FLAG_POS else None
+                b.trail, b.trail_len, b.trail_head = trail, trail_len, head
+                self.balls.append(b)
+
+        self.laser_pool.release_all(self.lasers)
+        self.lasers = []
+        for x, y, prev_y in state.lasers.tolist():
+            laser = self.laser_pool.acquire(x + 2, y)
+            laser.prev_y = prev_y
+            self.lasers.append(laser)
+        self.powerup_pool.release_all(self.powerups)
+        self.powerups = []
+        for x, y, prev_y, p_type in state.powerups.tolist():
+            powerup = self.powerup_pool.acquire(x, y, self.rng)
+            powerup.prev_y = prev_y
+            powerup.type = PowerType(p_type)
+            powerup.color = POWER_COLORS[powerup.type]
+            self.powerups.append(powerup)
+
+        # Bricks still in the current layout are reused, so rewinding a few
+        # ticks does not rebuild a thousand of them
+        old = self.bricks
+        offset = 0
+        if self.endless:
+            scroll, offset, floor_row = FIELD.unpack_from(state.field)
+            bricks = BrickField(self.seed, load=False)
+            bricks.scroll, bricks.offset, bricks.floor_row = scroll, offset, floor_row
+            bricks.chunks = {k: {} for k in array.array('i', state.field[FIELD.size:])}
+            bricks.count = len(state.cells)
+        else:
+            bricks = BrickGrid()
+        for (r, c), code in state.cells.items():
+            color = COLORS_LIST[(code & ~CELL_POWERUP) - 1]
+            y = BRICK_TOP + r * BRICK_CELL_H + offset
+            brick = old.get(r, c)
+            if brick is None or brick.color != color:
+                brick = Brick(c * BRICK_CELL_W + 2, y, color, self.rng)
+            else:
+                brick.rect.y = y
+            brick.has_powerup = bool(code & CELL_POWERUP)
+            if self.endless:
+                bricks.chunks.setdefault(r // ENDLESS_CHUNK_ROWS, {})[(r, c)] = brick
+            else:
+                bricks.cells[(r, c)] = brick
+        if track:
+            bricks.journal = []
+            state.layout = bricks
+        self.bricks = bricks
+        self.rng.setstate(unpack_rng(state.rng))
+
+        # Render state: nothing cached from before the jump is valid
+        self.particles.clear()
+        self.brick_version += 1
+        self.brick_layer = None
+        self.full_redraw = True
+        self.pause_frame = None
+        self.front_current = False
+        self.alpha = 1.0
+
+    def rewind_by(self, ticks):
+        # Step back up to `ticks` ticks through the rewind buffer
+        state = self.rewind.rewind(ticks) if ticks else None
+        if state is None:
+            return
+        self.restore_state(state, track=True)
+        if self.recorder is not None:
+            self.recorder.truncate(self.ticks)
+
+    def quicksave(self, path):
+        try:
+            with open(path, 'wb') as f:
+                f.write(encode(self.capture_state()))
+            print(f"Game saved to {path}")
+        except OSError as e:
+            print(f"Error saving game: {e}")
+
+    def quickload(self, path):
+        try:
+            with open(path, 'rb') as f:
+                state = decode(f.read())
+            self.restore_state(state)
+        except (OSError, ValueError) as e:
+            print(f"Error loading game: {e}")
+            return
+        # The replay so far no longer leads to this state, and the rewind
+        # history belongs to the game that was replaced
+        if self.recorder is not None:
+            print("Recording stopped: a saved game was loaded")
+            self.recorder = None
+        if self.rewind is not None:
+            self.rewind.clear()
+        print(f"Game loaded from {path}")
+
+    def run_headless(self, policy, max_ticks=100000):
+        # Uncapped simulation loop: policy(game) returns the input flags for each tick
+        while self.ticks < max_ticks and self.step(policy(self)):
+            pass
+        return self.ticks
+
+    def spawn_particles(self, x, y, color):
+        if self.headless:
+            return
+        if self.frame_events is not None:
+            self.frame_events.emits.append((x, y, color))
+        else:
+            self.particles.emit(x, y, color)
+
+    def play_sound(self, name):
+        if self.frame_events is not None:
+            self.frame_events.sounds.append(name)
+        else:
+            self.sound_manager.play(name)
+
+    def check_collisions(self, inputs=0, dt=1.0):
+        # Laser and powerup lists are unordered: dead entries are swap-removed
+        # in O(1) and handed back to their pool, and each loop re-examines slot
+        # i after a removal. Balls keep their order (oldest first, like the
+        # swarm's rows): survivors are compacted in place as the loop goes. A
+        # level change replaces every list, so the loops stop there.
+
+        # 1. Paddle shoots laser
+        if self.paddle.update(inputs, dt):
+            self.lasers.append(self.laser_pool.acquire(self.paddle.rect.left + 5, self.paddle.rect.top))
+            self.lasers.append(self.laser_pool.acquire(self.paddle.rect.right - 5, self.paddle.rect.top))
+
+        # 2. Lasers
+        level = self.level
+        lasers = self.lasers
+        i = 0
+        while i < len(lasers):
+            laser = lasers[i]
+            start = laser.rect.copy() if self.swept_collisions else None
+            laser.update(dt)
+            if laser.active:
+                if self.swept_collisions:
+                    # Nearest brick anywhere along the path travelled this tick
+                    path = laser.rect.union(start)
+                    hits = [b for b in self.bricks.query(path) if path.colliderect(b.rect)]
+                    brick = max(hits, key=lambda b: b.rect.bottom) if hits else None
+                else:
+                    brick = self.bricks.hit(laser.rect)
+                if brick is None:
+                    i += 1
+                    continue
+                self.break_brick(brick)
+                if self.level != level:
+                    break
+            swap_remove(lasers, i)
+            self.laser_pool.release(laser)
+
+        # 3. Balls
+        level = self.level
+        if self.swarm:
+            self.update_swarm(dt)
+            if self.level != level:
+                return
+        else:
+            balls = self.balls
+            kept = 0
+            for i in range(len(balls)):
+                ball = balls[i]
+                if self.swept_collisions and not ball.stuck_to_paddle:
+                    self.move_ball_swept(ball, dt)
+                else:
+                    if ball.update(self.paddle, dt):
+                        self.play_sound('wall_hit')
+
+                    # Paddle
+                    if ball.rect.colliderect(self.paddle.rect) and ball.dy > 0:
+                        self.bounce_off_paddle(ball, ball.rect.centerx)
+
+                    # Brick
+                    brick = self.bricks.hit(ball.rect)
+                    if brick is not None:
+                        self.break_brick(brick)
+                        if self.level == level:
+                            b_rect = brick.rect
+                            if (ball.rect.centerx < b_rect.left or ball.rect.centerx > b_rect.right):
+                                ball.dx *= -1
+                            else:
+                                ball.dy *= -1
+                if self.level != level:
+                    return  # Level cleared mid-loop: the remaining balls were replaced
+                if ball.active:
+                    balls[kept] = ball
+                    kept += 1
+                else:
+                    self.ball_pool.release(ball)
+            del balls[kept:]
+
+        # 4. Powerups
+        powerups = self.powerups
+        i = 0
+        while i < len(powerups):
+            p = powerups[i]
+            start = p.rect.copy() if self.swept_collisions else None
+            p.update(dt)
+            caught = p.rect.union(start) if self.swept_collisions else p.rect
+            if caught.colliderect(self.paddle.rect):
+                self.play_sound('powerup')
+                self.powerups_collected += 1
+                self.apply_powerup(p.type)
+            elif p.active:
+                i += 1
+                continue
+            swap_remove(powerups, i)
+            self.powerup_pool.release(p)
+
+    def update_swarm(self, dt):
+        # Ball rules for every ball of the swarm at once. Paddle and brick
+        # contacts are found in batch, then brick breaks run in ball order, so
+        # combos, powerups and level clears match the per-ball loop.
+        swarm = self.balls
+        if swarm.move(self.paddle, dt):
+            self.play_sound('wall_hit')
+        n = swarm.count
+        x, y, dx, dy = swarm.x[:n], swarm.y[:n], swarm.dx[:n], swarm.dy[:n]
+        size = BALL_RADIUS * 2
+
+        # Paddle (bounce_off_paddle)
+        pr = self.paddle.rect
+        bounced = (x < pr.right) & (pr.left < x + size) & (y < pr.bottom) & (pr.top < y + size) & (dy > 0)
+        if bounced.any():
+            self.play_sound('paddle_hit')
+            angle = (pr.centerx - (x[bounced] + BALL_RADIUS)) / (self.paddle.width / 2) * (5 * math.pi / 12)
+            speed = swarm.speed[:n][bounced]
+            dx[bounced] = speed * -np.sin(angle)
+            dy[bounced] = -speed * np.cos(angle)
+
+        # Bricks: every ball's first cell in one pass. If two balls reach the
+        # same brick, the balls from the first such one on are re-tested one by
+        # one against the shrinking grid, as the sequential loop would.
+        r0, y0, occ = brick_occupancy(self.bricks)
+        hit, hit_r, hit_c = brick_cells_hit(x, y, y0, occ)
+        hitters = np.nonzero(hit)[0]
+        rows, cols = hit_r[hitters], hit_c[hitters]
+        breaks = list(zip(hitters.tolist(), rows.tolist(), cols.tolist()))
+        _, first = np.unique(rows * occ.shape[1] + cols, return_index=True)
+        if len(first) < len(breaks):
+            repeat = np.ones(len(breaks), bool)
+            repeat[first] = False
+            k = int(np.argmax(repeat))
+            for _, r, c in breaks[:k]:
+                occ[r, c] = False
+            resolved = breaks[:k]
+            for b in hitters[k:].tolist():
+                cell = first_brick_cell(int(x[b]), int(y[b]), y0, occ)
+                if cell is not None:
+                    occ[cell] = False
+                    resolved.append((b, *cell))
+            breaks = resolved
+
+        level = self.level
+        last = -1
+        for b, r, c in breaks:
+            if bounced[last + 1:b + 1].any():
+                self.combo = 1  # Paddle bounce since the previous break
+            brick = self.bricks.get(r0 + r, c)
+            self.break_brick(brick)
+            if self.level != level:
+                return  # Level cleared: the swarm was reset
+            center = x[b] + BALL_RADIUS
+            if center < brick.rect.left or center > brick.rect.right:
+                dx[b] *= -1
+            else:
+                dy[b] *= -1
+            last = b
+        if bounced[last + 1:].any():
+            self.combo = 1
+        swarm.compact()
+
+    def bounce_off_paddle(self, ball, ball_x):
+        self.play_sound('paddle_hit')
+        self.combo = 1 # RESET COMBO
+        
+        relative_intersect_x = (self.paddle.rect.centerx - ball_x)
+        normalized_intersect = relative_intersect_x / (self.paddle.width / 2)
+        bounce_angle = normalized_intersect * (5 * math.pi / 12)
+        
+        speed = ball.speed
+        ball.dx = speed * -math.sin(bounce_angle)
+        ball.dy = -speed * math.cos(bounce_angle)
+
+    def break_brick(self, brick):
+        self.bricks.remove(brick)
+        self.spawn_particles(brick.rect.centerx, brick.rect.centery, brick.color)
+        
+        self.score += (10 * self.combo)
+        self.combo += 1 # INCREASE COMBO
+        
+        self.play_sound('brick_hit')
+        self.handle_brick_break(brick)
+
+    def move_ball_swept(self, ball, dt):
+        # Continuous circle-vs-AABB collision against walls, paddle and bricks.
+        # Every contact inside the tick is resolved in time order with an exact
+        # reflection normal, so large timesteps never tunnel.
+        ball.update_trail()
+        ball.prev_x, ball.prev_y = ball.rect.topleft
+        ball.normalize_velocity()
+        if ball.pos is None:
+            ball.pos = (float(ball.rect.centerx), float(ball.rect.centery))
+        x, y = ball.pos
+        r = BALL_RADIUS
+        level = self.level
+        remaining = dt
+
+        for _ in range(MAX_SWEEP_CONTACTS):
+            vx, vy = ball.dx, ball.dy
+            end_x, end_y = x + vx * remaining, y + vy * remaining
+            best_t, best = remaining, None
+
+            # Walls
+            if vx < 0 and end_x <= r:
+                best_t, best = max((r - x) / vx, 0.0), ('wall', None, 1.0, 0.0)
+            elif vx > 0 and end_x >= SCREEN_WIDTH - r:
+                best_t, best = max((SCREEN_WIDTH - r - x) / vx, 0.0), ('wall', None, -1.0, 0.0)
+            if vy < 0 and end_y <= r:
+                t = max((r - y) / vy, 0.0)
+                if t < best_t or best is None:
+                    best_t, best = t, ('wall', None, 0.0, 1.0)
+
+            # Paddle (only from above, like the discrete check)
+            if vy > 0:
+                hit = sweep_circle_rect(x, y, vx, vy, r, self.paddle.rect, best_t)
+                if hit is not None and (best is None or hit[0] < best_t):
+                    best_t, best = hit[0], ('paddle', None, hit[1], hit[2])
+
+            # Bricks in the cells the swept circle covers
+            area = pygame.Rect(int(min(x, end_x) - r) - 1, int(min(y, end_y) - r) - 1,
+                               int(abs(end_x - x) + 2 * r) + 3, int(abs(end_y - y) + 2 * r) + 3)
+            for brick in self.bricks.query(area):
+                hit = sweep_circle_rect(x, y, vx, vy, r, brick.rect, best_t)
+                if hit is not None and (best is None or hit[0] < best_t):
+                    best_t, best = hit[0], ('brick', brick, hit[1], hit[2])
+
+            if best is None:
+                x, y = end_x, end_y
+                break
+
+            kind, brick, nx, ny = best
+            x += vx * best_t
+            y += vy * best_t
+            remaining -= best_t
+            if kind == 'paddle':
+                self.bounce_off_paddle(ball, x)
+            else:
+                dot = vx * nx + vy * ny
+                ball.dx = vx - 2 * dot * nx
+                ball.dy = vy - 2 * dot * ny
+                if kind == 'wall':
+                    self.play_sound('wall_hit')
+                else:
+                    self.break_brick(brick)
+                    if self.level != level:
+                        return  # Level cleared: this ball no longer exists
+        else:
+            # Contact budget used up: finish the tick without further collisions
+            x += ball.dx * remaining
+            y += ball.dy * remaining
+
+        ball.pos = (x, y)
+        ball.rect.center = (x, y)
+        if ball.rect.top > SCREEN_HEIGHT:
+            ball.active = False
+
+    def handle_brick_break(self, brick):
+        self.bricks_broken += 1
+        self.brick_version += 1
+        if self.frame_events is not None:
+            self.frame_events.broken.append(brick.rect)
+        elif self.brick_layer is not None:
+            self.erase_brick(brick.rect)
+        if brick.has_powerup:
+            self.powerups.append(self.powerup_pool.acquire(brick.rect.centerx, brick.rect.centery, self.rng))
+        if len(self.bricks) == 0 and not self.endless:
+            self.next_level()
+
+    def apply_powerup(self, p_type):
+        if p_type == PowerType.MULTIBALL and self.swarm:
+            # Massive multiball: every ball splits in three, up to MAX_BALLS
+            swarm = self.balls
+            for i in range(swarm.count):
+                for _ in range(2):
+                    j = swarm.spawn(int(swarm.x[i]) + BALL_RADIUS, int(swarm.y[i]) + BALL_RADIUS, self.ball_speed_mult, self.rng)
+                    if j is None:
+                        return
+                    swarm.stuck[j] = False
+                    swarm.dx[j] = self.rng.choice([-3, 3])
+                    swarm.dy[j] = -4
+        elif p_type == PowerType.MULTIBALL:
+            if len(self.balls) > 0:
+                base = self.balls[0]  # The oldest ball in play
+                for _ in range(2):
+                    b = self.ball_pool.acquire(base.rect.centerx, base.rect.centery, self.ball_speed_mult, self.rng)
+                    b.stuck_to_paddle = False
+                    b.dx = self.rng.choice([-3, 3])
+                    b.dy = -4
+                    self.balls.append(b)
+        elif p_type == PowerType.SLOW_BALL:
+            if self.swarm:
+                self.balls.speed[:self.balls.count] *= 0.7
+            else:
+                for b in self.balls:
+                    b.speed *= 0.7
+        elif p_type == PowerType.EXTRA_LIFE:
+            self.lives += 1
+        else:
+            self.paddle.activate_powerup(p_type)
+
+    def next_level(self):
+        self.level += 1
+        self.ball_speed_mult += 0.1
+        self.reset_level(new_pattern=True)
+
+    def draw_ui(self, hud=None):
+        return self.hud_bar.draw(self.screen, hud or self.hud())
+
+    def draw_balls(self, surface):
+        if self.swarm:
+            area = self.balls.draw(surface, self.alpha)
+            return [] if area is None else [area]
+        return [b.draw(surface, self.alpha) for b in self.balls]
+
+    def erase_brick(self, rect):
+        # Patch the cached layer; the rect is restored on screen next present.
+        # At fractional scales the rounded-out rect can take a pixel off a
+        # neighbour, so bricks it touches are redrawn clipped to it.
+        area = view_rect(rect)
+        layer = self.brick_layer
+        layer.fill(BLACK, area)
+        if SPRITES.scale != 1.0:
+            layer.set_clip(area)
+            for b in self.bricks.query(rect.inflate(4, 4)): b.draw(layer)
+            layer.set_clip(None)
+        self.dirty_rects.append(area)
+
+    def draw_playing_dirty(self):
+        # Bricks live on a cached layer that doubles as the background; only the
+        # rects covered by moving entities last frame and this frame are
+        # restored and presented.
+        self.pause_frame = None
+        if self.brick_layer is None:
+            self.brick_layer = pygame.Surface(self.screen.get_size()).convert()
+            self.brick_layer.fill(BLACK)
+            for b in self.bricks: b.draw(self.brick_layer)
+            self.full_redraw = True
+
+        if self.full_redraw:
+            self.screen.blit(self.brick_layer, (0, 0))
+        else:
+            for r in self.dirty_rects:
+                self.screen.blit(self.brick_layer, r, r)
+
+        prof = self.profiler
+        prof.mark("draw_bricks")
+
+        rects = []
+        particle_rect = self.particles.draw(self.screen)
+        if particle_rect is not None:
+            rects.append(particle_rect)
+        prof.mark("draw_particles")
+        rects.append(self.paddle.draw(self.screen, self.alpha))
+        rects.extend(self.draw_balls(self.screen))
+        for p in self.powerups: rects.append(p.draw(self.screen, self.alpha))
+        for l in self.lasers: rects.append(l.draw(self.screen, self.alpha))
+        prof.mark("draw_entities")
+        rects.extend(self.draw_ui())
+        if self.show_profiler:
+            rects.append(prof.draw_overlay(self.screen))
+        prof.mark("hud")
+
+        if self.full_redraw:
+            self.presenter.present()
+            self.full_redraw = False
+        else:
+            self.presenter.present(self.dirty_rects + rects)
+        self.dirty_rects = rects
+        prof.mark("present")
+
+    # --- THREADED PIPELINE ---
+    # With --threaded, the ticks of frame N+1 run on a SimWorker while the main
+    # thread draws the Snapshot taken after frame N. Between sync_pipeline()
+    # and dispatch() the main thread owns the Game (input, menus, pausing);
+    # while a job runs it reads only the front snapshot and touches only its
+    # own render state: screen, particles, sounds and the brick layer.
+    # Simulation code reaches that state through self.frame_events, so
+    # handle_brick_break and next_level queue their effects instead.
+    def start_pipeline(self):
+        self.snapshots = [Snapshot(), Snapshot()]  # front (drawn), back (written by the job)
+        self.front_current = False
+        self.worker = SimWorker(self.run_job)
+
+    def run_job(self, inputs, snap):
+        # Worker thread
+        snap.begin()
+        self.frame_events = snap
+        ticks = 0
+        try:
+            for i in inputs:
+                ticks += 1
+                if not self.step(i):
+                    break
+        finally:
+            self.frame_events = None
+        snap.capture(self, ticks * self.timestep)
+
+    def sync_pipeline(self):
+        # Wait for the running job; its snapshot becomes the front one
+        if self.worker.wait():
+            self.snapshots.reverse()
+            self.apply_effects(self.snapshots[0])
+
+    def dispatch(self, inputs):
+        # Start simulating the given ticks; the front snapshot stays drawable
+        front, back = self.snapshots
+        if not self.front_current:
+            front.begin()
+            front.capture(self, 0.0)  # State changed outside a job (new game, unpause)
+            self.front_current = True
+        if inputs:
+            self.worker.submit(inputs, back)
+
+    def apply_effects(self, snap):
+        # Main thread: carry out what the job's ticks asked of the renderer
+        if snap.reset:
+            self.particles.clear()
+        if snap.relayout:
+            self.brick_layer = None
+        for name in snap.sounds:
+            self.sound_manager.play(name)
+        for x, y, color in snap.emits:
+            self.particles.emit(x, y, color)
+        if self.brick_layer is not None:
+            for rect in snap.broken:
+                self.erase_brick(rect)
+        if snap.sim_dt:
+            self.particles.update(snap.sim_dt)
+
+    def draw_snapshot(self, snap):
+        # Full redraw from a Snapshot; reads no simulation state
+        self.full_redraw = True
+        self.pause_frame = None
+        prof = self.profiler
+        screen = self.screen
+        alpha = self.alpha
+        s = SPRITES.scale
+        screen.fill(BLACK)
+        screen.blits(((SPRITES.brick(color, w, h), (x * s, y * s)) for x, y, w, h, color in snap.bricks), False)
+        prof.mark("draw_bricks")
+        self.particles.draw(screen)
+        prof.mark("draw_particles")
+
+        x, prev_x, y, w, h, color, laser = snap.paddle
+        screen.blit(SPRITES.paddle(color, w, h, laser), (lerp(prev_x, x, alpha) * s, (y - 5) * s))
+        snap.balls.draw(screen, alpha)
+        for x, y, prev_y, p_type, color in snap.powerups:
+            screen.blit(SPRITES.powerup(p_type, color), (x * s, lerp(prev_y, y, alpha) * s))
+        for x, y, prev_y, w, h in snap.lasers:
+            screen.blit(SPRITES.laser(w, h), (x * s, lerp(prev_y, y, alpha) * s))
+        prof.mark("draw_entities")
+
+        self.draw_ui(snap.hud)
+        if self.show_profiler:
+            prof.draw_overlay(screen)
+        prof.mark("hud")
+
+    def run(self, max_fps=FPS, max_catch_up=MAX_CATCH_UP, idle_fps=IDLE_FPS):
+        # Fixed-timestep loop: real time accumulates and the simulation runs
+        # whole ticks of timestep / FPS seconds, however fast frames render.
+        # After a stall at most max_catch_up seconds are simulated in one frame
+        # and the rest is dropped, so the game slows down instead of spiralling.
+        # Frames are drawn self.alpha of the way from the previous tick to the
+        # latest one. max_fps = 0 renders uncapped. Static screens are paced
+        # by self.pacer: redrawn on change and idle_fps times a second.
+        self.pacer = FramePacer(max_fps, idle_fps)
+        tick_seconds = self.timestep / FPS
+        max_ticks = max(1, int(max_catch_up / tick_seconds))
+        accumulator = 0.0
+        last = time.perf_counter()
+        running = True
+        while running:
+            now = time.perf_counter()
+            if self.state == "PLAYING":
+                accumulator += now - last  # Time spent on static screens is never simulated
+            last = now
+            state = self.state  # The frame's CPU time is charged to the state it started in
+            prof = self.profiler
+            prof.begin_frame()
+            if self.worker is not None:
+                self.sync_pipeline()
+                prof.mark("sync")
+            running = self.handle_input()
+            prof.mark("input")
+            pipelined = False
+            if self.state == "PLAYING":
+                ticks = min(int(accumulator / tick_seconds), max_ticks)
+                accumulator -= ticks * tick_seconds
+                if ticks == max_ticks:
+                    accumulator = min(accumulator, tick_seconds)
+                self.alpha = min(accumulator / tick_seconds, 1.0)
+                rewinding = self.rewind is not None and pygame.key.get_pressed()[pygame.K_r]
+                # Launch presses are consumed by the first tick that runs
+                inputs = [] if rewinding else [self.read_inputs() for _ in range(ticks)]
+                if rewinding:
+                    # Play runs backwards at the same speed, on this thread
+                    self.rewind_by(ticks)
+                    prof.mark("rewind")
+                elif self.worker is not None:
+                    self.dispatch(inputs)
+                    pipelined = True
+                else:
+                    for i in inputs:
+                        if not self.step(i):
+                            break
+                    if self.state != "PLAYING":
+                        self.alpha = 1.0
+                    prof.mark("collisions")
+                    if ticks:
+                        self.particles.update(ticks * self.timestep)
+                    prof.mark("particles")
+            else:
+                accumulator = 0.0  # Paused time is never simulated
+                self.front_current = False
+
+            animated = self.state == "PLAYING"
+            draw = self.pacer.should_draw(self.state, animated)
+            if pipelined:
+                front = self.snapshots[0]
+                self.draw_snapshot(front)
+                self.presenter.present()
+                prof.mark("present")
+                counts = dict(front.counts, particles=len(self.particles))
+            else:
+                if not draw:
+                    pass  # An unchanged static screen: nothing to draw or present
+                elif self.state == "PLAYING" and self.dirty_rendering and not self.endless:
+                    self.draw_playing_dirty()
+                else:
+                    self.draw_frame()
+                    self.presenter.present()
+                    prof.mark("present")
+                counts = self.entity_counts()
+            self.sound_manager.flush()
+            prof.mark("audio")
+            prof.end_frame(counts)
+            self.pacer.end_frame(state, animated, self.clock)
+
+        if self.worker is not None:
+            self.sync_pipeline()
+            self.worker.close()
+        if self.state in ("PLAYING", "PAUSED"):
+            self.save_recording()
+        if self.scores is not None:
+            self.scores.close()
+        if self.profiler.enabled:
+            print(self.pacer.report())
+        pygame.quit()
+
+    def blit_centered(self, text, y):
+        # Horizontally centred on the canvas, y in logical coordinates
+        return self.screen.blit(text, (self.screen.get_width()//2 - text.get_width()//2, y * SPRITES.scale))
+
+    def draw_frame(self):
+        # Full redraw of the current state; the dirty renderer repaints everything after one
+        self.full_redraw = True
+        if self.state != "PAUSED":
+            self.pause_frame = None
+        self.screen.fill(BLACK)
+        if self.state == "MENU":
+            title = TEXTS.render(self.font_large, "NEON BREAKOUT", CYAN)
+            sub = TEXTS.render(self.font_small, "Press SPACE to Start", WHITE)
+            hi = TEXTS.render(self.font_small, f"High Score: {self.highscore}", YELLOW)
+            
+            self.blit_centered(title, 200)
+            self.blit_centered(sub, 300)
+            self.blit_centered(hi, 350)
+            for i, row in enumerate(self.leaderboard):
+                line = TEXTS.render(self.font_small, f"{i + 1}. {row['player']}  {row['score']}", GREY)
+                self.blit_centered(line, 400 + i * 32)
+            
+            fx = self.fx_rng
+            if fx.random() < 0.1:
+                self.spawn_particles(fx.randint(0, SCREEN_WIDTH), fx.randint(0, SCREEN_HEIGHT), fx.choice(COLORS_LIST))
+            
+        elif self.state == "PLAYING":
+            # Same layering as draw_playing_dirty, where bricks are the background
+            prof = self.profiler
+            for b in self.bricks.visible(): b.draw(self.screen)
+            prof.mark("draw_bricks")
+            self.particles.draw(self.screen)
+            prof.mark("draw_particles")
+
+            self.paddle.draw(self.screen, self.alpha)
+            self.draw_balls(self.screen)
+            for p in self.powerups: p.draw(self.screen, self.alpha)
+            for l in self.lasers: l.draw(self.screen, self.alpha)
+            prof.mark("draw_entities")
+            
+            self.draw_ui()
+            if self.show_profiler:
+                prof.draw_overlay(self.screen)
+            prof.mark("hud")
+
+        elif self.state == "PAUSED":
+            # Nothing moves while paused: the scene and overlay are composited
+            # once and every later paused frame is a single blit
+            if self.pause_frame is None:
+                for b in self.bricks.visible(): b.draw(self.screen)
+                self.paddle.draw(self.screen, self.alpha)
+                self.draw_balls(self.screen)
+
+                overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+                overlay.fill((0, 0, 0, 150))
+                self.screen.blit(overlay, (0,0))
+
+                pause_text = TEXTS.render(self.font_large, "PAUSED", WHITE)
+                sub_text = TEXTS.render(self.font_small, "Press P to Resume", GREY)
+                self.blit_centered(pause_text, SCREEN_HEIGHT//2 - 20)
+                self.blit_centered(sub_text, SCREEN_HEIGHT//2 + 40)
+                self.pause_frame = self.screen.copy()
+            else:
+                self.screen.blit(self.pause_frame, (0, 0))
+
+        elif self.state == "GAMEOVER":
+            t1 = TEXTS.render(self.font_large, "GAME OVER", RED)
+            t2 = TEXTS.render(self.font_small, f"Final Score: {self.score}", WHITE)
+            t3 = TEXTS.render(self.font_small, "Press SPACE for Menu", GREY)
+            
+            self.blit_centered(t1, 200)
+            self.blit_centered(t2, 280)
+            self.blit_centered(t3, 330)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--dirty-rects", action="store_true", help="present only changed regions (toggle in game with F9)")
+    parser.add_argument("--seed", type=int, help="play every game with this seed")
+    parser.add_argument("--record", metavar="DIR", help="save an input replay of each game to DIR")
+    parser.add_argument("--swept", action="store_true", help="continuous (swept) ball collisions")
+    parser.add_argument("--sim-rate", type=float, default=SIM_RATE, help="simulation ticks per second (below 60 implies --swept)")
+    parser.add_argument("--max-fps", type=int, default=FPS, help="render frame cap, 0 for uncapped")
+    parser.add_argument("--threaded", action="store_true", help="simulate on a worker thread while the previous frame renders")
+    parser.add_argument("--idle-fps", type=float, default=IDLE_FPS, help="redraw rate of the menu, pause and game-over screens (0 = only on input)")
+    parser.add_argument("--max-catch-up", type=float, default=MAX_CATCH_UP, help="most seconds simulated in one frame after a stall")
+    parser.add_argument("--profile", action="store_true", help="show the per-phase profiler overlay (F3 toggles, F4 exports a trace)")
+    parser.add_argument("--trace-seconds", type=int, default=10, help="seconds of frames kept for trace export")
+    parser.add_argument("--levels", default=LEVEL_PACK_FILE, help="level pack to play (see level_pack.py)")
+    parser.add_argument("--endless", action="store_true", help="endless scrolling brick field")
+    parser.add_argument("--swarm", action="store_true", help="massive multiball: every MULTIBALL splits each ball in three")
+    parser.add_argument("--player", default="player", help="name stored with your scores on the leaderboard")
+    parser.add_argument("--scores", default=SCORES_FILE, help="leaderboard database (see scores.py)")
+    parser.add_argument("--rewind-seconds", type=float, default=REWIND_SECONDS, help="seconds of play kept for rewinding (hold R), 0 to disable")
+    parser.add_argument("--quality", choices=QUALITY, default=DEFAULT_QUALITY, help="internal render resolution: low (50%%), medium (75%%), high (100%%) or native (window size)")
+    parser.add_argument("--render-scale", type=float, help="internal resolution as a fraction of 800x600, overrides --quality's")
+    parser.add_argument("--window", type=lambda v: tuple(map(int, v.split("x"))), metavar="WxH", help="window size; the picture is scaled to fit")
+    parser.add_argument("--scaled", action="store_true", help="let SDL scale the render target to the window (pygame.SCALED)")
+    args = parser.parse_args()
+    if args.swarm and args.sim_rate < FPS:
+        parser.error(f"--swarm needs --sim-rate {FPS} or more (swarm balls have no swept collisions)")
+    Game(dirty_rendering=args.dirty_rects, seed=args.seed, record_dir=args.record,
+         swept=args.swept or args.sim_rate < FPS, timestep=FPS / args.sim_rate,
+         profile=args.profile, trace_seconds=args.trace_seconds, level_pack=args.levels,
+         endless=args.endless, swarm=args.swarm, threaded=args.threaded,
+         scores_file=args.scores, player=args.player, rewind_seconds=args.rewind_seconds,
+         quality=args.quality, render_scale=args.render_scale, window_size=args.window,
+         sdl_scaled=args.scaled).run(args.max_fps, args.max_catch_up, args.idle_fps)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import time
+
+import pygame
+
+IDLE_FPS = 2          # Redraws per second of a static screen nobody touches
+ACTIVE_SECONDS = 0.5  # Full rate after any input, so transitions stay smooth
+
+# Decides when to draw and how long to sleep. Animated states run at the
+# render cap. Static screens (menu, pause, game over) redraw when the state
+# changes, for ACTIVE_SECONDS after input, and IDLE_FPS times a second
+# otherwise, blocking in pygame.event.wait in between so an idle instance
+# costs next to no CPU yet still reacts to a key at once. Process CPU time
+# and wall time are accounted per state.
+class FramePacer:
+    def __init__(self, max_fps, idle_fps=IDLE_FPS, active_seconds=ACTIVE_SECONDS):
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.active_seconds = active_seconds
+        self.pending = []  # Event that woke an idle wait, handled next frame
+        self.active_until = 0.0
+        self.next_refresh = 0.0
+        self.drawn_state = None
+        self.stats = {}  # state -> [cpu seconds, wall seconds, frames, frames drawn]
+        self.last_cpu = time.process_time()
+        self.last_wall = time.perf_counter()
+
+    def events(self):
+        events = self.pending + pygame.event.get()
+        self.pending = []
+        if events:
+            self.active_until = time.perf_counter() + self.active_seconds
+        return events
+
+    def should_draw(self, state, animated):
+        now = time.perf_counter()
+        if animated or state != self.drawn_state or now < self.active_until or now >= self.next_refresh:
+            self.drawn_state = state
+            if self.idle_fps > 0:
+                self.next_refresh = now + 1.0 / self.idle_fps
+            else:
+                self.next_refresh = float('inf')
+            self.stats.setdefault(state, [0.0, 0.0, 0, 0])[3] += 1
+            return True
+        return False
+
+    def end_frame(self, state, animated, clock):
+        # Charge the frame (including the sleep after it) to state, then sleep
+        if animated or time.perf_counter() < self.active_until:
+            clock.tick(self.max_fps)
+        else:
+            timeout = self.next_refresh - time.perf_counter()
+            if timeout > 0:
+                # A timeout of 0 waits for the next event, however long
+                event = pygame.event.wait(int(timeout * 1000) + 1 if self.idle_fps > 0 else 0)
+                if event.type != pygame.NOEVENT:
+                    self.pending.append(event)
+            clock.tick()
+        cpu, wall = time.process_time(), time.perf_counter()
+        entry = self.stats.setdefault(state, [0.0, 0.0, 0, 0])
+        entry[0] += cpu - self.last_cpu
+        entry[1] += wall - self.last_wall
+        entry[2] += 1
+        self.last_cpu, self.last_wall = cpu, wall
+
+    def report(self):
+        lines = [f"{'state':<10}{'wall s':>9}{'cpu s':>9}{'cpu %':>8}{'frames':>8}{'drawn':>8}"]
+        for state, (cpu, wall, frames, drawn) in self.stats.items():
+            share = 100 * cpu / wall if wall > 0 else 0.0
+            lines.append(f"{state:<10}{wall:>9.2f}{cpu:>9.2f}{share:>8.1f}{frames:>8}{drawn:>8}")
+        return "\n".join(lines)
@@ -0,0 +1,57 @@
+import threading
+
+# Runs simulation jobs on a worker thread while the main thread renders.
+# Ownership is handed back and forth: after submit() the worker owns the game
+# state until wait() returns, and the main thread may only read what earlier
+# jobs published (snapshots). At most one job is in flight.
+class SimWorker:
+    def __init__(self, job):
+        self.job = job
+        self.cond = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.loop, name="simulation", daemon=True)
+        self.thread.start()
+
+    def submit(self, *args):
+        with self.cond:
+            if self.busy:
+                raise RuntimeError("a simulation job is already running")
+            self.pending = args
+            self.busy = True
+            self.cond.notify_all()
+
+    def wait(self):
+        # Block until the in-flight job (if any) is done; True if there was one
+        with self.cond:
+            had_job = self.busy
+            while self.busy:
+                self.cond.wait()
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+        return had_job
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+
+    def loop(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closed:
+                    self.cond.wait()
+                if self.pending is None:
+                    return
+                args, self.pending = self.pending, None
+            try:
+                self.job(*args)
+            except BaseException as e:
+                self.error = e
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
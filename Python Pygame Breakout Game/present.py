@@ -0,0 +1,161 @@
+import math
+import time
+
+import pygame
+
+# Render quality presets: (internal resolution as a fraction of the logical
+# playfield, None = as large as the window's viewport; smooth filtering in the
+# scale step to the window). Lower resolutions fill fewer pixels per sprite
+# and per clear and look softer or blockier when blown up.
+QUALITY = {
+    "low": (0.5, False),
+    "medium": (0.75, True),
+    "high": (1.0, True),
+    "native": (None, True),
+}
+DEFAULT_QUALITY = "high"
+
+# Owns the window and the render target. The game draws into self.canvas, an
+# off-screen surface of scale times the logical size, and present() puts it
+# on screen in one scale step into the viewport: the largest area of the
+# logical aspect ratio that fits the window, letterboxed in black. A big or
+# fullscreen (desktop resolution) window then costs one scaled copy a frame,
+# not full-resolution fill for every sprite. When the canvas is exactly the
+# window size it *is* the window surface and presenting is a plain flip.
+# With sdl_scaled the window is opened with pygame.SCALED instead: SDL's
+# renderer stretches the canvas, on the GPU where it has one, and maps mouse
+# coordinates itself.
+class Presenter:
+    def __init__(self, logical_size, quality=DEFAULT_QUALITY, render_scale=None,
+                 window_size=None, sdl_scaled=False):
+        self.logical_size = logical_size
+        self.render_scale, self.smooth = QUALITY[quality]
+        if render_scale:
+            self.render_scale = render_scale
+            if render_scale < 1:
+                self.smooth = False  # Asked for fewer pixels: keep upscaling cheap and blocky
+        self.window_size = window_size or logical_size
+        self.sdl_scaled = sdl_scaled
+        self.fullscreen = False
+        self.window = self.canvas = self.target = None
+        self.scale = 1.0
+        self.filtered = False  # smoothscale rather than nearest pixels
+        self.copy = False  # Canvas and viewport are the same size
+        self.viewport = pygame.Rect(0, 0, *logical_size)
+        self.present_seconds = 0.0  # Time spent in the last present()
+        self.open()
+
+    def open(self):
+        # (Re)create the window, then lay out the viewport and canvas
+        if self.sdl_scaled:
+            lw, lh = self.logical_size
+            self.scale = self.render_scale or 1.0
+            size = (max(1, round(lw * self.scale)), max(1, round(lh * self.scale)))
+            flags = pygame.SCALED | (pygame.FULLSCREEN if self.fullscreen else pygame.RESIZABLE)
+            try:
+                self.window = self.canvas = pygame.display.set_mode(size, flags)
+            except pygame.error as e:
+                print(f"SCALED display unavailable ({e}), scaling in software")
+                self.sdl_scaled = False
+            else:
+                self.viewport = self.canvas.get_rect()
+                self.target = None
+                return
+        if self.fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)  # Desktop resolution
+        else:
+            self.window = pygame.display.set_mode(self.window_size, pygame.RESIZABLE)
+        self.layout()
+
+    def layout(self):
+        lw, lh = self.logical_size
+        ww, wh = self.window.get_size()
+        fit = min(ww / lw, wh / lh)
+        vw, vh = round(lw * fit), round(lh * fit)
+        self.viewport = pygame.Rect((ww - vw) // 2, (wh - vh) // 2, vw, vh)
+        self.scale = self.render_scale or fit
+        size = (max(1, round(lw * self.scale)), max(1, round(lh * self.scale)))
+        if size == (ww, wh):
+            self.canvas = self.window  # Nothing to scale: draw straight into the window
+            self.target = None
+        else:
+            self.canvas = pygame.Surface(size).convert()
+            self.target = self.window.subsurface(self.viewport)
+            self.window.fill((0, 0, 0))
+        # A whole-number ratio is exact with nearest pixels, which is sharper
+        # and several times cheaper than smoothscale; 1:1 (a letterboxed
+        # window at native quality) is a plain copy
+        ratio = vw / size[0]
+        self.filtered = self.smooth and not (ratio == int(ratio) and vh == size[1] * ratio)
+        self.copy = size == (vw, vh)
+
+    def toggle_fullscreen(self):
+        self.fullscreen = not self.fullscreen
+        self.open()
+
+    def resize(self, size):
+        # The user resized the window (pygame has already resized its surface)
+        if self.fullscreen or self.sdl_scaled:
+            return
+        self.window_size = size
+        self.window = pygame.display.get_surface()
+        self.layout()
+
+    def present(self, rects=None):
+        # Show the canvas. rects (canvas coordinates) limit the update to what
+        # changed; the canvas is still scaled whole, as scaling rects one by
+        # one would leave seams where their rounded edges meet
+        t0 = time.perf_counter()
+        if self.target is not None:
+            if self.copy:
+                self.target.blit(self.canvas, (0, 0))
+            else:
+                scale = pygame.transform.smoothscale if self.filtered else pygame.transform.scale
+                scale(self.canvas, self.viewport.size, self.target)
+            if rects is not None:
+                rects = [self.to_window(r) for r in rects]
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.present_seconds = time.perf_counter() - t0
+
+    def to_window(self, rect):
+        # Canvas rect -> window rect, rounded outwards
+        sx = self.viewport.width / self.canvas.get_width()
+        sy = self.viewport.height / self.canvas.get_height()
+        x0, y0 = math.floor(rect.left * sx), math.floor(rect.top * sy)
+        x1, y1 = math.ceil(rect.right * sx), math.ceil(rect.bottom * sy)
+        return pygame.Rect(self.viewport.x + x0, self.viewport.y + y0, x1 - x0, y1 - y0)
+
+    def to_logical(self, pos):
+        # Window pixel -> logical playfield coordinates (may fall outside it
+        # on the letterbox bars). Under SCALED, SDL already reports canvas pixels
+        if self.sdl_scaled:
+            return math.floor(pos[0] / self.scale), math.floor(pos[1] / self.scale)
+        lw, lh = self.logical_size
+        return (math.floor((pos[0] - self.viewport.x) * lw / self.viewport.width),
+                math.floor((pos[1] - self.viewport.y) * lh / self.viewport.height))
+
+    def map_event(self, event):
+        # Mouse events with positions in logical coordinates, so handlers
+        # never see the window size
+        if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            event.pos = self.to_logical(event.pos)
+        return event
+
+    def stats(self):
+        cw, ch = self.canvas.get_size()
+        vw, vh = self.viewport.size
+        return {
+            "canvas": [cw, ch],
+            "window": list(self.window.get_size()),
+            "scale": round(self.scale, 4),
+            "filtered": self.filtered,
+            "copy": self.copy,
+            "sdl_scaled": self.sdl_scaled,
+            "canvas_pixels": cw * ch,
+            "viewport_pixels": vw * vh,
+            # Fill saved per full-screen pass versus drawing at the viewport size
+            "fill_saving": round(1 - cw * ch / (vw * vh), 4),
+        }
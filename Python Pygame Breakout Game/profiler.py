@@ -0,0 +1,113 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+# Per-phase frame instrumentation. Game.run calls begin_frame(), then mark(phase)
+# after each phase, then end_frame(counts). NullProfiler makes all three no-ops,
+# so the hooks stay in the loop at near-zero cost when profiling is off.
+OVERLAY_REFRESH = 15  # frames between overlay re-renders
+ROLLING_FRAMES = 60
+
+class NullProfiler:
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self, counts):
+        pass
+
+class FrameProfiler:
+    enabled = True
+
+    def __init__(self, trace_seconds=10):
+        self.origin = time.perf_counter()
+        # (start, [(phase, start, end)], counts) for the frames of the last
+        # trace_seconds, trimmed by time as the frame rate is not fixed
+        self.trace_seconds = trace_seconds
+        self.frames = deque()
+        self.phases = []
+        self.frame_start = self.last = 0.0
+        self.font = None
+        self.panel = None
+        self.frames_since_refresh = OVERLAY_REFRESH
+
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, self.last, now))
+        self.last = now
+
+    def end_frame(self, counts):
+        # counts: entity name -> live count, shown in the overlay and trace
+        self.frames.append((self.frame_start, self.phases, counts))
+        oldest = self.frame_start - self.trace_seconds
+        while self.frames[0][0] < oldest:
+            self.frames.popleft()
+
+    def rolling(self):
+        # Mean and max ms per phase over the last ROLLING_FRAMES frames
+        recent = list(self.frames)[-ROLLING_FRAMES:]
+        stats = {}
+        for _, phases, _ in recent:
+            for phase, start, end in phases:
+                ms = (end - start) * 1000
+                total, peak, n = stats.get(phase, (0.0, 0.0, 0))
+                stats[phase] = (total + ms, max(peak, ms), n + 1)
+        return {phase: (total / n, peak) for phase, (total, peak, n) in stats.items()}
+
+    def draw_overlay(self, surface, pos=(10, 50)):
+        self.frames_since_refresh += 1
+        if self.panel is None or self.frames_since_refresh >= OVERLAY_REFRESH:
+            self.panel = self.render_panel()
+            self.frames_since_refresh = 0
+        return surface.blit(self.panel, pos)
+
+    def render_panel(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        lines = [f"{'phase':<16}{'avg':>7}{'max':>7}"]
+        frame_total = 0.0
+        for phase, (avg, peak) in self.rolling().items():
+            frame_total += avg
+            lines.append(f"{phase:<16}{avg:>7.2f}{peak:>7.2f}")
+        lines.append(f"{'frame (work)':<16}{frame_total:>7.2f}")
+        if self.frames:
+            counts = self.frames[-1][2]
+            lines.append(" ".join(f"{k}:{v}" for k, v in counts.items()))
+
+        rendered = [self.font.render(line, True, (220, 220, 220)) for line in lines]
+        width = max(r.get_width() for r in rendered) + 12
+        height = sum(r.get_height() for r in rendered) + 10
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 5
+        for r in rendered:
+            panel.blit(r, (6, y))
+            y += r.get_height()
+        return panel
+
+    def export_chrome_trace(self, path):
+        # Chrome trace event format (chrome://tracing, Perfetto): one complete
+        # event per phase and frame, plus an entity-count counter track.
+        events = []
+        for start, phases, counts in self.frames:
+            ts = (start - self.origin) * 1e6
+            if phases:
+                events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                               "ts": ts, "dur": (phases[-1][2] - start) * 1e6})
+            for phase, p_start, p_end in phases:
+                events.append({"name": phase, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": (p_start - self.origin) * 1e6, "dur": (p_end - p_start) * 1e6})
+            events.append({"name": "entities", "ph": "C", "pid": 1, "ts": ts, "args": counts})
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(self.frames)
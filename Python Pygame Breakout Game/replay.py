@@ -0,0 +1,177 @@
+import argparse
+import struct
+import sys
+import time
+
+# Compact input log: a seed header, then one varint per input change holding
+# (ticks since the previous change << 4 | INPUT_* flags), then a footer with
+# the expected outcome. A held key costs nothing until it changes, and most
+# changes fit in one or two bytes. The header also holds the CRC of the level
+# pack the game was played on (0 for none): levels come from the pack, not
+# the seed, so a replay re-runs only against the same pack.
+MAGIC = b'BKRP'
+VERSION = 3
+HEADER = struct.Struct('<4sBQBdI') # magic, version, seed, physics flags, timestep, level pack CRC
+FLAG_SWEPT = 1
+FLAG_ENDLESS = 2
+FLAG_SWARM = 4
+FOOTER = struct.Struct('<III4s')  # ticks, score, brick-state hash, end marker
+END_MARKER = b'BEND'
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class InputRecorder:
+    def __init__(self, seed, swept=False, timestep=1.0, endless=False, swarm=False, level_pack_crc=0):
+        self.seed = seed
+        self.level_pack_crc = level_pack_crc
+        self.swept = swept
+        self.endless = endless
+        self.swarm = swarm
+        self.timestep = timestep
+        self.body = bytearray()
+        self.tick = 0
+        self.last_tick = 0
+        self.last_inputs = 0
+
+    def record(self, inputs):
+        # Called once per simulation tick with that tick's input flags
+        if inputs != self.last_inputs:
+            write_varint(self.body, (self.tick - self.last_tick) << 4 | inputs)
+            self.last_tick = self.tick
+            self.last_inputs = inputs
+        self.tick += 1
+
+    def truncate(self, tick):
+        # Forget the inputs from tick on (the game was rewound to that tick)
+        body, self.body = self.body, bytearray()
+        self.last_tick = self.last_inputs = 0
+        pos = t = 0
+        while pos < len(body):
+            value, pos = read_varint(body, pos)
+            t += value >> 4
+            if t >= tick:
+                break
+            write_varint(self.body, (t - self.last_tick) << 4 | value & 0xF)
+            self.last_tick, self.last_inputs = t, value & 0xF
+        self.tick = tick
+
+    def to_bytes(self, ticks, score, brick_hash):
+        flags = (FLAG_SWEPT if self.swept else 0) | (FLAG_ENDLESS if self.endless else 0) | (FLAG_SWARM if self.swarm else 0)
+        return HEADER.pack(MAGIC, VERSION, self.seed, flags, self.timestep, self.level_pack_crc) + bytes(self.body) + FOOTER.pack(ticks, score, brick_hash, END_MARKER)
+
+    def save(self, path, ticks, score, brick_hash):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes(ticks, score, brick_hash))
+
+class Replay:
+    def __init__(self, data):
+        if len(data) < HEADER.size + FOOTER.size:
+            raise ValueError("replay is truncated")
+        magic, version = data[:4], data[4]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Breakout replay (or unsupported version)")
+        _, _, self.seed, flags, self.timestep, self.level_pack_crc = HEADER.unpack_from(data, 0)
+        self.swept = bool(flags & FLAG_SWEPT)
+        self.endless = bool(flags & FLAG_ENDLESS)
+        self.swarm = bool(flags & FLAG_SWARM)
+        self.ticks, self.score, self.brick_hash, end = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        if end != END_MARKER:
+            raise ValueError("replay is truncated")
+        self.body = data[HEADER.size:len(data) - FOOTER.size]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def changes(self):
+        # Yields (tick, inputs) for every input change, in order
+        pos = 0
+        tick = 0
+        while pos < len(self.body):
+            value, pos = read_varint(self.body, pos)
+            tick += value >> 4
+            yield tick, value & 0xF
+
+    def simulate(self, until=None, level_pack=None):
+        # Re-run the recorded game headlessly, as fast as possible, stopping
+        # after `until` ticks if given. level_pack is the path of the pack the
+        # game was played on; it is only opened if the replay used one.
+        from main import Game
+        if not self.level_pack_crc:
+            level_pack = None
+        game = Game(headless=True, seed=self.seed, swept=self.swept, timestep=self.timestep, endless=self.endless,
+                    swarm=self.swarm, level_pack=level_pack)
+        crc = game.level_pack.digest() if game.level_pack is not None else 0
+        if crc != self.level_pack_crc:
+            raise ValueError(f"replay was recorded with level pack {self.level_pack_crc:08x}, "
+                             f"{level_pack or 'no pack'} is {crc:08x}")
+        end = self.ticks if until is None else min(until, self.ticks)
+        inputs = 0
+        for next_tick, next_inputs in self.changes():
+            while game.ticks < min(next_tick, end) and game.step(inputs):
+                pass
+            inputs = next_inputs
+        while game.ticks < end and game.step(inputs):
+            pass
+        return game
+
+    def verify(self, level_pack=None):
+        game = self.simulate(level_pack=level_pack)
+        ok = (game.ticks == self.ticks and game.score == self.score
+              and game.brick_state_hash() == self.brick_hash)
+        return ok, game
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate Breakout replays headlessly and verify the outcome")
+    parser.add_argument("replays", nargs="+", help=".bkr files written by main.py --record")
+    parser.add_argument("--levels", default="levels.bkl", help="level pack the replays were recorded on")
+    parser.add_argument("--state-at", type=int, metavar="TICK",
+                        help="instead of verifying, save the game state after TICK ticks to REPLAY.TICK.bks "
+                             "(compare two builds with savestate.py diff)")
+    args = parser.parse_args()
+
+    if args.state_at is not None:
+        import savestate
+        for path in args.replays:
+            game = Replay.load(path).simulate(args.state_at, args.levels)
+            out = f"{path}.{game.ticks}.bks"
+            savestate.save(out, game.capture_state())
+            print(f"{path}: state after {game.ticks} ticks saved to {out}")
+        return
+
+    failed = 0
+    for path in args.replays:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        try:
+            ok, game = replay.verify(args.levels)
+        except ValueError as e:
+            print(f"ERROR {path}: {e}")
+            failed += 1
+            continue
+        elapsed = time.perf_counter() - start
+        status = "OK" if ok else "MISMATCH"
+        print(f"{status} {path}: seed={replay.seed} ticks={game.ticks}/{replay.ticks} "
+              f"score={game.score}/{replay.score} hash={game.brick_state_hash():08x}/{replay.brick_hash:08x} "
+              f"({game.ticks / max(elapsed, 1e-9):,.0f} ticks/sec)")
+        failed += not ok
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
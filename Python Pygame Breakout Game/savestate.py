@@ -0,0 +1,395 @@
+import argparse
+import math
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+import numpy as np
+
+# Binary game-state snapshots. A snapshot is a header plus tagged sections:
+# packed scalars (game counters, paddle, RNG, endless field) and NumPy rows
+# (balls, lasers, powerups, brick cells). A keyframe holds every section; a
+# delta against the previous snapshot holds only the scalar sections whose
+# bytes changed, the entity rows that changed, and the brick cells that were
+# removed or added. Game.capture_state / Game.restore_state convert to and
+# from a live game.
+MAGIC = b'BKSS'
+VERSION = 2
+HEAD = struct.Struct('<4sBBBBQdI')  # magic, version, kind, flags, trail length, seed, timestep, tick
+SECTION = struct.Struct('<BI')      # tag, payload length
+KEYFRAME, DELTA = 0, 1
+FLAG_SWEPT = 1
+FLAG_ENDLESS = 2
+FLAG_SWARM = 4
+
+# lives, score, level, combo, ball speed multiplier, bricks broken,
+# powerups collected, state (index into STATES), swarm trail head
+GAME = struct.Struct('<iIIIdIIBB')
+# x, prev_x, y, width, height, color (index into the game's COLORS_LIST),
+# laser active, big active, powerup timer, shoot timer (seconds), sub-pixel x
+PADDLE = struct.Struct('<hhhhhBBBddd')
+# endless field: scroll, offset, floor row, then one int32 per loaded chunk
+FIELD = struct.Struct('<dqq')
+STATES = ("PLAYING", "PAUSED", "GAMEOVER", "MENU")
+
+T_GAME, T_PADDLE, T_RNG, T_FIELD, T_BALLS, T_LASERS, T_POWERUPS, T_CELLS = range(1, 9)
+T_DELTA = 0x80  # Entity rows or brick cells relative to the previous snapshot
+SCALARS = (('game', T_GAME), ('paddle', T_PADDLE), ('rng', T_RNG), ('field', T_FIELD))
+ENTITIES = (('balls', T_BALLS), ('lasers', T_LASERS), ('powerups', T_POWERUPS))
+
+BALL_FLAG_STUCK, BALL_FLAG_ACTIVE, BALL_FLAG_POS = 1, 2, 4
+# y is exact: fractional when the timestep is not 1
+LASER = np.dtype([('x', '<i2'), ('y', '<f8'), ('prev_y', '<i2')])
+POWERUP = np.dtype([('x', '<i2'), ('y', '<f8'), ('prev_y', '<i2'), ('type', 'u1')])
+# One brick cell; code is color index + 1 with bit 7 set for a powerup brick,
+# 0 in a delta for a removed brick
+CELL = np.dtype([('r', '<i4'), ('c', '<i2'), ('code', 'u1')])
+CELL_POWERUP = 0x80
+
+def ball_dtype(trail_length):
+    # trail holds trail_length (x, y) centers as a ring starting at trail_head;
+    # pos (flag BALL_FLAG_POS) is the exact position of a ball that keeps one:
+    # the center of a Ball, the rect's top-left for swarm rows
+    return np.dtype([('x', '<i2'), ('y', '<i2'), ('prev_x', '<i2'), ('prev_y', '<i2'),
+                     ('dx', '<f8'), ('dy', '<f8'), ('speed', '<f8'), ('pos_x', '<f8'), ('pos_y', '<f8'),
+                     ('offset_x', '<i2'), ('flags', 'u1'), ('trail_len', 'u1'), ('trail_head', 'u1'),
+                     ('trail', '<i2', (trail_length * 2,))])
+
+def pack_rng(state):
+    # random.Random.getstate(): (version, 625 words, gauss_next)
+    version, words, gauss = state
+    return struct.pack('<BBd', version, gauss is not None, gauss or 0.0) + array('I', words).tobytes()
+
+def unpack_rng(data):
+    version, has_gauss, gauss = struct.unpack_from('<BBd', data)
+    return version, tuple(array('I', data[10:])), gauss if has_gauss else None
+
+def changed_rows(prev, rows):
+    # Indices of rows that differ from prev (same length)
+    raw = np.dtype((np.void, rows.dtype.itemsize))
+    return np.nonzero(prev.view(raw) != rows.view(raw))[0].astype('<u4')
+
+class GameState:
+    # Decoded snapshot. cells maps (row, col) to a CELL code. changes lists the
+    # (row, col, code) edits since the previous snapshot (None if unknown),
+    # layout is the brick container it was captured from and rng_mark tells
+    # whether the generator has drawn since; none of these are saved, they
+    # only let the next capture reuse this one.
+    __slots__ = ('seed', 'tick', 'timestep', 'flags', 'trail_length', 'game', 'paddle', 'rng', 'field',
+                 'balls', 'lasers', 'powerups', 'cells', 'changes', 'layout', 'rng_mark')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+def encode(state, prev=None):
+    # Keyframe without prev, otherwise a delta that decode() applies to prev
+    delta = prev is not None
+    out = [HEAD.pack(MAGIC, VERSION, DELTA if delta else KEYFRAME, state.flags, state.trail_length,
+                     state.seed, state.timestep, state.tick)]
+
+    def section(tag, *payload):
+        out.append(SECTION.pack(tag, sum(len(p) for p in payload)))
+        out.extend(payload)
+
+    for name, tag in SCALARS:
+        value = getattr(state, name)
+        if not delta or value != getattr(prev, name):
+            section(tag, value)
+    for name, tag in ENTITIES:
+        rows = getattr(state, name)
+        old = getattr(prev, name) if delta else None
+        if old is None or len(old) != len(rows):
+            section(tag, struct.pack('<I', len(rows)), rows.tobytes())
+            continue
+        idx = changed_rows(old, rows)
+        if len(idx):
+            section(tag | T_DELTA, struct.pack('<II', len(rows), len(idx)), idx.tobytes(), rows[idx].tobytes())
+    if delta and state.changes is not None:
+        if state.changes:
+            section(T_CELLS | T_DELTA, np.array(state.changes, CELL).tobytes())
+    else:
+        n = len(state.cells)
+        cells = np.empty(n, CELL)
+        if n:
+            keys = np.array(list(state.cells), '<i4')
+            cells['r'], cells['c'] = keys[:, 0], keys[:, 1]
+            cells['code'] = np.fromiter(state.cells.values(), 'u1', n)
+        section(T_CELLS, cells.tobytes())
+    return b''.join(out)
+
+def decode(data, prev=None):
+    magic, version, kind, flags, trail_length, seed, timestep, tick = HEAD.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a Breakout state snapshot (or unsupported version)")
+    if kind == DELTA and prev is None:
+        raise ValueError("delta snapshot needs the previous state")
+    state = GameState(seed=seed, tick=tick, timestep=timestep, flags=flags, trail_length=trail_length)
+    if kind == DELTA:
+        for name in ('game', 'paddle', 'rng', 'field', 'balls', 'lasers', 'powerups'):
+            setattr(state, name, getattr(prev, name))
+        state.cells = prev.cells
+    dtypes = {T_BALLS: ball_dtype(trail_length), T_LASERS: LASER, T_POWERUPS: POWERUP}
+    names = dict((tag, name) for name, tag in SCALARS + ENTITIES)
+
+    pos = HEAD.size
+    while pos < len(data):
+        tag, length = SECTION.unpack_from(data, pos)
+        pos += SECTION.size
+        payload = data[pos:pos + length]
+        pos += length
+        base = tag & ~T_DELTA
+        if base == T_CELLS:
+            cells = np.frombuffer(payload, CELL)
+            if tag & T_DELTA:
+                state.cells = dict(state.cells)
+                for r, c, code in cells.tolist():
+                    if code:
+                        state.cells[(r, c)] = code
+                    else:
+                        state.cells.pop((r, c), None)
+                state.changes = [tuple(cell) for cell in cells.tolist()]
+            else:
+                state.cells = {(r, c): code for r, c, code in cells.tolist()}
+        elif base in dtypes:
+            if tag & T_DELTA:
+                count, k = struct.unpack_from('<II', payload)
+                idx = np.frombuffer(payload, '<u4', k, 8)
+                rows = getattr(state, names[base]).copy()
+                rows[idx] = np.frombuffer(payload, dtypes[base], k, 8 + 4 * k)
+            else:
+                (count,) = struct.unpack_from('<I', payload)
+                rows = np.frombuffer(payload, dtypes[base], count, 4).copy()
+            setattr(state, names[base], rows)
+        elif base in names:
+            setattr(state, names[base], bytes(payload))
+        else:
+            raise ValueError(f"unknown snapshot section {tag}")
+    return state
+
+def diff(a, b):
+    # Human-readable differences between two states, for bisecting desyncs
+    found = []
+    for name in ('seed', 'tick', 'timestep', 'flags'):
+        if getattr(a, name) != getattr(b, name):
+            found.append(f"{name}: {getattr(a, name)} != {getattr(b, name)}")
+    for name, packer in (('game', GAME), ('paddle', PADDLE)):
+        va, vb = packer.unpack(getattr(a, name)), packer.unpack(getattr(b, name))
+        if va != vb:
+            found.append(f"{name}: {va} != {vb}")
+    for name in ('rng', 'field'):
+        if getattr(a, name) != getattr(b, name):
+            found.append(f"{name} differs")
+    for name, _ in ENTITIES:
+        ra, rb = getattr(a, name), getattr(b, name)
+        if len(ra) != len(rb):
+            found.append(f"{name}: {len(ra)} != {len(rb)}")
+        elif ra.dtype == rb.dtype:
+            for i in changed_rows(ra, rb).tolist():
+                fields = [f for f in ra.dtype.names if np.any(ra[i][f] != rb[i][f])]
+                found.append(f"{name}[{i}]: " + ", ".join(f"{f} {ra[i][f]} != {rb[i][f]}" for f in fields))
+    only_a = sorted(set(a.cells) - set(b.cells))
+    only_b = sorted(set(b.cells) - set(a.cells))
+    recolored = sorted(k for k in set(a.cells) & set(b.cells) if a.cells[k] != b.cells[k])
+    for label, cells in (("bricks only in first", only_a), ("bricks only in second", only_b), ("bricks differing", recolored)):
+        if cells:
+            found.append(f"{label}: {cells[:8]}{' ...' if len(cells) > 8 else ''}")
+    return found
+
+def save(path, state):
+    with open(path, 'wb') as f:
+        f.write(encode(state))
+
+def load(path):
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+# --- REWIND ---
+REWIND_SECONDS = 10
+REWIND_BUDGET = 16 * 1024 * 1024  # bytes
+KEYFRAME_INTERVAL = 60             # snapshots per keyframe
+
+class RewindBuffer:
+    # The last `seconds` of snapshots in one preallocated byte ring. Each
+    # entry is a keyframe or a delta against the entry before it; when the
+    # ring is full the oldest entries are overwritten, along with any deltas
+    # left without their keyframe. A keyframe is written every
+    # keyframe_interval entries, or sooner once the deltas since the last one
+    # fill a quarter of the ring (huge swarms), so a full ring never loses
+    # more than that quarter at once.
+    # Snapshots too big for `seconds` of them to fit (thousands of swarm
+    # balls) are kept every stride ticks instead of every tick: stride grows
+    # with the average entry size, so the ring still spans `seconds` and the
+    # push cost is spread over stride ticks. Rewinding still goes back at
+    # one tick per tick, jumping an entry once a stride's worth is saved up.
+    def __init__(self, seconds=REWIND_SECONDS, tick_rate=60, budget=REWIND_BUDGET,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.data = bytearray(budget)
+        self.view = memoryview(self.data)
+        self.entries = deque()  # (tick, offset, length, keyframe), oldest first
+        # Room for a whole keyframe interval more than asked for, since the
+        # oldest interval is dropped as a unit
+        self.max_entries = max(1, int(seconds * tick_rate)) + keyframe_interval
+        self.keyframe_interval = keyframe_interval
+        self.tick_rate = tick_rate
+        # Bytes per tick of play that fit `seconds` in three quarters of the
+        # ring (the rest absorbs keyframes and the wrap)
+        self.tick_budget = budget * 0.75 / max(1, seconds * tick_rate)
+        self.entry_bytes = 0.0  # Running average entry size
+        self.stride = 1
+        self.skipped = 0        # Ticks pushed since the newest entry
+        self.debt = 0           # Ticks of rewinding not yet taken
+        self.head = 0           # Write offset of the next entry
+        self.last = None        # State of the newest entry, base of the next delta
+        self.since_key = 0
+        self.since_key_bytes = 0
+        self.pushes = 0
+        self.push_seconds = 0.0
+        self.bytes_written = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.head = 0
+        self.last = None
+        self.since_key = self.since_key_bytes = 0
+        self.skipped = self.debt = 0
+
+    def push(self, game):
+        # Called after every tick
+        self.debt = 0
+        self.skipped += 1
+        if self.skipped < self.stride and self.entries:
+            return
+        self.skipped = 0
+        start = time.perf_counter()
+        # Captured against the last state even for a keyframe, so the bricks
+        # come from the journal instead of a walk over the whole layout
+        state = game.capture_state(self.last, track=True)
+        key = (state.changes is None or self.since_key >= self.keyframe_interval
+               or self.since_key_bytes >= len(self.data) // 4)
+        data = encode(state, None if key else self.last)
+        self.last = state if self.write(data, state.tick, key) else None
+        self.push_seconds += time.perf_counter() - start
+        self.pushes += 1
+        self.bytes_written += len(data)
+        self.entry_bytes += (len(data) - self.entry_bytes) * (1.0 if self.pushes == 1 else 0.1)
+        self.stride = max(1, math.ceil(self.entry_bytes / self.tick_budget))
+
+    def write(self, data, tick, key):
+        # False if the entry could not be kept; the next one must be a keyframe
+        n = len(data)
+        entries = self.entries
+        if n > len(self.data):
+            entries.clear()
+            self.head = 0
+            return False
+        if self.head + n > len(self.data):
+            # Wrap: whatever lies past the head is older than everything at the start
+            while entries and entries[0][1] >= self.head:
+                entries.popleft()
+            self.head = 0
+        end = self.head + n
+        while entries and entries[0][1] < end and entries[0][1] + entries[0][2] > self.head:
+            entries.popleft()
+        while len(entries) >= self.max_entries:
+            entries.popleft()
+        while entries and not entries[0][3]:
+            entries.popleft()  # A delta whose keyframe is gone
+        if not key and not entries:
+            return False
+        self.view[self.head:end] = data
+        entries.append((tick, self.head, n, key))
+        self.head = end
+        self.since_key = 0 if key else self.since_key + 1
+        self.since_key_bytes = 0 if key else self.since_key_bytes + n
+        return True
+
+    def state_at(self, i):
+        # Decode entry i from the nearest keyframe at or before it
+        entries = self.entries
+        j = i
+        while not entries[j][3]:
+            j -= 1
+        state = None
+        for k in range(j, i + 1):
+            _, offset, length, _ = entries[k]
+            state = decode(self.view[offset:offset + length], state)
+        return state
+
+    def rewind(self, steps):
+        # Go back `steps` ticks: drop the entries newer than that and return
+        # the state of the one left on top, or None if there is nothing to go
+        # back to yet (steps shorter than the gap to the previous entry are
+        # saved up). Later pushes continue from the returned state.
+        entries = self.entries
+        if not entries:
+            return None
+        back = self.debt + steps
+        moved = self.skipped > 0  # The game is ahead of the newest entry
+        if moved:
+            back = max(back - self.skipped, 0)
+            self.skipped = 0
+        newest = entries[-1][0]
+        i = len(entries) - 1
+        while i > 0 and newest - entries[i - 1][0] <= back:
+            i -= 1
+        if i == len(entries) - 1 and not moved:
+            self.debt = back if i > 0 else 0
+            return None
+        self.debt = back - (newest - entries[i][0]) if i > 0 else 0
+        state = self.state_at(i)
+        while len(self.entries) > i + 1:
+            self.entries.pop()
+        _, offset, length, _ = self.entries[-1]
+        self.head = offset + length
+        k = i
+        while not self.entries[k][3]:
+            k -= 1
+        self.since_key = i - k
+        self.since_key_bytes = sum(self.entries[j][2] for j in range(k + 1, i + 1))
+        self.last = state
+        return state
+
+    def stats(self):
+        used = sum(e[2] for e in self.entries)
+        span = self.entries[-1][0] - self.entries[0][0] if self.entries else 0
+        return {"entries": len(self.entries), "bytes": used, "stride": self.stride,
+                "seconds": round(span / self.tick_rate, 2),
+                "push_us": round(self.push_seconds / max(self.pushes, 1) * 1e6, 1),
+                "bytes_per_push": round(self.bytes_written / max(self.pushes, 1))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compare Breakout state snapshots (.bks)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="summarize a snapshot")
+    info.add_argument("state_file")
+    compare = sub.add_parser("diff", help="list every difference between two snapshots")
+    compare.add_argument("first")
+    compare.add_argument("second")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "info":
+            state = load(args.state_file)
+            lives, score, level, combo, *_, state_index, _ = GAME.unpack(state.game)
+            print(f"{args.state_file}: seed={state.seed} tick={state.tick} timestep={state.timestep} "
+                  f"state={STATES[state_index]} level={level} score={score} lives={lives} combo={combo}")
+            print(f"  {len(state.balls)} ball(s), {len(state.lasers)} laser(s), "
+                  f"{len(state.powerups)} powerup(s), {len(state.cells)} brick(s)")
+            return
+        differences = diff(load(args.first), load(args.second))
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    for line in differences:
+        print(line)
+    print("identical" if not differences else f"{len(differences)} difference(s)")
+    sys.exit(1 if differences else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+# Leaderboard in an SQLite database. The game only calls submit(), which
+# queues the row for a background writer thread with its own connection, so
+# the frame loop never waits on disk. Each batch of rows is one transaction
+# (atomic, journaled in WAL mode): a crash can lose rows still in the queue
+# but never corrupts the file. Indexes on score and (player, score) keep top-N
+# queries cheap however many games are stored.
+SCORES_FILE = "scores.db"
+LEGACY_FILE = "highscore.json"  # Single high score kept by older versions
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER,
+    date REAL NOT NULL,
+    seed INTEGER,
+    replay TEXT
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, date);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC, date);
+"""
+COLUMNS = ("player", "score", "level", "date", "seed", "replay")
+INSERT = f"INSERT INTO scores ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+STOP = None  # Queue sentinel: flush and exit the writer
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+class ScoreStore:
+    # Rows are dicts with the COLUMNS keys; date is Unix time, level/seed/replay
+    # may be None. Reads run on the caller's thread; WAL lets them proceed
+    # while the writer commits.
+    def __init__(self, path=SCORES_FILE, legacy_file=LEGACY_FILE):
+        self.path = path
+        self.conn = None
+        self.writer = None
+        self.queue = queue.Queue()
+        try:
+            self.conn = connect(path)
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+            self.migrate(legacy_file)
+        except sqlite3.Error as e:
+            print(f"Leaderboard warning: {path}: {e}")
+            self.conn = None
+            return
+        self.writer = threading.Thread(target=self.write_loop, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def migrate(self, legacy_file):
+        # Import the old highscore.json into an empty leaderboard
+        if legacy_file is None or not os.path.exists(legacy_file):
+            return
+        if self.conn.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                score = int(json.load(f)["highscore"])
+            date = os.path.getmtime(legacy_file)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Leaderboard warning: could not import {legacy_file}: {e}")
+            return
+        if score > 0:
+            with self.conn:
+                self.conn.execute(INSERT, ("legacy", score, None, date, None, None))
+
+    def submit(self, player, score, level=None, seed=None, replay=None, date=None):
+        # Queue a row for the writer thread; never blocks. Returns the row.
+        row = {"player": player, "score": score, "level": level,
+               "date": time.time() if date is None else date, "seed": seed, "replay": replay}
+        if self.writer is not None:
+            self.queue.put(row)
+        return row
+
+    def write_loop(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"Leaderboard warning: {self.path}: {e}")
+            conn = None
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not STOP]
+            running = len(rows) == len(batch)
+            if rows and conn is not None:
+                try:
+                    with conn:
+                        conn.executemany(INSERT, [tuple(row[c] for c in COLUMNS) for row in rows])
+                except (sqlite3.Error, OverflowError) as e:
+                    print(f"Leaderboard warning: {len(rows)} score(s) not saved: {e}")
+            for _ in batch:
+                self.queue.task_done()
+        if conn is not None:
+            conn.close()
+
+    def flush(self):
+        # Block until every submitted row is committed
+        if self.writer is not None:
+            self.queue.join()
+
+    def close(self):
+        if self.writer is not None:
+            self.queue.put(STOP)
+            self.writer.join()
+            self.writer = None
+
+    def top(self, n=10, player=None):
+        if self.conn is None:
+            return []
+        if player is None:
+            rows = self.conn.execute(
+                "SELECT * FROM scores ORDER BY score DESC, date LIMIT ?", (n,))
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM scores WHERE player = ? ORDER BY score DESC, date LIMIT ?", (player, n))
+        return [{c: row[c] for c in COLUMNS} for row in rows]
+
+    def best(self, player=None):
+        top = self.top(1, player)
+        return top[0]["score"] if top else 0
+
+    def count(self):
+        if self.conn is None:
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the Breakout leaderboard")
+    parser.add_argument("db_file", nargs="?", default=SCORES_FILE)
+    parser.add_argument("--top", type=int, default=10, help="number of entries")
+    parser.add_argument("--player", help="only this player's games")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_file):
+        print(f"{args.db_file}: no leaderboard yet")
+        sys.exit(1)
+    store = ScoreStore(args.db_file, legacy_file=None)
+    print(f"{args.db_file}: {store.count()} game(s)")
+    for i, row in enumerate(store.top(args.top, args.player), 1):
+        date = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["date"]))
+        level = "-" if row["level"] is None else row["level"]
+        seed = "-" if row["seed"] is None else row["seed"]
+        print(f"{i:3}. {row['score']:8} {row['player']:<12} level {level:<4} {date}  seed {seed}  {row['replay'] or ''}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
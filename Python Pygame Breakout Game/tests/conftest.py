@@ -0,0 +1,16 @@
+import os
+import sys
+
+# The game modules are flat scripts one directory up; SDL runs without a
+# display or sound card
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # Games look for levels.bkl, sound_cache/ and scores.db in the working
+    # directory; every test gets an empty one
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,18 @@
+import pytest
+
+from main import SoundManager
+
+def test_every_request_is_played_merged_or_dropped():
+    sounds = SoundManager(background=False)
+    if not sounds.sounds:
+        pytest.skip("no audio device")
+    # brick_hit allows 3 voices at once: frames 4 and 5 find them all busy
+    for _ in range(5):
+        for _ in range(4):
+            sounds.play('brick_hit')
+        sounds.play('die')
+        sounds.flush()
+    c = sounds.counters
+    assert c["requested"] == 25
+    assert c["requested"] == c["played"] + c["merged"] + c["dropped"]
+    assert (c["played"], c["merged"], c["dropped"]) == (4, 9, 12)
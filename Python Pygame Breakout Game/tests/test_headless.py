@@ -0,0 +1,56 @@
+import pytest
+
+from main import Game, PowerType, SCREEN_HEIGHT
+from savestate import encode
+from tournament import track_policy
+
+MODES = {
+    "objects": {},
+    "swarm": {"swarm": True},
+    "endless": {"endless": True},
+    "swept": {"swept": True, "timestep": 2.0},
+}
+
+def play(seed, ticks, **mode):
+    game = Game(headless=True, seed=seed, **mode)
+    game.run_headless(track_policy(seed), ticks)
+    return game
+
+@pytest.mark.parametrize("mode", MODES)
+def test_same_seed_same_game(mode):
+    a = play(7, 3000, **MODES[mode])
+    b = play(7, 3000, **MODES[mode])
+    assert (a.ticks, a.score, a.lives, a.level) == (b.ticks, b.score, b.lives, b.level)
+    assert a.brick_state_hash() == b.brick_state_hash()
+    assert encode(a.capture_state()) == encode(b.capture_state())
+
+def test_seeds_differ():
+    a, b = play(1, 2000), play(2, 2000)
+    assert encode(a.capture_state()) != encode(b.capture_state())
+
+def test_headless_game_has_no_display():
+    game = play(3, 100)
+    assert game.screen is None and game.presenter is None
+    assert game.ticks == 100
+
+def test_swarm_rejects_long_ticks():
+    with pytest.raises(ValueError):
+        Game(headless=True, seed=1, swarm=True, swept=True, timestep=2.0)
+
+def test_balls_keep_their_order():
+    # Losing a ball keeps the rest oldest first, so MULTIBALL splits the
+    # oldest ball in play, as swarm mode does
+    game = Game(headless=True, seed=6)
+    balls = game.balls
+    first = balls[0]
+    first.stuck_to_paddle = False
+    first.rect.center = (400, 300)
+    first.dx, first.dy = 0.0, -first.speed
+    game.apply_powerup(PowerType.MULTIBALL)
+    game.apply_powerup(PowerType.MULTIBALL)
+    order = list(balls)
+    assert len(order) == 5
+    order[1].rect.top = SCREEN_HEIGHT + 50  # falls out this tick
+    order[1].dx, order[1].dy = 0.0, order[1].speed
+    game.step(0)
+    assert balls == [b for b in order if b is not order[1]]
@@ -0,0 +1,36 @@
+import pytest
+
+from level_pack import ENTRY, HEADER, LevelPack, append_level, grid_from_bricks, write_pack
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "pack.bkl"
+    levels = [grid_from_bricks([(0, 0, 1), (1, 3, 6)], cols=10), grid_from_bricks([(4, 9, 0)], cols=10)]
+    write_pack(path, levels)
+    assert append_level(path, levels[0]) == 2
+    pack = LevelPack.open(path)
+    assert len(pack) == 3
+    assert pack.bricks(0) == pack.bricks(2) == [(0, 0, 1), (1, 3, 6)]
+    assert pack.bricks(1) == [(4, 9, 0)]
+    pack.close()
+
+@pytest.mark.parametrize("keep", [0, 3, HEADER.size - 1, HEADER.size + 2])
+def test_truncated_pack_rejected(tmp_path, keep):
+    path = tmp_path / "pack.bkl"
+    write_pack(path, [grid_from_bricks([(0, 0, 1)], cols=10)])
+    data = path.read_bytes()
+    path.write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        LevelPack.open(path)
+    with pytest.raises(ValueError):
+        append_level(path, grid_from_bricks([(0, 0, 1)], cols=10))
+
+@pytest.mark.parametrize("entry", [(0, 10, 10), (10**6, 10, 10), (HEADER.size, 2000, 2000)])
+def test_corrupt_index_entry_rejected(tmp_path, entry):
+    path = tmp_path / "pack.bkl"
+    write_pack(path, [grid_from_bricks([(0, 0, 1)], cols=10)])
+    data = bytearray(path.read_bytes())
+    _, _, count, index_offset = HEADER.unpack_from(data, 0)
+    ENTRY.pack_into(data, index_offset, *entry)
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        LevelPack.open(path)
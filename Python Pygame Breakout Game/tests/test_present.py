@@ -0,0 +1,28 @@
+import pygame
+import pytest
+
+from present import Presenter
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.init()
+    yield
+    pygame.quit()
+
+def test_explicit_low_scale_uses_nearest():
+    p = Presenter((800, 600), render_scale=0.6, window_size=(1000, 700))
+    assert p.canvas.get_size() == (480, 360)
+    assert not p.filtered
+    assert Presenter((800, 600), quality="medium", window_size=(1000, 700)).filtered
+
+@pytest.mark.parametrize("quality", ["high", "native"])
+def test_letterboxed_native_size_is_copied(quality):
+    p = Presenter((800, 600), quality=quality, window_size=(1000, 600))
+    assert p.viewport == pygame.Rect(100, 0, 800, 600)
+    assert p.copy and not p.filtered
+    p.canvas.fill((0, 0, 0))
+    p.canvas.fill((255, 0, 0), (10, 20, 30, 40))
+    p.present()
+    assert p.window.get_at((110, 20))[:3] == (255, 0, 0)
+    assert p.window.get_at((109, 20))[:3] == (0, 0, 0)
+    assert p.window.get_at((140, 60))[:3] == (0, 0, 0)
@@ -0,0 +1,14 @@
+import pytest
+
+from profiler import FrameProfiler
+
+@pytest.mark.parametrize("fps", [30, 60, 144, 240])
+def test_trace_holds_trace_seconds_at_any_frame_rate(fps):
+    prof = FrameProfiler(trace_seconds=2)
+    for i in range(5 * fps):
+        prof.frame_start = i / fps
+        prof.phases = [("update", i / fps, i / fps + 0.001)]
+        prof.end_frame({})
+    starts = [start for start, _, _ in prof.frames]
+    assert starts[-1] - starts[0] <= 2
+    assert len(starts) in (2 * fps, 2 * fps + 1)
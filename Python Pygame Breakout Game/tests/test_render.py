@@ -0,0 +1,39 @@
+import hashlib
+
+import numpy as np
+import pygame
+import pytest
+
+from main import Game
+from tournament import track_policy
+
+def frames(seed, dirty, render_scale, count=600, ticks_per_frame=2):
+    # Play a seeded game on screen and hash the canvas after every frame
+    game = Game(seed=seed, dirty_rendering=dirty, render_scale=render_scale, rewind_seconds=0)
+    game.particles.rng = np.random.default_rng(seed)
+    game.state = "PLAYING"
+    game.reset_game()
+    policy = track_policy(seed)
+    hashes = []
+    for _ in range(count):
+        for _ in range(ticks_per_frame):
+            game.step(policy(game))
+        game.particles.update(ticks_per_frame)
+        if game.state != "PLAYING":
+            break
+        if dirty:
+            game.draw_playing_dirty()
+        else:
+            game.draw_frame()
+            game.presenter.present()
+        hashes.append(hashlib.sha1(pygame.image.tobytes(game.screen, "RGB")).hexdigest())
+    game.scores.close()
+    return hashes
+
+@pytest.mark.parametrize("render_scale", [None, 0.75])
+def test_dirty_matches_full_redraw(render_scale):
+    full = frames(5, False, render_scale)
+    dirty = frames(5, True, render_scale)
+    assert len(full) == len(dirty)
+    for i, (a, b) in enumerate(zip(full, dirty)):
+        assert a == b, f"frame {i}"
@@ -0,0 +1,55 @@
+import pytest
+
+from level_pack import grid_from_bricks, write_pack
+from main import Game
+from replay import Replay, FOOTER
+from tournament import track_policy
+
+def record(tmp_path, seed, ticks, **mode):
+    game = Game(headless=True, seed=seed, record_dir=str(tmp_path), **mode)
+    game.run_headless(track_policy(seed), ticks)
+    path = game.save_recording()
+    return game, path
+
+@pytest.mark.parametrize("mode", [{}, {"swarm": True}, {"endless": True}, {"swept": True, "timestep": 2.0}])
+def test_replay_verifies(tmp_path, mode):
+    game, path = record(tmp_path, 11, 2500, **mode)
+    ok, replayed = Replay.load(path).verify()
+    assert ok
+    assert (replayed.ticks, replayed.score) == (game.ticks, game.score)
+
+def test_tampered_replay_fails(tmp_path):
+    game, path = record(tmp_path, 5, 1500)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    ticks, score, brick_hash, end = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+    FOOTER.pack_into(data, len(data) - FOOTER.size, ticks, score + 10, brick_hash, end)
+    ok, _ = Replay(bytes(data)).verify()
+    assert not ok
+
+def test_truncated_replay_rejected(tmp_path):
+    _, path = record(tmp_path, 5, 300)
+    with open(path, 'rb') as f:
+        data = f.read()
+    for cut in (data[:-2], data[:3], b''):
+        with pytest.raises(ValueError):
+            Replay(cut)
+
+def make_pack(path, color_idx):
+    write_pack(path, [grid_from_bricks([(0, c, color_idx) for c in range(10)] + [(2, 4, color_idx)])])
+    return str(path)
+
+def test_replay_checks_level_pack(tmp_path):
+    pack = make_pack(tmp_path / "pack.bkl", 1)
+    other = make_pack(tmp_path / "other.bkl", 2)
+    _, path = record(tmp_path, 3, 1500, level_pack=pack)
+    replay = Replay.load(path)
+    assert replay.verify(pack)[0]
+    for wrong in (None, other, str(tmp_path / "missing.bkl")):
+        with pytest.raises(ValueError, match="level pack"):
+            replay.verify(wrong)
+
+def test_replay_without_pack_ignores_one_in_cwd(tmp_path):
+    _, path = record(tmp_path, 3, 1500, level_pack=None)
+    make_pack("levels.bkl", 1)
+    assert Replay.load(path).verify("levels.bkl")[0]
@@ -0,0 +1,71 @@
+import pytest
+
+from main import Game, INPUT_LAUNCH
+from savestate import RewindBuffer, encode, decode
+from tournament import track_policy
+
+MODES = [{}, {"swarm": True}, {"endless": True}, {"swept": True, "timestep": 2.0},
+         {"timestep": 60 / 144}, {"swarm": True, "timestep": 60 / 144}]
+
+def play(seed, ticks, **mode):
+    game = Game(headless=True, seed=seed, **mode)
+    game.run_headless(track_policy(seed), ticks)
+    return game
+
+@pytest.mark.parametrize("mode", MODES)
+def test_restore_then_continue_matches(mode):
+    # Saving, restoring into another game and playing on gives the same game
+    a = play(21, 1500, **mode)
+    data = encode(a.capture_state())
+    b = Game(headless=True, seed=99, **mode)
+    b.restore_state(decode(data))
+    assert encode(b.capture_state()) == data
+    policy_a, policy_b = track_policy(21), track_policy(21)
+    a.run_headless(policy_a, 3000)
+    b.run_headless(policy_b, 3000)
+    assert encode(a.capture_state()) == encode(b.capture_state())
+
+def test_empty_swarm_round_trip():
+    # A swarm game after its last ball is lost (the rewind buffer pushes then)
+    game = Game(headless=True, seed=4, swarm=True)
+    game.balls.clear()
+    data = encode(game.capture_state())
+    other = Game(headless=True, seed=4, swarm=True)
+    other.restore_state(decode(data))
+    assert len(other.balls) == 0
+    assert encode(other.capture_state()) == data
+
+def test_swarm_game_over_with_rewind():
+    # Every --swarm game ends by pushing a state with no balls
+    game = Game(headless=True, seed=4, swarm=True)
+    game.rewind = RewindBuffer(2, 60)
+    game.run_headless(lambda g: INPUT_LAUNCH, 20000)
+    assert game.state == "GAMEOVER"
+    assert len(game.balls) == 0
+    assert game.rewind.stats()["entries"] > 0
+
+def test_mode_mismatch_rejected():
+    data = encode(play(3, 200).capture_state())
+    with pytest.raises(ValueError):
+        Game(headless=True, seed=3, swarm=True).restore_state(decode(data))
+
+def test_rewind_spans_its_seconds_with_big_snapshots():
+    # A ring far too small for a snapshot per tick keeps every stride ticks,
+    # still spans the asked-for seconds and still rewinds one tick per tick
+    game = Game(headless=True, seed=8)
+    game.rewind = RewindBuffer(2, 60, budget=24 * 1024)
+    game.run_headless(track_policy(8), 1200)
+    stats = game.rewind.stats()
+    assert stats["stride"] > 1
+    assert stats["seconds"] >= 2
+    start = game.ticks
+    for _ in range(90):
+        game.rewind_by(1)
+    assert start - 90 - stats["stride"] <= game.ticks <= start - 90 + stats["stride"]
+    # Play resumes from the rewound state as if it had never gone further
+    rewound = encode(game.capture_state())
+    other = Game(headless=True, seed=8)
+    other.restore_state(decode(rewound))
+    game.run_headless(track_policy(8), game.ticks + 300)
+    other.run_headless(track_policy(8), other.ticks + 300)
+    assert encode(game.capture_state()) == encode(other.capture_state())
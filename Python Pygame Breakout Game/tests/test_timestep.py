@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from main import FPS, INPUT_RIGHT, Ball, BallSwarm, Laser, Paddle, Powerup
+
+# Ten 60 Hz frames of game time at each simulation rate: everything must
+# cover the same distance however many ticks that is split into
+RATES = [60, 120, 144]
+FRAMES = 10
+
+def ticks(rate):
+    return rate * FRAMES // FPS
+
+def aimed_ball(ball):
+    # Speed equal to the velocity's length, so normalizing changes nothing
+    ball.stuck_to_paddle = False
+    ball.dx, ball.dy = 1.0, -5.9
+    ball.speed = math.hypot(ball.dx, ball.dy)
+    return ball
+
+@pytest.mark.parametrize("rate", RATES)
+def test_ball_distance(rate):
+    ball = aimed_ball(Ball(400, 400))
+    paddle = Paddle()
+    for _ in range(ticks(rate)):
+        ball.update(paddle, FPS / rate)
+    assert abs(ball.rect.centerx - 410) <= 1
+    assert abs(ball.rect.centery - 341) <= 1
+
+@pytest.mark.parametrize("rate", RATES)
+def test_swarm_distance(rate):
+    swarm = BallSwarm(4)
+    i = swarm.spawn(400, 400)
+    swarm.stuck[i] = False
+    swarm.dx[i], swarm.dy[i] = 1.0, -5.9
+    swarm.speed[i] = math.hypot(1.0, 5.9)
+    paddle = Paddle()
+    for _ in range(ticks(rate)):
+        swarm.move(paddle, FPS / rate)
+    assert abs(swarm.x[i] - 402) <= 1
+    assert abs(swarm.y[i] - 333) <= 1
+
+@pytest.mark.parametrize("rate", RATES)
+def test_paddle_distance(rate):
+    paddle = Paddle()
+    paddle.rect.x = 100
+    for _ in range(ticks(rate)):
+        paddle.update(INPUT_RIGHT, FPS / rate)
+    assert abs(paddle.rect.x - 180) <= 1
+
+@pytest.mark.parametrize("rate", RATES)
+def test_powerup_and_laser_distance(rate):
+    powerup, laser = Powerup(100, 100), Laser(100, 500)
+    for _ in range(ticks(rate)):
+        powerup.update(FPS / rate)
+        laser.update(FPS / rate)
+    assert abs(powerup.rect.y - 130) <= 1
+    assert abs(laser.rect.y - 420) <= 1
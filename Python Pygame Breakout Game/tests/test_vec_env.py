@@ -0,0 +1,51 @@
+import pytest
+
+from main import Game, PADDLE_WIDTH
+from vec_env import VecBreakout, tracking_actions
+
+def sync(env, game):
+    # Copy the Game's state into env 0
+    ball, paddle = game.balls[0], game.paddle
+    env.paddle_x[0] = paddle.rect.x
+    env.ball_x[0], env.ball_y[0] = ball.rect.topleft
+    env.dx[0], env.dy[0], env.speed[0] = ball.dx, ball.dy, ball.speed
+    env.stuck[0] = ball.stuck_to_paddle
+    env.score[0], env.combo[0], env.lives[0], env.level[0] = game.score, game.combo, game.lives, game.level
+    env.speed_mult[0] = game.ball_speed_mult
+    env.bricks[0] = False
+    for r, c in game.bricks.cells:
+        env.bricks[0, r, c] = True
+    env.remaining[0] = len(game.bricks)
+
+def modelled(game):
+    # VecBreakout has one ball and no powerups or lasers
+    return (len(game.balls) == 1 and not game.balls[0].stuck_to_paddle and game.paddle.width == PADDLE_WIDTH
+            and not game.paddle.laser_active and not game.lasers and not game.powerups)
+
+def state(env, game):
+    ball = game.balls[0]
+    return ((game.paddle.rect.x, ball.rect.x, ball.rect.y, ball.dx, ball.dy, game.score),
+            (env.paddle_x[0], env.ball_x[0], env.ball_y[0], env.dx[0], env.dy[0], env.score[0]))
+
+@pytest.mark.parametrize("seed", [1, 2, 3, 4])
+def test_vec_env_matches_game(seed):
+    # Step both with the same inputs; on ticks VecBreakout does not model
+    # (launch draws, powerups, lost balls, new levels) copy the Game over
+    game = Game(headless=True, seed=seed)
+    env = VecBreakout(1, seed=seed)
+    env.reset()
+    sync(env, game)
+    compared = 0
+    for tick in range(3000):
+        action = int(tracking_actions(env.observe())[0])
+        check = modelled(game)
+        lives, level = game.lives, game.level
+        game.step(action)
+        env.step([action])
+        if check and modelled(game) and (game.lives, game.level) == (lives, level):
+            got, want = state(env, game)
+            assert got == want, f"tick {tick}"
+            compared += 1
+        else:
+            sync(env, game)
+    assert compared > 1000
@@ -0,0 +1,156 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from main import Game, LEVEL_PACK_FILE, PADDLE_WIDTH, INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE, INPUT_LAUNCH
+
+# Plays seeded headless games across a process pool and reports the results.
+#   python tournament.py --games 256 --policy track --report results.json
+# A policy is a callable policy(game) -> INPUT_* flags. Built-ins are listed in
+# POLICIES; "package.module:function" loads any other importable factory,
+# which is called with the game seed and must return the policy.
+
+# --- POLICIES ---
+def idle_policy(seed):
+    def policy(game):
+        return INPUT_LAUNCH
+    return policy
+
+def random_policy(seed):
+    rng = random.Random(seed)
+    def policy(game):
+        return rng.choice((0, INPUT_LEFT, INPUT_RIGHT)) | INPUT_LAUNCH | INPUT_FIRE
+    return policy
+
+def track_policy(seed):
+    # Follow the lowest ball, aiming off-center so the bounce angle keeps changing
+    def policy(game):
+        inputs = INPUT_LAUNCH | INPUT_FIRE
+        lowest = game.lowest_ball()
+        if lowest is None:
+            return inputs
+        aim = ((game.ticks // 90) % 5 - 2) * (PADDLE_WIDTH // 6)
+        target = lowest[0] + aim
+        deadband = max(4, game.paddle.speed * game.timestep / 2)
+        if target < game.paddle.rect.centerx - deadband:
+            inputs |= INPUT_LEFT
+        elif target > game.paddle.rect.centerx + deadband:
+            inputs |= INPUT_RIGHT
+        return inputs
+    return policy
+
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "track": track_policy,
+}
+
+def load_policy(spec, seed):
+    if spec in POLICIES:
+        return POLICIES[spec](seed)
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)(seed)
+
+# --- WORKER ---
+def play_game(seed, policy_spec, max_ticks, swept=False, timestep=1.0, endless=False, swarm=False, level_pack=None):
+    # level_pack: path of the pack to play, None for procedural levels only
+    game = Game(headless=True, seed=seed, swept=swept, timestep=timestep, endless=endless, swarm=swarm,
+                level_pack=level_pack)
+    policy = load_policy(policy_spec, seed)
+    start = time.perf_counter()
+    game.run_headless(policy, max_ticks)
+    elapsed = time.perf_counter() - start
+    return {
+        "seed": seed,
+        "score": game.score,
+        "level": game.level,
+        "ticks": game.ticks,
+        "game_seconds": round(game.ticks * timestep / 60, 2),
+        "bricks_broken": game.bricks_broken,
+        "powerups_collected": game.powerups_collected,
+        "finished": game.state == "GAMEOVER",
+        "seconds": round(elapsed, 4),
+    }
+
+# --- REPORT ---
+def summarize(values):
+    return {
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "stdev": statistics.pstdev(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+def build_report(args, results, wall_time):
+    total_ticks = sum(r["ticks"] for r in results)
+    return {
+        "policy": args.policy,
+        "games": len(results),
+        "workers": args.workers,
+        "base_seed": args.seed,
+        "max_ticks": args.max_ticks,
+        "swept": args.swept,
+        "timestep": args.timestep,
+        "endless": args.endless,
+        "swarm": args.swarm,
+        "levels": args.levels,
+        "wall_seconds": round(wall_time, 3),
+        "ticks_per_second": round(total_ticks / wall_time) if wall_time > 0 else 0,
+        "summary": {key: summarize([r[key] for r in results])
+                    for key in ("score", "level", "ticks", "game_seconds", "bricks_broken", "powerups_collected")},
+        "results": sorted(results, key=lambda r: r["seed"]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded headless Breakout games across all cores")
+    parser.add_argument("--games", type=int, default=64, help="number of games to play")
+    parser.add_argument("--policy", default="track", help="built-in policy (%s) or module:factory" % ", ".join(POLICIES))
+    parser.add_argument("--seed", type=int, default=0, help="game i uses seed + i")
+    parser.add_argument("--max-ticks", type=int, default=200000, help="tick limit per game")
+    parser.add_argument("--swept", action="store_true", help="continuous (swept) ball collisions")
+    parser.add_argument("--timestep", type=float, default=1.0, help="60 FPS frames simulated per tick (use with --swept)")
+    parser.add_argument("--endless", action="store_true", help="endless scrolling brick field")
+    parser.add_argument("--swarm", action="store_true", help="massive multiball (array-backed balls)")
+    parser.add_argument("--levels", default=LEVEL_PACK_FILE, help="level pack to play ('' for procedural levels only)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--report", default="tournament.json", help="JSON report path")
+    parser.add_argument("--quiet", action="store_true", help="do not print a line per game")
+    args = parser.parse_args()
+    if args.swarm and args.timestep > 1:
+        parser.error("--swarm needs --timestep 1 or less (swarm balls have no swept collisions)")
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(play_game, args.seed + i, args.policy, args.max_ticks, args.swept, args.timestep, args.endless, args.swarm,
+                               args.levels or None)
+                   for i in range(args.games)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if not args.quiet:
+                print(f"[{len(results)}/{args.games}] seed={result['seed']} score={result['score']} "
+                      f"level={result['level']} ticks={result['ticks']} bricks={result['bricks_broken']} "
+                      f"powerups={result['powerups_collected']}", flush=True)
+    wall_time = time.perf_counter() - start
+
+    report = build_report(args, results, wall_time)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    score = report["summary"]["score"]
+    level = report["summary"]["level"]
+    print(f"{report['games']} games in {wall_time:.2f}s on {args.workers} workers "
+          f"({report['ticks_per_second']:,} ticks/sec)")
+    print(f"score mean {score['mean']:.1f} median {score['median']} max {score['max']} | "
+          f"level mean {level['mean']:.2f} max {level['max']}")
+    print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from main import (SCREEN_WIDTH, SCREEN_HEIGHT, PADDLE_WIDTH, PADDLE_HEIGHT, BALL_RADIUS,
+                  BALL_SPEED_BASE, BRICK_WIDTH, BRICK_HEIGHT, BRICK_TOP, BRICK_CELL_W,
+                  BRICK_CELL_H, INPUT_LEFT, INPUT_RIGHT, INPUT_LAUNCH, hypot, round_rect)
+
+# N independent single-ball games stepped in lockstep. Every rule mirrors the
+# Game/Ball/Paddle code in main.py (integer rect positions, normalize after
+# move, paddle bounce angle, combo scoring, level progression); powerups and
+# lasers are not simulated. Procedural levels deeper than MAX_ROWS rows are
+# clipped to fit the brick tensor.
+COLS = 10
+MAX_ROWS = 20
+PADDLE_Y = SCREEN_HEIGHT - 40
+PADDLE_SPEED = 8
+BALL_SIZE = BALL_RADIUS * 2
+SPAWN_X = SCREEN_WIDTH // 2 - BALL_RADIUS
+SPAWN_Y = SCREEN_HEIGHT - 60 - BALL_RADIUS
+OBS_SIZE = 6
+
+class VecBreakout:
+    def __init__(self, num_envs, seed=None, max_rows=MAX_ROWS):
+        self.num_envs = num_envs
+        self.max_rows = max_rows
+        self.rng = np.random.default_rng(seed)
+        n = num_envs
+
+        self.paddle_x = np.zeros(n, np.int64)
+        self.ball_x = np.zeros(n, np.int64)
+        self.ball_y = np.zeros(n, np.int64)
+        self.dx = np.zeros(n, np.float64)
+        self.dy = np.zeros(n, np.float64)
+        self.speed = np.zeros(n, np.float64)
+        self.stuck = np.zeros(n, bool)
+
+        self.score = np.zeros(n, np.int64)
+        self.combo = np.zeros(n, np.int64)
+        self.lives = np.zeros(n, np.int64)
+        self.level = np.zeros(n, np.int64)
+        self.speed_mult = np.zeros(n, np.float64)
+        self.ticks = np.zeros(n, np.int64)
+        self.bricks = np.zeros((n, max_rows, COLS), bool)
+        self.remaining = np.zeros(n, np.int64)
+
+        # Brick rect edges per grid cell, used by the collision test
+        self.brick_left = 2 + np.arange(COLS) * BRICK_CELL_W
+        self.brick_top = BRICK_TOP + np.arange(max_rows) * BRICK_CELL_H
+        self.all_envs = np.arange(n)
+
+    def reset(self):
+        self.reset_game(self.all_envs)
+        return self.observe()
+
+    def reset_game(self, idx):
+        self.score[idx] = 0
+        self.lives[idx] = 3
+        self.level[idx] = 1
+        self.combo[idx] = 1
+        self.speed_mult[idx] = 1.0
+        self.ticks[idx] = 0
+        self.reset_level(idx)
+
+    def reset_level(self, idx):
+        # Fresh paddle, stuck ball and procedural brick pattern (Game.generate_level)
+        self.paddle_x[idx] = SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2
+        self.spawn_ball(idx)
+
+        r = np.arange(self.max_rows)[None, :, None]
+        c = np.arange(COLS)[None, None, :]
+        level = self.level[idx][:, None, None]
+        pattern = level % 4
+        keep = np.broadcast_to(r < 4 + level // 2, (len(idx), self.max_rows, COLS)).copy()
+        keep &= ~((pattern == 1) & ((r + c) % 2 == 0))
+        keep &= ~((pattern == 2) & ((c < r) | (c >= COLS - r)))
+        keep &= ~((pattern == 3) & (self.rng.random((len(idx), self.max_rows, COLS)) < 0.2))
+        self.bricks[idx] = keep
+        self.remaining[idx] = keep.sum(axis=(1, 2))
+
+    def spawn_ball(self, idx):
+        self.ball_x[idx] = SPAWN_X
+        self.ball_y[idx] = SPAWN_Y
+        self.dx[idx] = 0.0
+        self.dy[idx] = 0.0
+        self.speed[idx] = BALL_SPEED_BASE * self.speed_mult[idx]
+        self.stuck[idx] = True
+
+    def observe(self):
+        obs = np.empty((self.num_envs, OBS_SIZE), np.float32)
+        obs[:, 0] = self.paddle_x
+        obs[:, 1] = self.ball_x
+        obs[:, 2] = self.ball_y
+        obs[:, 3] = self.dx
+        obs[:, 4] = self.dy
+        obs[:, 5] = self.stuck
+        return obs
+
+    def step(self, actions):
+        # actions: per-env INPUT_* flags, as passed to Game.step.
+        # Returns (obs, rewards, dones); finished games are reset automatically.
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+        self.ticks += 1
+
+        # Launch stuck balls
+        launch = self.stuck & ((actions & INPUT_LAUNCH) != 0)
+        if launch.any():
+            self.stuck[launch] = False
+            self.dy[launch] = -np.abs(self.speed[launch])
+            self.dx[launch] = self.rng.uniform(-2, 2, int(launch.sum()))
+
+        # Paddle
+        move = ((actions & INPUT_RIGHT) != 0).astype(np.int64) - ((actions & INPUT_LEFT) != 0)
+        px = np.clip(self.paddle_x + move * PADDLE_SPEED, 0, SCREEN_WIDTH - PADDLE_WIDTH)
+        self.paddle_x = px
+
+        # Ball.update: move, normalize, walls
+        stuck = self.stuck
+        free = ~stuck
+        bx = np.where(stuck, px + PADDLE_WIDTH // 2 - BALL_RADIUS, round_rect(self.ball_x + self.dx))
+        by = np.where(stuck, PADDLE_Y - BALL_SIZE, round_rect(self.ball_y + self.dy))
+        vel = hypot(self.dx, self.dy)  # Bit for bit the math.hypot Ball normalizes with
+        scale = np.where(free & (vel != 0), self.speed / np.where(vel == 0, 1.0, vel), 1.0)
+        dx = self.dx * scale
+        dy = self.dy * scale
+
+        hit_left = free & (bx <= 0)
+        bx[hit_left] = 0
+        dx[hit_left] *= -1
+        hit_right = free & (bx + BALL_SIZE >= SCREEN_WIDTH)
+        bx[hit_right] = SCREEN_WIDTH - BALL_SIZE
+        dx[hit_right] *= -1
+        hit_top = free & (by <= 0)
+        by[hit_top] = 0
+        dy[hit_top] *= -1
+        lost = free & (by > SCREEN_HEIGHT)
+
+        # Paddle bounce
+        on_paddle = ((bx < px + PADDLE_WIDTH) & (px < bx + BALL_SIZE) &
+                     (by < PADDLE_Y + PADDLE_HEIGHT) & (PADDLE_Y < by + BALL_SIZE) & (dy > 0))
+        if on_paddle.any():
+            rel = (px[on_paddle] + PADDLE_WIDTH // 2) - (bx[on_paddle] + BALL_RADIUS)
+            angle = rel / (PADDLE_WIDTH / 2) * (5 * math.pi / 12)
+            speed = self.speed[on_paddle]
+            # math.sin/cos per bounce: NumPy's vectorized ones may differ in the last bit
+            dx[on_paddle] = speed * -np.array([math.sin(a) for a in angle.tolist()])
+            dy[on_paddle] = -speed * np.array([math.cos(a) for a in angle.tolist()])
+            self.combo[on_paddle] = 1
+
+        # Bricks: first overlapping cell in row-major order, like BrickGrid.hit
+        hit, hit_r, hit_c = self.brick_hits(bx, by)
+        cleared = np.zeros(self.num_envs, bool)
+        if hit.any():
+            env = np.nonzero(hit)[0]
+            r, c = hit_r[env], hit_c[env]
+            self.bricks[env, r, c] = False
+            self.score[env] += 10 * self.combo[env]
+            self.combo[env] += 1
+            self.remaining[env] -= 1
+
+            cx = bx[env] + BALL_RADIUS
+            left = self.brick_left[c]
+            side = (cx < left) | (cx > left + BRICK_WIDTH)
+            dx[env[side]] *= -1
+            dy[env[~side]] *= -1
+            cleared[env] = self.remaining[env] == 0
+
+        self.ball_x, self.ball_y, self.dx, self.dy = bx, by, dx, dy
+
+        if cleared.any():
+            idx = np.nonzero(cleared)[0]
+            self.level[idx] += 1
+            self.speed_mult[idx] += 0.1
+            self.reset_level(idx)
+
+        dones = np.zeros(self.num_envs, bool)
+        if lost.any():
+            self.lives[lost] -= 1
+            dones = lost & (self.lives <= 0)
+            respawn = np.nonzero(lost & ~dones)[0]
+            self.spawn_ball(respawn)
+            self.combo[respawn] = 1
+
+        rewards = self.score - score_before
+        if dones.any():
+            self.reset_game(np.nonzero(dones)[0])
+        return self.observe(), rewards, dones
+
+    def brick_hits(self, bx, by):
+        n = self.num_envs
+        rows = ((by - BRICK_TOP) // BRICK_CELL_H, (by + BALL_SIZE - 1 - BRICK_TOP) // BRICK_CELL_H)
+        cols = ((bx - 2) // BRICK_CELL_W, (bx + BALL_SIZE - 1 - 2) // BRICK_CELL_W)
+        hit = np.zeros(n, bool)
+        hit_r = np.zeros(n, np.int64)
+        hit_c = np.zeros(n, np.int64)
+        for r in rows:
+            for c in cols:
+                valid = (r >= 0) & (r < self.max_rows) & (c >= 0) & (c < COLS) & ~hit
+                rc = np.clip(r, 0, self.max_rows - 1)
+                cc = np.clip(c, 0, COLS - 1)
+                left = self.brick_left[cc]
+                top = self.brick_top[rc]
+                found = (valid & self.bricks[self.all_envs, rc, cc] &
+                         (bx < left + BRICK_WIDTH) & (left < bx + BALL_SIZE) &
+                         (by < top + BRICK_HEIGHT) & (top < by + BALL_SIZE))
+                hit_r[found] = rc[found]
+                hit_c[found] = cc[found]
+                hit |= found
+        return hit, hit_r, hit_c
+
+def tracking_actions(obs):
+    # Simple scripted policy: keep the paddle under the ball and launch at once
+    paddle_center = obs[:, 0] + PADDLE_WIDTH // 2
+    ball_center = obs[:, 1] + BALL_RADIUS
+    actions = np.full(len(obs), INPUT_LAUNCH, np.int64)
+    actions[ball_center < paddle_center - 20] |= INPUT_LEFT
+    actions[ball_center > paddle_center + 5] |= INPUT_RIGHT
+    return actions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark VecBreakout throughput")
+    parser.add_argument("--envs", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = VecBreakout(args.envs, seed=args.seed)
+    obs = env.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        obs, rewards, dones = env.step(tracking_actions(obs))
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    print(f"{args.envs} envs x {args.steps} steps in {elapsed:.2f}s: "
+          f"{args.envs * args.steps / elapsed:,.0f} env-steps/sec, {episodes} episodes finished")